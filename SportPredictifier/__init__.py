@@ -1,7 +1,14 @@
+'''
+SportPredictifier predicts the results of sports games by simulating the scores of each team from their past performances.
+
+Dependencies that are only needed by some commands (SciPy, matplotlib, and xlsxwriter) are imported inside the functions that use them
+rather than at the top of their modules, so that importing the package stays quick.
+'''
 __version__ = "3.0dev"
 
 from .simulate import *
 from .objects import *
 from .load import *
 from .report import *
+from .store import *
 from .main import *
\ No newline at end of file
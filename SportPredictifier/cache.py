@@ -0,0 +1,132 @@
+import hashlib
+import os
+import pickle
+import tempfile
+
+cache_report = {'hits': 0, 'misses': 0}
+
+# Changed whenever the format of the cached data changes so that older entries aren't used
+data_version = 2
+
+def __hash_file(digest, fp):
+    '''
+    Adds the name and contents of a file to a hash
+    '''
+    digest.update(os.path.basename(fp).encode())
+    with open(fp, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+
+def data_key(settings, round_number = None, score_table_query = None, drop_null_score_table_records = False):
+    '''
+    Creates the key of the data loaded by `load.data()` from the contents of every input file and the settings, so that the cached data is
+    only used if none of them have changed
+
+    Parameters
+    ----------
+    settings (dict):
+        Settings for the competition
+    round_number (int, optional):
+        Round number passed to `load.data()`
+    score_table_query (str, optional):
+        Query used to filter the score tables
+    drop_null_score_table_records (bool):
+        Whether records with null values were dropped from the score tables
+
+    Returns
+    -------
+    key (str):
+        Hexadecimal SHA-256 hash identifying the data
+    '''
+    digest = hashlib.sha256()
+    digest.update('data_version={}'.format(data_version).encode())
+
+    # The seed is drawn for each run and doesn't affect the data
+    digest.update(repr(sorted((key, repr(value)) for (key, value) in settings.items() if key != 'seed')).encode())
+    digest.update(repr((round_number, score_table_query, bool(drop_null_score_table_records))).encode())
+
+    for file_setting in ['stadia_file', 'teams_file', 'score_settings_file']:
+        __hash_file(digest, settings[file_setting])
+    if settings.get('use_spatial_weights') or settings.get('temporal_decay') is not None: # Game locations and dates come from the schedule
+        __hash_file(digest, settings['schedule_file'])
+    if settings.get('score_store') is not None:
+        for store_file in sorted(os.listdir(settings['score_store'])):
+            __hash_file(digest, os.path.join(settings['score_store'], store_file))
+    else:
+        for score_table_file in sorted(os.listdir(settings['score_table_path'])):
+            if score_table_file.endswith('.csv'):
+                __hash_file(digest, os.path.join(settings['score_table_path'], score_table_file))
+
+    return digest.hexdigest()
+
+def load(cache_directory, key, report = False):
+    '''
+    Reads data from the cache
+
+    Parameters
+    ----------
+    cache_directory (str):
+        Directory the cache is kept in
+    key (str):
+        Key of the data from `data_key()`
+    report (bool):
+        If `True`, whether the data was in the cache is printed
+
+    Returns
+    -------
+    data (object):
+        Cached data, or `None` if it isn't in the cache or can't be read
+    '''
+    fp = os.path.join(cache_directory, key + '.pkl')
+    try:
+        with open(fp, 'rb') as f:
+            data = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, IndexError, TypeError, ValueError) as error:
+        # Data that can't be unpickled (e.g. truncated, or written by a build whose classes have since moved or changed) is removed so
+        # that it's replaced by the next store
+        if not isinstance(error, OSError):
+            try:
+                os.remove(fp)
+            except OSError:
+                pass
+        cache_report['misses'] += 1
+        if report:
+            print("Cache miss for {0} ({1} hits, {2} misses)".format(key[:12], cache_report['hits'], cache_report['misses']))
+        return None
+
+    os.utime(fp) # Marks the data as recently used so it is evicted last
+    cache_report['hits'] += 1
+    if report:
+        print("Cache hit for {0} ({1} hits, {2} misses)".format(key[:12], cache_report['hits'], cache_report['misses']))
+    return data
+
+def store(cache_directory, key, data, max_size = None):
+    '''
+    Writes data to the cache, evicting the least recently used data if the cache is larger than its maximum size
+
+    Parameters
+    ----------
+    cache_directory (str):
+        Directory the cache is kept in. It is created if it doesn't exist
+    key (str):
+        Key of the data from `data_key()`
+    data (object):
+        Data to cache, which must be picklable
+    max_size (float, optional):
+        Maximum size of the cache in megabytes
+    '''
+    os.makedirs(cache_directory, exist_ok = True)
+
+    # Writing to a temporary file first means that other processes never read a partly written file
+    (handle, temp_fp) = tempfile.mkstemp(dir = cache_directory, suffix = '.tmp')
+    with os.fdopen(handle, 'wb') as f:
+        pickle.dump(data, f, protocol = pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_fp, os.path.join(cache_directory, key + '.pkl'))
+
+    if max_size is not None:
+        entries = [os.path.join(cache_directory, entry) for entry in os.listdir(cache_directory) if entry.endswith('.pkl')]
+        entries.sort(key = os.path.getmtime)
+        total_size = sum(os.path.getsize(entry) for entry in entries)
+        while total_size > max_size*2**20 and len(entries) > 1:
+            total_size -= os.path.getsize(entries[0])
+            os.remove(entries.pop(0))
@@ -1,8 +1,8 @@
 import numpy as np
-from scipy.stats import entropy
 
 from .util import *
-from .weighting.spatial import get_spatial_weight
+from .objects import StatsTensor
+from .weighting.spatial import get_spatial_weights
 
 global compliment_direction
 
@@ -28,81 +28,198 @@ def weighted_variance(data, weights):
     v2 = np.square(weights).sum()
     return (weights*np.square(data - weighted_average)).sum() / (v1 - (v2/v1))
 
-def spatial_weights(score_tables, teams, stadia):
+def long_score_table(score_tables):
     '''
-    Calculates sptial weights to be used in score tables for calculation. For each score table stored in memory, a spatial weight field is
-    added in place for each stadium used in the competition.
+    Concatenates the score tables of every team into a single long-format table with a row for each game played by each team, so that the
+    statistics of every team can be calculated at once with grouped array operations instead of one team at a time
 
     Parameters
     ----------
     score_tables (SportPredictifier.ObjectCollection):
         Collection of score tables for every team in the competition
-    teams (SportPredictifier.ObjectCollection):
-        Collection of teams playing in the competition
-    stadia (SportPredictifier.ObjectCollection):
-        Collection of teams competing in the competition
+
+    Returns
+    -------
+    score_table (pandas.DataFrame):
+        Score tables of every team stacked on top of each other, with the team's code in a categorical `TEAM` column
     '''
-    print("Calculating spatial weights")
-    for team in score_tables:
-        for stadium in stadia:
-            def __get_stadium_specific_weight(location):
-                return get_spatial_weight(stadia[location], teams[team].stadium, stadia[stadium])
-            score_tables[team]['spatial_weight_{}'.format(stadium)] = score_tables[team]['VENUE'].apply(__get_stadium_specific_weight)
+    codes = list(score_tables.keys())
+    score_table = pd.concat([score_tables[team] for team in codes], ignore_index = True)
+    score_table.insert(0, 'TEAM', pd.Categorical(np.repeat(codes, [len(score_tables[team]) for team in codes]), categories = codes))
+    return score_table
 
-def stat(stats, team, direction, score_settings, score_type, score_tables, reference_location = None):
+def __group_sum(index, values, n_teams):
     '''
-    Calculates a stat for a specific score type for each team. A dictionary called `stats` is updated in place.
+    Sums values for each team
 
     Parameters
     ----------
-    stats (dict):
-        Dictionary to keep track of stats for each team
-    team (str):
-        Code of the team to calculate the stat of
-    direction (str):
-        Equal to "F" if for and "A" if against
+    index (numpy.ndarray):
+        Position of the team in each row
+    values (array-like):
+        Values to sum
+    n_teams (int):
+        Number of teams
+
+    Returns
+    -------
+    sums (numpy.ndarray):
+        Sum of the values for each team
+    '''
+    return np.bincount(index, weights = values, minlength = n_teams)
+
+def __weighted_stats(score_table, score_settings, weights):
+    '''
+    Calculates the stat of every score type in both directions for every team with the same weighting. For probabilistic score types, this
+    is the weighted number of scores divided by the weighted value of the condition (or the base probability if the condition has never
+    been met). Otherwise, it is the weighted mean, along with the weighted variance if the score type has no opponent effect.
+
+    Parameters
+    ----------
+    score_table (pandas.DataFrame):
+        Long-format score table from `long_score_table()`
     score_settings (SportPredictifier.ObjectCollection):
         Score settings for the competition
-    score_type (str):
-        Score type to calculate the stat of
-    score_tables (SportPredictifier.ObjectCollection):
-        Collection of score tables for each team
-    reference_location (str):
-        Code of stadium to be used as reference location for calculating spatial weights
+    weights (numpy.ndarray):
+        Weight of each row of the score table
+
+    Returns
+    -------
+    stats (dict):
+        Dictionary with the stat of each score type in each direction as an array with a value for each team (or a tuple of two arrays
+        with the mean and variance)
     '''
-    # Apply spatial weights if a reference location is given, otherwise use default weights
-    if reference_location is not None:
-        weights = score_tables[team]['spatial_weight_{}'.format(reference_location)]
-    else:
-        weights = score_tables[team]['weight']
+    index = score_table['TEAM'].cat.codes.values
+    n_teams = len(score_table['TEAM'].cat.categories)
+    total_weight = __group_sum(index, weights, n_teams)
 
-    # For probabilistic score types, divide the number of scores by its condition
-    if score_settings[score_type].prob:
-        condition = score_settings[score_type].condition.replace('{F}', direction).replace('{A}', compliment_direction(direction))
-        if score_tables[team].eval(condition).sum() == 0: # If the condition hasn't been met, use the base probability
-            stats[direction][score_type] = score_settings[score_type].base
+    stats = {}
+    for direction in directions:
+        stats[direction] = {}
+        for score_type in score_settings:
+            scores = score_table[score_type + '_' + direction].values
+            if score_settings[score_type].prob:
+                condition = score_settings[score_type].condition.evaluate_columns(score_table, direction, compliment_direction(direction)).values
+                with np.errstate(divide = 'ignore', invalid = 'ignore'):
+                    ratio = __group_sum(index, scores*weights, n_teams) / __group_sum(index, condition*weights, n_teams)
+                # If the condition hasn't been met, use the base probability
+                stats[direction][score_type] = np.where(__group_sum(index, condition, n_teams) == 0, score_settings[score_type].base, ratio)
+            else:
+                mean = __group_sum(index, scores*weights, n_teams) / total_weight
+                if score_settings[score_type].opp_effect:
+                    stats[direction][score_type] = mean
+                else: # Calculating the weighted variance here since no residual stats will be relevant if opp_effect is False
+                    stats[direction][score_type] = (mean, __weighted_group_variance(index, scores, weights, mean, total_weight))
+    return stats
+
+def __weighted_group_variance(index, values, weights, mean, total_weight):
+    '''
+    Computes the weighted variance of values for each team in the same way as `weighted_variance()`
+
+    Parameters
+    ----------
+    index (numpy.ndarray):
+        Position of the team in each row
+    values (numpy.ndarray):
+        Data to compute variance of
+    weights (numpy.ndarray):
+        Weights to use when computing variance
+    mean (numpy.ndarray):
+        Weighted mean of the data for each team
+    total_weight (numpy.ndarray):
+        Sum of the weights for each team
+
+    Returns
+    -------
+    variance (numpy.ndarray):
+        Weighted variance for each team
+    '''
+    squared_weight = __group_sum(index, np.square(weights), len(mean))
+    return __group_sum(index, weights*np.square(values - mean[index]), len(mean)) / (total_weight - (squared_weight/total_weight))
+
+def __team_value(stat, position):
+    '''
+    Extracts a team's value (or the values of an array of positions of teams) from a stat calculated for every team by `__weighted_stats()`
+    '''
+    if isinstance(stat, tuple):
+        return tuple(values[position] for values in stat)
+    return stat[position]
+
+def __mean_value(stat):
+    '''
+    Returns the mean of a stat, which is the first element for stats that also have a variance
+    '''
+    return stat[0] if isinstance(stat, tuple) else stat
+
+def spatial_stats(score_table, score_settings, venues, venue_stats = None, teams = None, distances = None, row_weights = None):
+    '''
+    Calculates the stats of every team with their games spatially weighted for each venue. Each venue is only calculated once, so the same
+    stats can be looked up by team, venue, direction, and score type in both `team_stats()` and `opponent_stats()`.
+
+    Parameters
+    ----------
+    score_table (pandas.DataFrame):
+        Long-format score table from `long_score_table()` with spatial weights for each venue
+    score_settings (SportPredictifier.ObjectCollection):
+        Collection of score settings used in the competition
+    venues (iterable):
+        Codes of the stadia to use as reference locations
+    venue_stats (dict, optional):
+        Stats that have already been calculated. Venues that are already in it aren't calculated again, and it is updated in place
+    teams (SportPredictifier.ObjectCollection, optional):
+        Collection of teams competing in the competition. Needed with `distances`
+    distances (pandas.DataFrame, optional):
+        Matrix of distances between stadia from `weighting.spatial.distance_matrix()`. If given, the spatial weights for each venue are
+        calculated when they are needed and discarded afterwards rather than being read from `spatial_weight_{venue}` columns
+    row_weights (numpy.ndarray, optional):
+        Weights of each row (e.g. temporal weights) that the spatial weights are multiplied by
+
+    Returns
+    -------
+    venue_stats (dict):
+        Dictionary mapping each venue to the stats of every team in the same format as `__weighted_stats()`, so that a team's stat is
+        `venue_stats[venue][direction][score_type][position]` where `position` is the position of the team in the `TEAM` categories
+    '''
+    if venue_stats is None:
+        venue_stats = {}
+
+    missing = [venue for venue in pd.unique(np.asarray(list(venues), object)) if venue not in venue_stats]
+    if len(missing) > 0:
+        print("Calculating spatially weighted statistics for {} venues".format(len(missing)))
+    if distances is not None and len(missing) > 0:
+        homes = np.array([teams[team].stadium.code for team in score_table['TEAM'].cat.categories], object)[score_table['TEAM'].cat.codes.values]
+        weights = get_spatial_weights(distances, homes, score_table['VENUE'].values, missing)
+
+    for (i, venue) in enumerate(missing):
+        if distances is not None:
+            venue_weights = weights[:, i]
         else:
-            stats[direction][score_type] = (score_tables[team][score_type + '_' + direction]*weights).sum() / (score_tables[team].eval(condition)*weights).sum()
-                        
-    else:
-        if score_settings[score_type].opp_effect:
-            stats[direction][score_type] = np.average(
-                score_tables[team][score_type + '_' + direction],
-                weights = weights
-            )
-        else: # Calculating the weighted variance here since no residual stats will be relevant if opp_effect is False
-            stats[direction][score_type] = (np.average(
-                score_tables[team][score_type + '_' + direction],
-                weights = weights
-            ),
-                                            weighted_variance(
-                score_tables[team][score_type + '_' + direction],
-                weights = weights
-                ))
+            venue_weights = score_table['spatial_weight_{}'.format(venue)].values.astype(float)
+        if row_weights is not None:
+            venue_weights = venue_weights*row_weights
+        venue_stats[venue] = __weighted_stats(score_table, score_settings, venue_weights)
+    return venue_stats
+
+def opponent_locations(score_table):
+    '''
+    Finds the reference location for the opponent in each row of the score table, which is where the team first played that opponent
+
+    Parameters
+    ----------
+    score_table (pandas.DataFrame):
+        Long-format score table from `long_score_table()`
 
-def team_stats(teams, score_settings, score_tables, game_locations = None):
+    Returns
+    -------
+    reference_locations (numpy.ndarray):
+        Code of the reference stadium for each row
     '''
-    Calculates the statistics for each team in the competition. These are updated as a dictionary that is an attribute of the `Team` object.
+    return score_table.groupby(['TEAM', 'OPP'], sort = False, observed = True)['VENUE'].transform('first').values
+
+def team_stats(teams, score_settings, score_table, game_locations = None, venue_stats = None):
+    '''
+    Calculates the statistics for each team in the competition. These are filled into a new `StatsTensor`, and the `stats` attribute of
+    each `Team` object is set to a view of it.
 
     Parameters
     ----------
@@ -110,29 +227,44 @@ def team_stats(teams, score_settings, score_tables, game_locations = None):
         Collection of teams competing in the competition
     score_settings (SportPredictifier.ObjectCollection):
         Collection of score settings used in the competition
-    score_tables (SportPredictifier.ObjectCollection):
-        Collection of score tables from the comptision
+    score_table (pandas.DataFrame):
+        Long-format score table from `long_score_table()`
     game_locations (dict, optional):
         Dictionary that says which statium each team is playing in for the round
+    venue_stats (dict, optional):
+        Spatially weighted stats from `spatial_stats()` to reuse. Any venues in `game_locations` that are missing are added to it
+
+    Returns
+    -------
+    stats (SportPredictifier.StatsTensor):
+        Tensor with the stats of every team
     '''
     print("Calculating team statistics")
-    assert all(team in score_tables for team in teams), "All teams must have a score table"
+    codes = list(score_table['TEAM'].cat.categories)
+    assert all(team in codes for team in teams), "All teams must have a score table"
+
+    stats = __weighted_stats(score_table, score_settings, score_table['weight'].values.astype(float))
+    if game_locations is not None:
+        venue_stats = spatial_stats(score_table, score_settings, game_locations.values(), venue_stats)
+
+    # Teams playing this round have their games weighted by how close they were to where the team is playing
+    sources = {}
     for team in teams:
+        sources.setdefault(game_locations[team] if game_locations is not None and team in game_locations else None, []).append(team)
 
-        stats = {}
+    tensor = StatsTensor(teams.keys(), score_settings)
+    for (venue, source_teams) in sources.items():
+        source = stats if venue is None else venue_stats[venue]
+        positions = np.array([codes.index(team) for team in source_teams])
         for direction in directions:
-            stats[direction] = {}
             for score_type in score_settings:
-                if game_locations is not None and team in game_locations: # Team is not playing if latter is False
-                    stat(stats, team, direction, score_settings, score_type, score_tables, game_locations[team])
-                else:
-                    stat(stats, team, direction, score_settings, score_type, score_tables)
- 
-        teams[team].stats = stats
+                tensor.fill(direction, score_type, __team_value(source[direction][score_type], positions), source_teams)
+    tensor.assign(teams)
+    return tensor
 
-def opponent_stats(teams, score_settings, score_tables, use_spatial_weights = False):
+def opponent_stats(teams, score_settings, score_table, use_spatial_weights = False, venue_stats = None):
     '''
-    Obtains the stats for each opponent of each team and adds them in place to the score tables in the rounds in which they played against them
+    Obtains the stats for each opponent of each team and adds them in place to the score table in the rounds in which they played against them
 
     Parameters
     ----------
@@ -140,40 +272,41 @@ def opponent_stats(teams, score_settings, score_tables, use_spatial_weights = Fa
         Collection of teams competing in the competition
     score_settings (SportPredictifier.ObjectCollection):
         Collection of score settings used in the competition
-    score_tables (SportPredictifier.ObjectCollection):
-        Collection of score tables from the comptision
+    score_table (pandas.DataFrame):
+        Long-format score table from `long_score_table()`
     use_spatial_weights (bool):
         If set to `True`, spatial weights will be used when calculating opponent statistics
+    venue_stats (dict, optional):
+        Spatially weighted stats from `spatial_stats()` to reuse if `use_spatial_weights` is `True`. Any venues that are missing are added to it
     '''
     print("Calculating opponent statistics")
+    columns = ['_'.join(['OPP', score_type, direction]) for direction in directions for score_type in score_settings]
 
-    # Creating maps to easily map a team's code to their statistics
-    statmaps = {}
-    for direction in directions:
-        statmaps[direction] = {}
-        for score_type in score_settings:
-            statmaps[direction][score_type] = {}
-            for team in teams:
-                statmaps[direction][score_type][team] = teams[team].stats[direction][score_type]
+    if use_spatial_weights:
+        # The opponent's stats are weighted for where the team first played them, which are looked up from the stats for each venue
+        codes = list(score_table['TEAM'].cat.categories)
+        opponents = pd.Categorical(score_table['OPP'], categories = codes).codes
+        reference_locations = opponent_locations(score_table)
+        venue_stats = spatial_stats(score_table, score_settings, reference_locations, venue_stats)
+        opponent_values = np.full((len(score_table), len(columns)), np.nan)
+        for location in pd.unique(reference_locations):
+            stats = venue_stats[location]
+            rows = (reference_locations == location) & (opponents >= 0)
+            opponent_values[rows] = np.column_stack([__mean_value(stats[direction][score_type])[opponents[rows]]
+                                                     for direction in directions for score_type in score_settings])
+    else:
+        # Creating a table to easily look up each opponent's statistics
+        tensor = StatsTensor.of(teams)
+        statmap = pd.DataFrame(tensor.values[:, :, :len(score_settings), 0].reshape(len(tensor.teams), -1),
+                               index = tensor.teams, columns = columns, dtype = float)
+        opponent_values = statmap.reindex(score_table['OPP'].values).values
 
-    # For each score type, map the opponent's average scores (in the opposing direction) to 
-    for team in score_tables:
-        for direction in directions:
-            for score_type in score_settings:
-                if use_spatial_weights:
-                    def __get_opponent_stat(opponent):
-                        stats = {direction: {}}
-                        venue = score_tables[team].query('OPP == @opponent').iloc[0]['VENUE']
-                        stat(stats, opponent, direction, score_settings, score_type, score_tables, venue)
-                        return stats[direction][score_type]
-                    score_tables[team]['_'.join(['OPP', score_type, direction])] = score_tables[team]['OPP'].apply(__get_opponent_stat)
-                else:
-                    score_tables[team]['_'.join(['OPP', score_type, direction])] = score_tables[team]['OPP'].map(statmaps[direction][score_type])
-                    
-def residual_stats(teams, score_settings, score_tables):
+    score_table[columns] = opponent_values
+
+def residual_stats(teams, score_settings, score_table):
     '''
     Calculates residual statistics (how each team does relative to their opponents' typical performances).
-    These are updated as part of an attribute of the `Team` object.
+    These are filled into the `StatsTensor` from `team_stats()` that each team's stats are a view of.
 
     Parameters
     ----------
@@ -181,45 +314,43 @@ def residual_stats(teams, score_settings, score_tables):
         Collection of teams competing in the competition
     score_settings (SportPredictifier.ObjectCollection):
         Collection of score settings used in the competition
-    score_tables (SportPredictifier.ObjectCollection):
-        Collection of score tables from the comptision
+    score_table (pandas.DataFrame):
+        Long-format score table from `long_score_table()` with the opponent statistics from `opponent_stats()`
     '''
     print("Calculating residual statistics")
-    for team in score_tables:
-        for direction in directions:
-            for score_type in score_settings:
-                if score_settings[score_type].prob:
-                    condition = score_settings[score_type].condition.replace('{F}', direction).replace('{A}', compliment_direction(direction))
-                    score_tables[team]['_'.join(['RES', score_type, direction])] = score_tables[team]['_'.join([score_type, direction])]/score_tables[team].eval(condition) - score_tables[team]['_'.join(['OPP', score_type, compliment_direction(direction)])]
-                else:
-                    score_tables[team]['_'.join(['RES', score_type, direction])] = score_tables[team]['_'.join([score_type, direction])] - score_tables[team]['_'.join(['OPP', score_type, compliment_direction(direction)])]
+    codes = list(score_table['TEAM'].cat.categories)
+    index = score_table['TEAM'].cat.codes.values
+    weights = score_table['weight'].values.astype(float)
+    total_weight = __group_sum(index, weights, len(codes))
 
-    for team in teams:
-        for direction in directions:
-            for score_type in score_settings:
-                if score_settings[score_type].prob:
-                    condition = score_settings[score_type].condition.replace('{F}', direction).replace('{A}', compliment_direction(direction))
-                    try:
-                        values = score_tables[team]['_'.join(['RES', score_type, direction])].values
-                        weights = (score_tables[team].eval(condition) * score_tables[team]['weight'])
-                        to_use = ~np.isnan(values)
-                        teams[team].stats[direction]['RES_' + score_type] = np.average(
-                            values[to_use],
-                            weights = weights[to_use]
-                            )
-                    except ZeroDivisionError:
-                        teams[team].stats[direction]['RES_' + score_type] = 0
-                else:
-                    teams[team].stats[direction]['RES_' + score_type] = (
-                        np.average(
-                            score_tables[team]['_'.join(['RES', score_type, direction])],
-                            weights = score_tables[team]['weight']
-                            ),
-                        weighted_variance(
-                            score_tables[team]['_'.join(['RES', score_type, direction])],
-                            weights = score_tables[team]['weight']
-                            )
-                    )
+    stats = {}
+    for direction in directions:
+        stats[direction] = {}
+        for score_type in score_settings:
+            scores = score_table['_'.join([score_type, direction])].values
+            opponent_stat = score_table['_'.join(['OPP', score_type, compliment_direction(direction)])].values
+            if score_settings[score_type].prob:
+                condition = score_settings[score_type].condition.evaluate_columns(score_table, direction, compliment_direction(direction)).values
+                with np.errstate(divide = 'ignore', invalid = 'ignore'):
+                    residuals = scores/condition - opponent_stat
+                condition_weights = condition*weights
+                to_use = ~np.isnan(residuals)
+                residual_weight = __group_sum(index[to_use], condition_weights[to_use], len(codes))
+                with np.errstate(divide = 'ignore', invalid = 'ignore'):
+                    mean = __group_sum(index[to_use], residuals[to_use]*condition_weights[to_use], len(codes)) / residual_weight
+                # Teams whose condition has never been met have no residual
+                stats[direction][score_type] = np.where(residual_weight == 0, 0, mean)
+            else:
+                residuals = scores - opponent_stat
+                mean = __group_sum(index, residuals*weights, len(codes)) / total_weight
+                stats[direction][score_type] = (mean, __weighted_group_variance(index, residuals, weights, mean, total_weight))
+            score_table['_'.join(['RES', score_type, direction])] = residuals
+
+    tensor = StatsTensor.of(teams)
+    positions = np.array([codes.index(team) for team in tensor.teams])
+    for direction in directions:
+        for score_type in score_settings:
+            tensor.fill(direction, 'RES_' + score_type, __team_value(stats[direction][score_type], positions))
 
 def hype(season_settings, results, round_number):
     '''
@@ -234,6 +365,8 @@ def hype(season_settings, results, round_number):
     round_number (int):
         Round number of the game
     '''
+    from scipy.stats import entropy
+
     print("Calculating hype for each game")
 
     # Read in rankings
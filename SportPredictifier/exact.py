@@ -0,0 +1,304 @@
+import numpy as np
+
+tail_probability = 1e-12
+min_state_probability = 1e-14
+
+def __team_coefficients(condition, team):
+    '''
+    Expresses a condition in terms of the number of scores of each type by each team in the game
+
+    Parameters
+    ----------
+    condition (SportPredictifier.Condition):
+        Condition from the score settings
+    team (int):
+        Index (0 or 1) of the team that the condition is being evaluated for
+
+    Returns
+    -------
+    coefficients (dict):
+        Dictionary mapping (score type, team index) to its coefficient in the condition
+    constant (numeric):
+        Constant term of the condition
+    '''
+    coefficients = {}
+    for (code, direction, coefficient) in condition.terms:
+        coefficients[(code, team if direction == 'F' else 1 - team)] = coefficient
+    return coefficients, condition.constant
+
+def __live_conditions(processed, pending):
+    '''
+    Counts the number of partially evaluated conditions that have to be kept track of
+
+    Parameters
+    ----------
+    processed (set):
+        Set of (score type, team index) tuples that have been processed
+    pending (list):
+        Steps from `__steps()` that have yet to be processed
+
+    Returns
+    -------
+    n_live (int):
+        Number of distinct partial conditions
+    '''
+    return len({__signature(step[2], processed) for step in pending if step[2] is not None} - {()})
+
+def __signature(coefficients, processed):
+    '''
+    Identifies the part of a condition that has been evaluated so far. Conditions with the same signature share a value in each state.
+
+    Parameters
+    ----------
+    coefficients (dict):
+        Coefficients of the condition from `__team_coefficients()`
+    processed (set):
+        Set of (score type, team index) tuples that have been processed
+
+    Returns
+    -------
+    signature (tuple):
+        Sorted tuple of ((score type, team index), coefficient) for the terms that have been processed
+    '''
+    return tuple(sorted((variable, coefficient) for (variable, coefficient) in coefficients.items() if variable in processed and coefficient != 0))
+
+def __steps(score_settings):
+    '''
+    Splits the score types into those that have to be tracked jointly for both teams (probabilistic score types and those that
+    conditions refer to) and those whose points can be added to each team's distribution independently.
+    The joint steps are ordered so that each team's chain of score types is finished before moving to the other team, and otherwise so
+    that as few partial conditions as possible have to be tracked at once, which keeps the number of states small.
+
+    Parameters
+    ----------
+    score_settings (SportPredictifier.ObjectCollection):
+        Collection of score settings for the competition
+
+    Returns
+    -------
+    steps (list):
+        List of (score type, team index, coefficients, constant) tuples, in the order they are to be processed.
+        The coefficients and constant are from `__team_coefficients()` and are `None` for non-probabilistic score types
+    independent (list):
+        List of codes of non-probabilistic score types that no condition refers to
+    '''
+    referenced = set()
+    for score_type in score_settings:
+        if score_settings[score_type].prob:
+            referenced.update(score_settings[score_type].condition.codes)
+
+    pending = []
+    independent = []
+    for score_type in score_settings:
+        if score_settings[score_type].prob:
+            for team in range(2):
+                pending.append((score_type, team) + __team_coefficients(score_settings[score_type].condition, team))
+        elif score_type in referenced:
+            for team in range(2):
+                pending.append((score_type, team, None, None))
+        else:
+            independent.append(score_type)
+
+    steps = []
+    processed = set()
+    while len(pending) > 0:
+        available = [step for step in pending if step[2] is None or all(variable in processed for variable in step[2])]
+        if len(available) == 0:
+            raise ValueError('Conditions must only refer to score types defined before them')
+        last_team = steps[-1][1] if len(steps) > 0 else 0
+        step = min(available, key = lambda step: (step[1] != last_team, __live_conditions(processed | {step[:2]}, [other for other in pending if other is not step]),
+                                                  step[1], pending.index(step)))
+        steps.append(step)
+        processed.add(step[:2])
+        pending.remove(step)
+
+    return steps, independent
+
+def __aggregate(states, probs):
+    '''
+    Combines identical states by summing their probabilities and drops states that are too unlikely to matter
+
+    Parameters
+    ----------
+    states (numpy.ndarray):
+        2D integer array where each row is a state
+    probs (numpy.ndarray):
+        Probability of each state
+
+    Returns
+    -------
+    states (numpy.ndarray):
+        Unique states
+    probs (numpy.ndarray):
+        Probability of each unique state
+    '''
+    keep = probs > min_state_probability
+    (states, probs) = (states[keep], probs[keep])
+
+    # Encode each state as a single integer so that identical states can be found without sorting rows
+    low = states.min(axis = 0)
+    sizes = states.max(axis = 0) - low + 1
+    keys = np.zeros(len(states), np.int64)
+    for (column, size) in zip((states - low).T, sizes):
+        keys = keys*size + column
+
+    if np.prod(sizes.astype(float)) <= 4*len(keys):
+        totals = np.bincount(keys, weights = probs)
+        keys = np.flatnonzero(totals)
+        probs = totals[keys]
+    else:
+        (keys, inverse) = np.unique(keys, return_inverse = True)
+        probs = np.bincount(inverse, weights = probs)
+
+    unique_states = np.empty((len(keys), len(sizes)), np.int64)
+    for (i, size) in reversed(list(enumerate(sizes))):
+        (keys, unique_states[:, i]) = np.divmod(keys, size)
+    return unique_states + low, probs
+
+def __poisson_pmf(mean):
+    '''
+    Probability mass function of a Poisson distribution, truncated once the tail probability is negligible
+
+    Parameters
+    ----------
+    mean (float):
+        Mean of the Poisson distribution
+
+    Returns
+    -------
+    pmf (numpy.ndarray):
+        Probability of 0, 1, 2, ... scores
+    '''
+    from scipy.stats import poisson
+    return poisson.pmf(np.arange(poisson.isf(tail_probability, mean) + 1), mean)
+
+def __points_pmf(pmf, points):
+    '''
+    Converts a probability mass function of a number of scores into one of the number of points from those scores
+
+    Parameters
+    ----------
+    pmf (numpy.ndarray):
+        Probability of 0, 1, 2, ... scores
+    points (int):
+        Number of points for each score
+
+    Returns
+    -------
+    points_pmf (numpy.ndarray):
+        Probability of 0, 1, 2, ... points
+    '''
+    points_pmf = np.zeros(points*(len(pmf) - 1) + 1)
+    points_pmf[::max(points, 1)] = pmf if points > 0 else pmf.sum()
+    return points_pmf
+
+def solve_game(expected_scores, score_settings, min_expected_mean):
+    '''
+    Computes the exact joint distribution of both teams' final scores without any sampling.
+
+    Non-probabilistic score types that no condition refers to are independent, so their points are convolved into each team's
+    distribution at the end. Every other score type is processed on a sparse joint distribution over both teams' points and the partial
+    value of every condition that is still to be used, compounding each probabilistic score type as a binomial distribution conditioned
+    on the value of its condition.
+
+    Parameters
+    ----------
+    expected_scores (dict):
+        Dictionary with the expected number of scores of each type for each team
+    score_settings (SportPredictifier.ObjectCollection):
+        Collection of score settings for the competition
+    min_expected_mean (float):
+        Minimum expected number of scores for non-probabilistic score types
+
+    Returns
+    -------
+    joint_pmf (numpy.ndarray):
+        2D array where element [i, j] is the probability of team 1 scoring i points and team 2 scoring j points
+    '''
+    from scipy.stats import binom
+    teams = list(expected_scores.keys())
+    (steps, independent) = __steps(score_settings)
+
+    # Each state is a row of team 1's points, team 2's points, and the partial value of each condition still to be used.
+    # Conditions with the same terms so far share a column, which is identified by those terms.
+    signatures = []
+    states = np.zeros((1, 2), np.int64)
+    probs = np.ones(1)
+
+    processed = set()
+    for (i, (score_type, team, coefficients, constant)) in enumerate(steps):
+        expected = expected_scores[teams[team]][score_type]
+
+        if score_settings[score_type].prob:
+            n = np.full(len(states), int(round(constant)), np.int64)
+            step_signature = __signature(coefficients, processed)
+            if len(step_signature) > 0:
+                n += states[:, 2 + signatures.index(step_signature)]
+            n = np.maximum(n, 0) # A condition that comes out negative means there are no attempts, as in the Monte Carlo engine
+            k = np.arange(n.max() + 1)
+            pmf = binom.pmf(k[np.newaxis, :], k[:, np.newaxis], expected)[n]
+        else:
+            k = np.arange(len(__poisson_pmf(np.maximum(expected[0], min_expected_mean))))
+            pmf = np.broadcast_to(__poisson_pmf(np.maximum(expected[0], min_expected_mean)), (len(states), len(k)))
+
+        # Expand every state by every possible number of scores of this type
+        draws = np.tile(k, len(states))
+        expanded = np.repeat(states, len(k), axis = 0)
+        new_states = [expanded[:, 0], expanded[:, 1]]
+        new_states[team] = new_states[team] + score_settings[score_type].points*draws
+
+        # Update the partial value of every condition still to be used
+        new_processed = processed | {(score_type, team)}
+        new_signatures = []
+        for (future_type, future_team, future_coefficients, future_constant) in steps[i+1:]:
+            if future_coefficients is None:
+                continue
+            new_signature = __signature(future_coefficients, new_processed)
+            if len(new_signature) == 0 or new_signature in new_signatures:
+                continue
+            old_signature = __signature(future_coefficients, processed)
+            value = np.zeros(len(expanded), np.int64) if len(old_signature) == 0 else expanded[:, 2 + signatures.index(old_signature)]
+            new_signatures.append(new_signature)
+            new_states.append(value + int(round(future_coefficients.get((score_type, team), 0)))*draws)
+
+        (states, probs) = __aggregate(np.column_stack(new_states), (probs[:, np.newaxis]*pmf).reshape(-1))
+        signatures = new_signatures
+        processed = new_processed
+
+    joint_pmf = np.zeros(states[:, :2].max(axis = 0) + 1)
+    np.add.at(joint_pmf, (states[:, 0], states[:, 1]), probs)
+
+    for (team, axis) in zip(teams, [0, 1]):
+        for score_type in independent:
+            pmf = __points_pmf(__poisson_pmf(np.maximum(expected_scores[team][score_type][0], min_expected_mean)), score_settings[score_type].points)
+            joint_pmf = np.apply_along_axis(np.convolve, axis, joint_pmf, pmf)
+
+    return joint_pmf / joint_pmf.sum()
+
+def describe_pmf(pmf):
+    '''
+    Summarises a distribution of scores given by its probability mass function in the same format as `pandas.Series.describe()`
+    with percentiles every 5%. Each percentile is the lowest score with at least that probability of not being exceeded.
+
+    Parameters
+    ----------
+    pmf (numpy.ndarray):
+        Probability of 0, 1, 2, ... points
+
+    Returns
+    -------
+    description (numpy.ndarray):
+        Count (which is NaN as nothing is sampled), mean, standard deviation, minimum, every 5th percentile, and maximum
+    '''
+    values = np.arange(len(pmf))
+    mean = (values*pmf).sum()
+    cdf = np.cumsum(pmf)
+    percentiles = np.arange(0.05, 1, 0.05)
+    return np.hstack((
+        np.nan,
+        mean,
+        np.sqrt((pmf*np.square(values - mean)).sum()),
+        np.flatnonzero(pmf > min_state_probability)[0],
+        np.searchsorted(cdf, percentiles - tail_probability),
+        np.flatnonzero(pmf > min_state_probability)[-1]
+    ))
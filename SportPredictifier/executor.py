@@ -0,0 +1,111 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .simulate import simulate_game
+from .util import run_multithreaded_games, run_batched_games
+
+backends = ['thread', 'batch', 'process']
+
+def get_backend(settings, workers = None):
+    '''
+    Obtains the backend used to run the simulations and the number of workers to use from the settings
+
+    Parameters
+    ----------
+    settings (dict):
+        Settings for the competition. `simulation_backend` and `workers` are read if present
+    workers (int, optional):
+        Number of workers to use, overriding the settings (e.g. if given on the command line)
+
+    Returns
+    -------
+    backend (str):
+        Either "thread", "batch", or "process"
+    workers (int):
+        Number of worker processes to use if the backend is "process". `None` means the number of CPUs
+    '''
+    backend = settings.get('simulation_backend', 'thread')
+    if backend not in backends:
+        raise ValueError('{0} is an invalid simulation backend. Must be one of {1}'.format(backend, ', '.join(backends)))
+    if workers is None:
+        workers = settings.get('workers')
+    return backend, workers
+
+def __simulate_game_spec(spec):
+    '''
+    Simulates a game from the specification returned by `Game.spec()`. This is what runs in each worker process.
+
+    Parameters
+    ----------
+    spec (tuple):
+        Compact specification of the game
+
+    Returns
+    -------
+    matchup (str):
+        Key of the game in the result dictionary
+    results (dict):
+        Results of the simulation. The venue is left out and put back in by the main process
+    '''
+    (matchup, n_simulations, expected_scores, score_settings, knockout, store_results, min_expected_mean, chunk_size, engine,
+     target_standard_error, max_simulations, seed_sequence, variance_reduction, store_path) = spec
+    results = simulate_game(n_simulations, expected_scores, score_settings, None, knockout, store_results, min_expected_mean, chunk_size, engine,
+                            target_standard_error, max_simulations, seed_sequence, variance_reduction, store_path)
+    del results['venue']
+    return matchup, results
+
+def run_process_pool_games(games, result_dict, workers = None):
+    '''
+    Runs simulations of multiple games on a pool of processes so that they aren't limited to a single core
+
+    Parameters
+    ----------
+    games (list):
+        List of games to simulate. These must not have been started as threads
+    result_dict (dict):
+        Dictionary to store results of games in
+    workers (int, optional):
+        Number of worker processes. If `None`, the number of CPUs will be used
+    '''
+    if len(games) == 0:
+        return
+
+    if workers is None:
+        workers = os.cpu_count()
+    workers = min(workers, len(games))
+
+    print('Simulating {0} games on {1} processes'.format(len(games), workers))
+    with ProcessPoolExecutor(max_workers = workers) as executor:
+        for (game, (matchup, results)) in zip(games, executor.map(__simulate_game_spec, [game.spec() for game in games])):
+            results['venue'] = game.venue
+            result_dict[matchup] = results
+
+def run_games(games, result_dict, backend = 'thread', workers = None, per_game_streams = True):
+    '''
+    Runs simulations of multiple games using the selected backend
+
+    Parameters
+    ----------
+    games (list):
+        List of games to simulate. These must not have been started as threads
+    result_dict (dict):
+        Dictionary to store results of games in
+    backend (str):
+        "thread" to put each game on its own thread (best for tiny runs), "batch" to simulate every game at once with vectorised draws,
+        or "process" to simulate the games on a pool of processes
+    workers (int, optional):
+        Number of worker processes if `backend` is "process"
+    per_game_streams (bool):
+        If `False` and `backend` is "batch", the games draw from a single stream so that the draws are vectorised across games, at the
+        cost of each game's results depending on the others in the batch
+    '''
+    if backend == 'thread':
+        for game in games:
+            game.start()
+        run_multithreaded_games(games)
+    elif backend == 'batch':
+        run_batched_games(games, result_dict, per_game_streams)
+    elif backend == 'process':
+        run_process_pool_games(games, result_dict, workers)
+    else:
+        raise ValueError('{0} is an invalid simulation backend. Must be one of {1}'.format(backend, ', '.join(backends)))
@@ -0,0 +1,331 @@
+import hashlib
+import numpy as np
+import pandas as pd
+import os
+
+from .objects import StatsTensor
+from .util import directions, compliment_direction
+from .weighting.spatial import get_spatial_weights
+
+state_version = 1
+
+def __row_hashes(score_tables):
+    '''
+    Hashes each row of every score table so that rows that have already been added to the state can be recognised
+
+    Parameters
+    ----------
+    score_tables (SportPredictifier.ObjectCollection):
+        Collection of score tables for every team in the competition
+
+    Returns
+    -------
+    hashes (dict):
+        Dictionary mapping each team to the hash of each row of its score table
+    '''
+    teams = list(score_tables.keys())
+    hashes = pd.util.hash_pandas_object(pd.concat([score_tables[team] for team in teams], ignore_index = True), index = False).values
+    return dict(zip(teams, np.split(hashes, np.cumsum([len(score_tables[team]) for team in teams])[:-1])))
+
+def __digest(columns, hashes):
+    '''
+    Combines the column names and row hashes of a score table into a single digest
+    '''
+    return hashlib.sha256(repr(list(columns)).encode() + hashes.tobytes()).hexdigest()
+
+def __signature(score_settings):
+    '''
+    Identifies the score settings that the sums in the state were calculated for
+
+    Parameters
+    ----------
+    score_settings (SportPredictifier.ObjectCollection):
+        Collection of score settings used in the competition
+
+    Returns
+    -------
+    signature (tuple):
+        Code, probabilistic flag, and condition of each score type
+    '''
+    return tuple((score_type, bool(score_settings[score_type].prob),
+                  score_settings[score_type].condition.expression if score_settings[score_type].prob else None) for score_type in score_settings)
+
+def __group_sums(score_tables, score_settings):
+    '''
+    Adds up the rows of score tables for each team, opponent, and venue. Every sum needed to calculate the team, opponent, and residual
+    statistics is kept, so the statistics can be calculated from the sums without the rows.
+
+    Parameters
+    ----------
+    score_tables (dict):
+        Dictionary mapping the code of each team to the rows of its score table to add up
+    score_settings (SportPredictifier.ObjectCollection):
+        Collection of score settings used in the competition
+
+    Returns
+    -------
+    sums (pandas.DataFrame):
+        Sums indexed by team, opponent, and venue. `N`, `W`, and `W2` are the number of games, the sum of the weights, and the sum of
+        the squared weights. For each score type and direction (e.g. `TD_F`), `X`, `X2`, `WX`, and `WX2` are the unweighted and weighted
+        sums of the number of scores and its square. Probabilistic score types also have the unweighted and weighted sums of their
+        condition (`C` and `WC`) and the weighted sums of the scores and condition in games where the condition wasn't zero (`WXNZ` and `WCNZ`)
+    first_venues (pandas.Series):
+        Venue of the first game between each team and opponent
+    '''
+    score_table = pd.concat([score_tables[team].assign(TEAM = team) for team in score_tables], ignore_index = True)
+    weights = score_table['weight'].values.astype(float)
+
+    columns = {'N': np.ones(len(score_table)), 'W': weights, 'W2': np.square(weights)}
+    for direction in directions:
+        for score_type in score_settings:
+            name = '{0}_{1}'.format(score_type, direction)
+            scores = score_table[name].values.astype(float)
+            columns['X_' + name] = scores
+            columns['X2_' + name] = np.square(scores)
+            columns['WX_' + name] = weights*scores
+            columns['WX2_' + name] = weights*np.square(scores)
+            if score_settings[score_type].prob:
+                condition = score_settings[score_type].condition.evaluate_columns(score_table, direction, compliment_direction(direction)).values.astype(float)
+                columns['C_' + name] = condition
+                columns['WC_' + name] = weights*condition
+                columns['WXNZ_' + name] = np.where(condition != 0, weights*scores, 0)
+                columns['WCNZ_' + name] = np.where(condition != 0, weights*condition, 0)
+
+    keys = score_table[['TEAM', 'OPP', 'VENUE']]
+    sums = pd.DataFrame(columns).groupby([keys['TEAM'], keys['OPP'], keys['VENUE']], sort = False, dropna = False).sum()
+    first_venues = keys.groupby(['TEAM', 'OPP'], sort = False, dropna = False)['VENUE'].first()
+    return sums, first_venues
+
+def __team_sums(sums, team_index, n_teams, score_settings, spatial_weights = None):
+    '''
+    Calculates the statistics of every team from the sums in the same way as `calculate.team_stats()`
+
+    Parameters
+    ----------
+    sums (dict):
+        Dictionary with an array of each of the sums for each team, opponent, and venue from `__group_sums()`
+    team_index (numpy.ndarray):
+        Position of the team of each group of sums
+    n_teams (int):
+        Number of teams
+    score_settings (SportPredictifier.ObjectCollection):
+        Collection of score settings used in the competition
+    spatial_weights (numpy.ndarray, optional):
+        Spatial weight of each group. If given, this is used instead of the weights in the score tables
+
+    Returns
+    -------
+    stats (dict):
+        Dictionary with the stat of each score type in each direction as an array with a value for each team (or a tuple of two arrays
+        with the mean and variance)
+    '''
+    def by_team(values):
+        return np.bincount(team_index, weights = values, minlength = n_teams)
+
+    if spatial_weights is None:
+        (total_weight, squared_weight) = (by_team(sums['W']), by_team(sums['W2']))
+    else:
+        (total_weight, squared_weight) = (by_team(spatial_weights*sums['N']), by_team(np.square(spatial_weights)*sums['N']))
+
+    stats = {}
+    for direction in directions:
+        stats[direction] = {}
+        for score_type in score_settings:
+            name = '{0}_{1}'.format(score_type, direction)
+            if spatial_weights is None:
+                weighted_scores = by_team(sums['WX_' + name])
+            else:
+                weighted_scores = by_team(spatial_weights*sums['X_' + name])
+
+            if score_settings[score_type].prob:
+                if spatial_weights is None:
+                    weighted_condition = by_team(sums['WC_' + name])
+                else:
+                    weighted_condition = by_team(spatial_weights*sums['C_' + name])
+                with np.errstate(divide = 'ignore', invalid = 'ignore'):
+                    ratio = weighted_scores / weighted_condition
+                # If the condition hasn't been met, use the base probability
+                stats[direction][score_type] = np.where(by_team(sums['C_' + name]) == 0, score_settings[score_type].base, ratio)
+            else:
+                mean = weighted_scores / total_weight
+                if score_settings[score_type].opp_effect:
+                    stats[direction][score_type] = mean
+                else:
+                    if spatial_weights is None:
+                        weighted_squares = by_team(sums['WX2_' + name])
+                    else:
+                        weighted_squares = by_team(spatial_weights*sums['X2_' + name])
+                    stats[direction][score_type] = (mean, (weighted_squares - mean*weighted_scores) / (total_weight - (squared_weight/total_weight)))
+    return stats
+
+def __mean_value(stat):
+    '''
+    Returns the mean of a stat, which is the first element for stats that also have a variance
+    '''
+    return stat[0] if isinstance(stat, tuple) else stat
+
+def __team_value(stat, position):
+    '''
+    Extracts a single team's value from a stat calculated for every team
+    '''
+    if isinstance(stat, tuple):
+        return tuple(values[position] for values in stat)
+    return stat[position]
+
+def __set_stats(teams, score_settings, sums, first_venues, game_locations = None, distances = None):
+    '''
+    Calculates the team, opponent, and residual statistics from the sums and fills them into a `StatsTensor` that the `stats` attribute of
+    each team is a view of, giving the same values as `calculate.team_stats()`, `calculate.opponent_stats()`, and `calculate.residual_stats()`
+
+    Parameters
+    ----------
+    teams (SportPredictifier.ObjectCollection):
+        Collection of teams competing in the competition
+    score_settings (SportPredictifier.ObjectCollection):
+        Collection of score settings used in the competition
+    sums (pandas.DataFrame):
+        Sums for each team, opponent, and venue from `__group_sums()`
+    first_venues (pandas.Series):
+        Venue of the first game between each team and opponent
+    game_locations (dict, optional):
+        Dictionary that says which statium each team is playing in for the round. Needed with `distances`
+    distances (pandas.DataFrame, optional):
+        Matrix of distances between stadia. If given, spatial weights are used
+    '''
+    codes = list(pd.unique(sums.index.get_level_values('TEAM')))
+    team_index = pd.Categorical(sums.index.get_level_values('TEAM'), categories = codes).codes
+    columns = {column: sums[column].values for column in sums.columns}
+    stats = __team_sums(columns, team_index, len(codes), score_settings)
+
+    # Sums for each team and opponent, which is all that's needed for the residuals
+    pair_sums = sums.groupby(level = ['TEAM', 'OPP'], sort = False, dropna = False).sum()
+    pair_index = pair_sums.index
+    pair_team = pd.Categorical(pair_index.get_level_values('TEAM'), categories = codes).codes
+    pair_opponent = pd.Categorical(pair_index.get_level_values('OPP'), categories = codes).codes
+    pair_sums = {column: pair_sums[column].values for column in pair_sums.columns}
+
+    def by_team(values):
+        return np.bincount(pair_team, weights = values, minlength = len(codes))
+
+    if distances is not None:
+        venues = pd.unique(np.asarray(list(game_locations.values()) + list(first_venues.values), object))
+        homes = np.array([teams[team].stadium.code for team in codes], object)[team_index]
+        weights = get_spatial_weights(distances, homes, sums.index.get_level_values('VENUE').values, venues)
+        venue_stats = {venue: __team_sums(columns, team_index, len(codes), score_settings, weights[:, i]) for (i, venue) in enumerate(venues)}
+        pair_venues = first_venues.reindex(pair_index).values
+
+    # Each opponent's stat in each direction for every team and opponent
+    opponent_stats = {}
+    for direction in directions:
+        opponent_stats[direction] = {}
+        for score_type in score_settings:
+            values = np.full(len(pair_index), np.nan)
+            known = pair_opponent >= 0
+            if distances is None:
+                values[known] = __mean_value(stats[direction][score_type])[pair_opponent[known]]
+            else: # Opponents are weighted for where the team first played them
+                for venue in pd.unique(pair_venues):
+                    rows = known & (pair_venues == venue)
+                    values[rows] = __mean_value(venue_stats[venue][direction][score_type])[pair_opponent[rows]]
+            opponent_stats[direction][score_type] = values
+
+    residuals = {}
+    total_weight = by_team(pair_sums['W'])
+    squared_weight = by_team(pair_sums['W2'])
+    for direction in directions:
+        residuals[direction] = {}
+        for score_type in score_settings:
+            name = '{0}_{1}'.format(score_type, direction)
+            opponent_stat = opponent_stats[compliment_direction(direction)][score_type]
+            if score_settings[score_type].prob:
+                to_use = ~np.isnan(opponent_stat)
+                residual_weight = by_team(np.where(to_use, pair_sums['WCNZ_' + name], 0))
+                weighted_residuals = by_team(np.where(to_use, pair_sums['WXNZ_' + name] - pair_sums['WCNZ_' + name]*opponent_stat, 0))
+                with np.errstate(divide = 'ignore', invalid = 'ignore'):
+                    residuals[direction][score_type] = np.where(residual_weight == 0, 0, weighted_residuals / residual_weight)
+            else:
+                weighted_residuals = by_team(pair_sums['WX_' + name] - pair_sums['W']*opponent_stat)
+                weighted_squares = by_team(pair_sums['WX2_' + name] - 2*pair_sums['WX_' + name]*opponent_stat +
+                                           pair_sums['W']*np.square(opponent_stat))
+                mean = weighted_residuals / total_weight
+                residuals[direction][score_type] = (mean, (weighted_squares - mean*weighted_residuals) / (total_weight - (squared_weight/total_weight)))
+
+    tensor = StatsTensor(teams.keys(), score_settings)
+    for team in teams:
+        position = codes.index(team)
+        # Teams playing this round have their games weighted by how close they were to where the team is playing
+        source = venue_stats[game_locations[team]] if distances is not None and team in game_locations else stats
+        for direction in directions:
+            for score_type in score_settings:
+                tensor.set(team, direction, score_type, __team_value(source[direction][score_type], position))
+                tensor.set(team, direction, 'RES_' + score_type, __team_value(residuals[direction][score_type], position))
+    tensor.assign(teams)
+
+def update_stats(state_file, teams, score_settings, score_tables, game_locations = None, distances = None, recompute = False):
+    '''
+    Calculates the statistics of every team from running sums kept in a state file. Only rows of the score tables that weren't in the
+    state when it was last saved are added, so adding a round of results only needs those rows to be processed. If a team's earlier rows
+    have changed (e.g. a different query is used or a result was corrected), that team's sums are recalculated from all of its rows.
+
+    Parameters
+    ----------
+    state_file (str):
+        Path of the file to keep the sums in. It is created if it doesn't exist
+    teams (SportPredictifier.ObjectCollection):
+        Collection of teams competing in the competition
+    score_settings (SportPredictifier.ObjectCollection):
+        Collection of score settings used in the competition
+    score_tables (SportPredictifier.ObjectCollection):
+        Collection of score tables for every team in the competition
+    game_locations (dict, optional):
+        Dictionary that says which statium each team is playing in for the round. Needed with `distances`
+    distances (pandas.DataFrame, optional):
+        Matrix of distances between stadia from `weighting.spatial.distance_matrix()`. If given, spatial weights are used
+    recompute (bool):
+        If `True`, the state is ignored and every sum is recalculated from all of the rows
+    '''
+    print("Calculating statistics from running sums")
+    state = None
+    if not recompute and os.path.isfile(state_file):
+        state = pd.read_pickle(state_file)
+        if state.get('version') != state_version or state['signature'] != __signature(score_settings):
+            print("Statistics state in {} is for different score settings, so it will be recalculated".format(state_file))
+            state = None
+    if state is None:
+        state = {'version': state_version, 'signature': __signature(score_settings), 'rows': {}, 'sums': None, 'first_venues': None}
+
+    # Find the rows of each score table that haven't been added yet
+    new_rows = {}
+    reset = [team for team in state['rows'] if team not in score_tables]
+    row_hashes = __row_hashes(score_tables)
+    for team in score_tables:
+        hashes = row_hashes[team]
+        (n_rows, digest) = state['rows'].get(team, (0, None))
+        if n_rows > len(hashes) or (n_rows > 0 and __digest(score_tables[team].columns, hashes[:n_rows]) != digest):
+            reset.append(team)
+            n_rows = 0
+        if n_rows < len(hashes):
+            new_rows[team] = score_tables[team].iloc[n_rows:]
+        state['rows'][team] = (len(hashes), __digest(score_tables[team].columns, hashes))
+
+    for team in reset:
+        if team not in score_tables:
+            del state['rows'][team]
+    if state['sums'] is not None and len(reset) > 0:
+        keep = ~state['sums'].index.get_level_values('TEAM').isin(reset)
+        state['sums'] = state['sums'][keep]
+        state['first_venues'] = state['first_venues'][~state['first_venues'].index.get_level_values('TEAM').isin(reset)]
+
+    print("Adding {0} new rows to the statistics ({1} teams recalculated)".format(sum(len(rows) for rows in new_rows.values()), len(reset)))
+    if len(new_rows) > 0:
+        (sums, first_venues) = __group_sums(new_rows, score_settings)
+        if state['sums'] is None:
+            (state['sums'], state['first_venues']) = (sums, first_venues)
+        else:
+            state['sums'] = pd.concat([state['sums'], sums]).groupby(level = ['TEAM', 'OPP', 'VENUE'], sort = False, dropna = False).sum()
+            # Earlier games against an opponent stay first
+            state['first_venues'] = pd.concat([state['first_venues'], first_venues[~first_venues.index.isin(state['first_venues'].index)]])
+    if len(new_rows) > 0 or len(reset) > 0:
+        pd.to_pickle(state, state_file)
+
+    __set_stats(teams, score_settings, state['sums'], state['first_venues'], game_locations, distances)
@@ -1,17 +1,23 @@
 import pandas as pd
 import numpy as np
 import os
+import time
 import yaml
+from concurrent.futures import ThreadPoolExecutor
 
 from .objects import *
 from .util import *
-from .validation import validate_score_tables
+from .validation import validate_score_tables, check_score_table
 
+from . import cache
 from . import calculate
+from . import incremental
+from .score_store import read_score_store
 
-from .weighting.spatial import get_spatial_weight
+from .weighting import temporal
+from .weighting.spatial import distance_matrix
 
-def __load_table(object, df, multithreaded = False, result_dict = None):
+def __load_table(object, df, multithreaded = False, result_dict = None, start_threads = True):
     """
     Reads a table from a `pandas.DataFrame` into either an `ObjectCollection` or a series of threads
 
@@ -26,117 +32,135 @@ def __load_table(object, df, multithreaded = False, result_dict = None):
         If `False`, an `ObjectCollection` will be returned
     result_dict (bool, optional):
         Dictionary to store results of games. Only needed if `multithreaded` is `True`
+    start_threads (bool):
+        If `False`, the threads will be created but not started so that the games can be simulated another way
 
     Returns
     -------
     output (list or SportPredictifier.ObjectCollection):
         A list of threads if `multithreaded` is `True` and an `ObjectCollection` containing the data otherwise
     """
+    # Each row is read as a dictionary of keyword arguments in one pass rather than creating a `pandas.Series` for every row
+    records = df.to_dict('records')
     if multithreaded:
         output = []
-        for row in df.index:
-            output.append(object(result_dict, **df.loc[row]))
-            output[-1].start()
+        for record in records:
+            output.append(object(result_dict, **record))
+            if start_threads:
+                output[-1].start()
     else:
         output = ObjectCollection()
-        for row in df.index:
-            if 'code' in df.columns: # This is the index
-                output[df.loc[row, 'code']] = object(**df.loc[row])
-            else:
-                output[row] = object(**df.loc[row])
+        keys = df['code'].tolist() if 'code' in df.columns else df.index.tolist() # The code is the index if there is one
+        for (key, record) in zip(keys, records):
+            output[key] = object(**record)
     return output
 
-def __load_stadia(fp):
+def __read_csv(fp, query = None, drop_null_records = False):
     '''
-    Load the stadia from the CSV file defining them into an `ObjectCollection`:
+    Reads a CSV file into a `pandas.DataFrame` and times how long it takes. This is run on the input thread pool so that files are read
+    and parsed at the same time.
 
     Parameters
     ----------
     fp (str):
-        CSV file giving the stadium attributes
+        CSV file to read
+    query (str, optional):
+        Query used to filter the table using the `pandas.DataFrame.query()` method
+    drop_null_records (bool):
+        If true, records with null values will be dropped
+
+    Returns
+    -------
+    table (pandas.DataFrame):
+        Table read from the file
+    load_time (float):
+        Time taken to read the file in seconds
+    '''
+    start_time = time.perf_counter()
+    table = pd.read_csv(fp)
+    if query is not None:
+        table = table.query(query)
+    if drop_null_records:
+        table = table.dropna()
+    return table, time.perf_counter() - start_time
+
+def __read_score_store(directory, query = None, drop_null_records = False):
+    '''
+    Reads the score tables from a score store and times how long it takes, in the same way as `__read_csv()`
+    '''
+    start_time = time.perf_counter()
+    score_tables = read_score_store(directory, query)
+    if drop_null_records:
+        for team in score_tables:
+            score_tables[team] = score_tables[team].dropna()
+    return score_tables, time.perf_counter() - start_time
+
+def __report_load_time(name, fp, load_time):
+    '''
+    Prints how long it took to read an input file
+    '''
+    print("Loaded {0} from {1} in {2:.1f} ms".format(name, fp, 1000*load_time))
+
+def __load_stadia(stadium_table):
+    '''
+    Load the stadia from the table defining them into an `ObjectCollection`:
+
+    Parameters
+    ----------
+    stadium_table (pandas.DataFrame):
+        Table giving the stadium attributes
 
     Returns
     -------
     stadia (SportPredictifier.ObjectCollection):
         Collection of stadia for use in the model
     '''
-    print("Loading stadia")
-    stadium_table = pd.read_csv(fp)
     return __load_table(Stadium, stadium_table)
 
-def __load_teams(fp, stadia):
+def __load_teams(team_table, stadia):
     '''
-    Load the teams from the CSV file defining them into an `ObjectCollection`:
+    Load the teams from the table defining them into an `ObjectCollection`:
 
     Parameters
     ----------
-    fp (str):
-        CSV file giving the team attributes
+    team_table (pandas.DataFrame):
+        Table giving the team attributes
+    stadia (SportPredictifier.ObjectCollection):
+        Collection of stadia that the teams' home stadia are looked up in
 
     Returns
     -------
     teams (SportPredictifier.ObjectCollection):
         Collection of teams for use in the model
     '''
-    print("Loading teams")
-    team_table = pd.read_csv(fp)
     combine_colors(team_table, 'r1', 'g1', 'b1', 'color1')
     combine_colors(team_table, 'r2', 'g2', 'b2', 'color2')
     team_table['stadium'] = team_table['stadium'].map(stadia)
     
     return __load_table(Team, team_table)
 
-def __load_score_settings(fp):
+def __load_score_settings(score_settings_table):
     '''
-    Load the score settings from the CSV file defining them into an `ObjectCollection`:
+    Load the score settings from the table defining them into an `ObjectCollection`:
 
     Parameters
     ----------
-    fp (str):
-        CSV file giving the score setting attributes
+    score_settings_table (pandas.DataFrame):
+        Table giving the score setting attributes
 
     Returns
     -------
     teams (SportPredictifier.ObjectCollection):
         Collection of score settings for use in the model
     '''
-    print("Loading scoring settings")
-    score_settings_table = pd.read_csv(fp)
-    return __load_table(ScoreSettings, score_settings_table)
+    score_settings = __load_table(ScoreSettings, score_settings_table)
 
-def __load_score_tables(score_table_path, query = None, drop_null_score_table_records = False):
-    '''
-    Loads each of the score tables into an `ObjectCollection` of `pandas.DataFrames`
+    # Conditions can only refer to score types defined before them since those are simulated first
+    for (i, score_type) in enumerate(score_settings):
+        if score_settings[score_type].prob:
+            score_settings[score_type].condition.validate(list(score_settings.keys())[:i])
 
-    Parameters
-    ----------
-    score_table_path (str):
-        Directory with score tables
-    query (str, optional):
-        Query used to filter each score table using the `pandas.DataFrame.query()` method
-    drop_null_score_table_records (bool):
-        If true, records with null values will be dropped from the score tables
-
-    Returns
-    -------
-    score_tables (SportPredictifier.ObjectCollection):
-        Collection of score tables stored as `pandas.DataFrame` objects
-    '''
-    score_tables = ObjectCollection()
-    for score_table_file in os.listdir(score_table_path):
-        print("Loading score table for {}".format(score_table_file[:-4]))
-        if not score_table_file.endswith('.csv'): # Not a score table
-            continue
-        if query is None:
-            score_tables[score_table_file[:-4]] = pd.read_csv(os.path.join(score_table_path, score_table_file))
-        else:
-            score_tables[score_table_file[:-4]] = pd.read_csv(os.path.join(score_table_path, score_table_file)).query(query)
-
-    if drop_null_score_table_records:
-        for team in score_tables:
-            score_tables[team] = score_tables[team].dropna()
-
-    return score_tables
+    return score_settings
 
 def settings(settings_file):
     '''
@@ -157,7 +181,8 @@ def settings(settings_file):
         f.close()
     return data
 
-def data(settings, round_number = None, score_table_query = None, drop_null_score_table_records = False, initializing_season = False):
+def data(settings, round_number = None, score_table_query = None, drop_null_score_table_records = False, initializing_season = False,
+         return_score_tables = False):
     '''
     Loads data on the stadia, teams, and score settings into memory. `ObjectCollection` objects containing those objects are returned.
     Spatial weights, team statistics, and opponent statitics are calculated upon loading.
@@ -174,6 +199,8 @@ def data(settings, round_number = None, score_table_query = None, drop_null_scor
         Indicates whether or not records containing null values in score tables should be dropped
     initializing_season (bool):
         If initializing the season, calculations aren't performed as the data doesn't yet exist
+    return_score_tables (bool):
+        If `True`, the score tables are also returned so they can be reused (e.g. for ranking) without reading them again
 
     Returns
     -------
@@ -183,16 +210,67 @@ def data(settings, round_number = None, score_table_query = None, drop_null_scor
         Collection of teams competing in the competition
     score_settings (SportPredictifier.ObjectCollection):
         Collection of score_settings to be used in the competition
+    score_tables (SportPredictifier.ObjectCollection):
+        Collection of score tables stored as `pandas.DataFrame` objects. Only returned if `return_score_tables` is `True`
     '''
-    stadia = __load_stadia(settings['stadia_file'])
-    teams = __load_teams(settings['teams_file'], stadia)
-    score_settings = __load_score_settings(settings['score_settings_file'])
-    score_tables = __load_score_tables(settings['score_table_path'], score_table_query, drop_null_score_table_records)
+    # Statistics from an earlier run with the same input files and settings are read back instead of being recalculated
+    (cache_key, cached_stats) = (None, None)
+    if settings.get('cache_directory') is not None and not initializing_season:
+        cache_key = cache.data_key(settings, round_number, score_table_query, drop_null_score_table_records)
+        cached_stats = cache.load(settings['cache_directory'], cache_key, settings.get('report_cache', False))
+
+    # Every input file is read on a bounded thread pool while the objects are built and each score table is validated as it arrives.
+    # Results are used in the order the files were submitted so the output and the order of the collections don't depend on timing.
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers = settings.get('io_workers')) as pool:
+        input_futures = [pool.submit(__read_csv, settings[file_setting]) for file_setting in ['stadia_file', 'teams_file', 'score_settings_file']]
+
+        score_table_futures = {}
+        read_score_tables = cached_stats is None or return_score_tables
+        if read_score_tables:
+            if settings.get('score_store') is not None: # All score tables are kept in a single columnar store
+                store_future = pool.submit(__read_score_store, settings['score_store'], score_table_query, drop_null_score_table_records)
+            else:
+                for score_table_file in os.listdir(settings['score_table_path']):
+                    if score_table_file.endswith('.csv'):
+                        score_table_futures[score_table_file[:-4]] = pool.submit(__read_csv, os.path.join(settings['score_table_path'], score_table_file),
+                                                                                 score_table_query, drop_null_score_table_records)
+
+        input_tables = []
+        for (file_setting, future) in zip(['stadia_file', 'teams_file', 'score_settings_file'], input_futures):
+            (table, load_time) = future.result()
+            __report_load_time(file_setting[:-5].replace('_', ' '), settings[file_setting], load_time)
+            input_tables.append(table)
+        stadia = __load_stadia(input_tables[0])
+        teams = __load_teams(input_tables[1], stadia)
+        score_settings = __load_score_settings(input_tables[2])
+
+        # Score tables that are only read to be returned have already been validated when their statistics were cached
+        score_tables = ObjectCollection()
+        table_errors = None if initializing_season or cached_stats is not None else {}
+        if read_score_tables and settings.get('score_store') is not None:
+            (score_tables, load_time) = store_future.result()
+            __report_load_time('score tables', settings['score_store'], load_time)
+            if table_errors is not None:
+                for team in score_tables:
+                    table_errors[team] = check_score_table(team, score_tables[team], score_settings, teams, stadia, settings)
+        else:
+            for team in score_table_futures:
+                (score_tables[team], load_time) = score_table_futures[team].result()
+                __report_load_time('score table for ' + team, os.path.join(settings['score_table_path'], team + '.csv'), load_time)
+                if table_errors is not None:
+                    table_errors[team] = check_score_table(team, score_tables[team], score_settings, teams, stadia, settings)
+
+    print("Loaded inputs in {:.3f} s".format(time.perf_counter() - start_time))
+
+    if cached_stats is not None:
+        cached_stats.assign(teams)
 
     # If initializing season, no data yet exist to perform calculations on
-    if not initializing_season:
-        validate_score_tables(score_tables, score_settings, teams, stadia, settings)
+    elif not initializing_season:
+        validate_score_tables(score_tables, score_settings, teams, stadia, settings, table_errors)
 
+        (game_locations, distances) = (None, None)
         if settings['use_spatial_weights']:
             assert round_number is not None, "A round number is needed if calculating spatial weights"
             schedule = pd.read_csv(settings['schedule_file'])
@@ -200,19 +278,50 @@ def data(settings, round_number = None, score_table_query = None, drop_null_scor
             for _, row in schedule.iterrows():
                 game_locations[row['team1']] = row['venue']
                 game_locations[row['team2']] = row['venue']
-            calculate.spatial_weights(score_tables, teams, stadia)
-            calculate.team_stats(teams, score_settings, score_tables, game_locations)
-            calculate.opponent_stats(teams, score_settings, score_tables, True)
+            distances = distance_matrix(list(stadia.keys()), stadia.extract_attribute('lat'), stadia.extract_attribute('lon'),
+                                        settings.get('distance_matrix_file'))
+
+        if settings.get('stats_state_file') is not None: # Only rows added since the last run are processed
+            assert settings.get('temporal_decay') is None, "Temporal weights change every round so they can't be used with incremental statistics"
+            incremental.update_stats(settings['stats_state_file'], teams, score_settings, score_tables, game_locations, distances,
+                                     settings.get('recompute_stats', False))
 
         else:
-            calculate.team_stats(teams, score_settings, score_tables)
-            calculate.opponent_stats(teams, score_settings, score_tables)
+            score_table = calculate.long_score_table(score_tables)
+
+            # Games are weighted by how long before each team's game in the round they were played
+            row_weights = None
+            if settings.get('temporal_decay') is not None:
+                assert round_number is not None, "A round number is needed if calculating temporal weights"
+                print("Calculating temporal weights")
+                schedule = pd.read_csv(settings['schedule_file'])
+                row_weights = temporal.get_temporal_weights(score_table, temporal.game_dates(score_table, schedule, settings['round_name'].upper()),
+                                                            temporal.reference_dates(schedule, teams.keys(), round_number),
+                                                            temporal.TemporalWeightingFunction(settings['temporal_decay']))
+                score_table['weight'] = score_table['weight'].values*row_weights
+
+            if settings['use_spatial_weights']:
+                # Spatial weights are only calculated for the venues that are used as reference locations
+                venue_stats = calculate.spatial_stats(score_table, score_settings, list(game_locations.values()) + list(calculate.opponent_locations(score_table)),
+                                                      teams = teams, distances = distances, row_weights = row_weights)
+                print("Calculated spatial weights for {0} of {1} stadia ({2} spatial weight columns avoided for each team)".format(
+                    len(venue_stats), len(stadia), len(stadia) - len(venue_stats)))
+                calculate.team_stats(teams, score_settings, score_table, game_locations, venue_stats)
+                calculate.opponent_stats(teams, score_settings, score_table, True, venue_stats)
+            else:
+                calculate.team_stats(teams, score_settings, score_table)
+                calculate.opponent_stats(teams, score_settings, score_table)
 
-        calculate.residual_stats(teams, score_settings, score_tables)
+            calculate.residual_stats(teams, score_settings, score_table)
 
+        if cache_key is not None:
+            cache.store(settings['cache_directory'], cache_key, StatsTensor.of(teams), settings.get('cache_max_size'))
+
+    if return_score_tables:
+        return stadia, teams, score_settings, score_tables
     return stadia, teams, score_settings
 
-def schedule(settings, teams, stadia, score_settings, round_number = None, multithreaded = False, result_dict = None, schedule_override = None):
+def schedule(settings, teams, stadia, score_settings, round_number = None, multithreaded = False, result_dict = None, schedule_override = None, start_threads = True):
     '''
     Loads the competition schedule from a CSV (or input data frame) into an `ObjectCollection` containing each of the games onto different threads
     so they can be simulated in parallel.
@@ -235,6 +344,8 @@ def schedule(settings, teams, stadia, score_settings, round_number = None, multi
         Dictionary containing results of games. Required if `multithreaded` is `True`
     schedule_override (pandas.DataFrame):
         Schedule table to override the schedule file if not reading from a CSV
+    start_threads (bool):
+        If `False`, the games will be loaded onto threads that aren't started so they can be simulated together with `run_batched_games()`
     '''
     print("Loading schedule")
 
@@ -247,7 +358,10 @@ def schedule(settings, teams, stadia, score_settings, round_number = None, multi
         schedule_table = schedule_override.copy()
 
     # Add schedule attributes
-    schedule_table['n_simulations'] = settings['n_simulations']
+    if settings.get('target_standard_error') is None:
+        schedule_table['n_simulations'] = settings['n_simulations']
+    else: # Adaptive simulation counts
+        schedule_table['n_simulations'] = settings.get('min_simulations', settings.get('n_simulations'))
     schedule_table['date'] = pd.to_datetime(schedule_table[["year", "month", "day"]])
     schedule_table['score_settings'] = schedule_table.shape[0]*[score_settings]
     del schedule_table['year'], schedule_table['month'], schedule_table['day']
@@ -256,7 +370,18 @@ def schedule(settings, teams, stadia, score_settings, round_number = None, multi
     schedule_table['team2'] = schedule_table['team2'].map(teams)
     schedule_table['venue'] = schedule_table['venue'].map(stadia)
 
-    schedule_table['store_results'] = settings['store_simulation_results']*np.ones(len(schedule_table), bool)
+    # Stored simulations are written to a binary file for each game as they are simulated rather than kept in memory
+    schedule_table['store_results'] = np.zeros(len(schedule_table), bool)
+    if settings['store_simulation_results']:
+        directory = '{0}{1}' + ('Simulations' if schedule_override is None else 'MatrixSimulations')
+        schedule_table['store_directory'] = [os.path.join(settings['output_directory'], directory.format(settings['round_name'], game_round))
+                                             for game_round in schedule_table['round_number']]
     schedule_table['min_expected_mean'] = settings['min_expected_mean']*np.ones(len(schedule_table))
-
-    return __load_table(Game, schedule_table, multithreaded, result_dict)
\ No newline at end of file
+    schedule_table['chunk_size'] = settings.get('chunk_size')
+    schedule_table['engine'] = settings.get('engine', 'monte_carlo')
+    schedule_table['target_standard_error'] = settings.get('target_standard_error')
+    schedule_table['max_simulations'] = settings.get('max_simulations')
+    schedule_table['seed'] = settings.get('seed')
+    schedule_table['variance_reduction'] = settings.get('variance_reduction')
+
+    return __load_table(Game, schedule_table, multithreaded, result_dict, start_threads)
\ No newline at end of file
@@ -1,11 +1,18 @@
 import sys
 import os
+import time
 from . import load
 from . import calculate
-from .report import generate_report, generate_pie_charts, store_simulation_results
+from .report import generate_report, generate_pie_charts
 from .ranking import rank
-from .util import run_multithreaded_games, create_score_tables
-from .matrix import generate_schedule, write_matrix
+from .util import create_score_tables
+from .executor import get_backend, run_games
+from .seeding import get_seed
+from .matrix import generate_schedule, matchup_expected_scores, write_matrix
+from .score_store import import_score_tables, export_score_tables
+
+# Options that can be given on the command line as `--option value`, with a description of their value
+command_line_options = {'workers': 'n'}
 
 def initialize_season():
     '''
@@ -16,8 +23,26 @@ def initialize_season():
     season_settings = load.settings('settings.yaml')
     (stadia, teams, score_settings) = load.data(season_settings, initializing_season = True)
     create_score_tables(season_settings, teams, stadia, score_settings)
+    if season_settings.get('score_store') is not None:
+        import_score_tables(season_settings['score_table_path'], season_settings['score_store'], season_settings['round_name'].upper())
+
+def import_score_store():
+    '''
+    Converts the per-team score table CSV files into the score store given by `score_store` in settings.yaml.
+    Can be called from the command line by typing `SportPredictifier import_score_store`
+    '''
+    season_settings = load.settings('settings.yaml')
+    import_score_tables(season_settings['score_table_path'], season_settings['score_store'], season_settings['round_name'].upper())
 
-def predictify(round_number):
+def export_score_store():
+    '''
+    Converts the score store given by `score_store` in settings.yaml back into per-team score table CSV files.
+    Can be called from the command line by typing `SportPredictifier export_score_store`
+    '''
+    season_settings = load.settings('settings.yaml')
+    export_score_tables(season_settings['score_store'], season_settings['score_table_path'])
+
+def predictify(round_number, workers = None):
     '''
     Simulates all of the games of a given round. Can be called from the command line by typing `SportPredictifier predictify [round_number]`
 
@@ -25,14 +50,17 @@ def predictify(round_number):
     ----------
     round_number (int):
         Round number to use in simulation
+    workers (int, optional):
+        Number of worker processes to use if the simulation backend is "process". Overrides `workers` in settings.yaml
     '''
     season_settings = load.settings('settings.yaml')
     print('Predictifying {0} {1} {2}'.format(season_settings['name'], season_settings['round_name'], round_number))
-    (stadia, teams, score_settings) = load.data(season_settings, round_number, '{0} < {1}'.format(season_settings['round_name'].upper(), round_number))
+    (stadia, teams, score_settings, score_tables) = load.data(season_settings, round_number, '{0} < {1}'.format(season_settings['round_name'].upper(), round_number),
+                                                              return_score_tables = True)
 
     print('Ranking teams')
     rank(
-        season_settings['score_table_path'],
+        score_tables,
         os.path.join(
             season_settings['ranking_directory'],
             season_settings['ranking_filename'].format(round_number) + '.csv'
@@ -43,30 +71,21 @@ def predictify(round_number):
         )
 
     results = {}
-    round_schedule = load.schedule(season_settings, teams, stadia, score_settings, round_number = round_number, multithreaded = True, result_dict = results)
+    (backend, workers) = get_backend(season_settings, workers)
+    seed = get_seed(season_settings)
+    round_schedule = load.schedule(season_settings, teams, stadia, score_settings, round_number = round_number, multithreaded = True, result_dict = results, start_threads = False)
 
-    run_multithreaded_games(round_schedule)
+    run_games(round_schedule, results, backend, workers, season_settings.get('per_game_streams', True))
 
     calculate.hype(season_settings, results, round_number)
 
     outfile = os.path.join(season_settings['output_directory'], (season_settings['report_filename'] + '.xlsx').format(round_number))
     plotfile = os.path.join(season_settings['output_directory'], (season_settings['plot_filename'] + '.png').format(round_number))
 
-    if 'store_simulation_results' in season_settings and season_settings["store_simulation_results"]:
-        store_simulation_results(
-            os.path.join(
-            season_settings['output_directory'],
-            "{0}{1}Simulations".format(
-                season_settings['round_name'],
-                round_number
-                )),
-                results
-                )
-
-    generate_report(outfile, teams, results)
+    generate_report(outfile, teams, results, seed)
     generate_pie_charts(plotfile, teams, results, season_settings['round_name'], round_number)
 
-def matrix(outfile = 'matrix.csv'):
+def matrix(outfile = 'matrix.csv', workers = None):
     '''
     Runs a matrix analysis by simulating a game between every remaining team, as specified by matrix.yaml.
     This creates a matrix with the chance of each team beating the other.
@@ -76,24 +95,34 @@ def matrix(outfile = 'matrix.csv'):
     ----------
     outfile (str):
         Outfile to write matrix to
+    workers (int, optional):
+        Number of worker processes to use if the simulation backend is "process". Overrides `workers` in settings.yaml
     '''
     print("Creating Matrix")
     season_settings = load.settings('settings.yaml')
     matrix_settings = load.settings('matrix.yaml')
-    (stadia, teams, score_settings) = load.data(season_settings, matrix_settings['round_number'])
+
+    # The data are loaded and the statistics calculated once, then every matchup is built from the same teams
+    load_start = time.perf_counter()
+    (stadia, teams, score_settings) = load.data(season_settings, matrix_settings['round_number'], drop_null_score_table_records = True)
+    load_time = time.perf_counter() - load_start
 
     matrix_schedule = generate_schedule(matrix_settings, teams)
 
     print("Setting up matchups")
-    matchups = []
+    # The expected scores of every pair of teams are calculated at once rather than by each game
+    setup_start = time.perf_counter()
+    matrix_schedule['expected_scores'] = matchup_expected_scores(matrix_schedule, teams)
     results = {}
-
-    for round_number in matrix_schedule['round_number'].value_counts().index:
-        (stadia, teams, score_settings) = load.data(season_settings, round_number, drop_null_score_table_records = True)
-        matchups += load.schedule(season_settings, teams, stadia, score_settings, round_number, multithreaded = True, result_dict = results, schedule_override = matrix_schedule)
+    (backend, workers) = get_backend(season_settings, workers)
+    seed = get_seed(season_settings)
+    matchups = load.schedule(season_settings, teams, stadia, score_settings, multithreaded = True, result_dict = results, schedule_override = matrix_schedule, start_threads = False)
+    print("Set up {0} matchups in {1:.3f} s".format(len(matchups), time.perf_counter() - setup_start))
 
     print("Running matchups")
-    run_multithreaded_games(matchups)
+    simulation_start = time.perf_counter()
+    run_games(matchups, results, backend, workers, season_settings.get('per_game_streams', True))
+    print("Loaded data in {0:.2f} s and simulated {1} matchups in {2:.2f} s".format(load_time, len(matchups), time.perf_counter() - simulation_start))
 
     print("Writing matrix")
     outfile = os.path.join(season_settings['output_directory'], (matrix_settings['outfile']))
@@ -101,20 +130,64 @@ def matrix(outfile = 'matrix.csv'):
 
     print("Writing all results")
     outfile = os.path.join(season_settings['output_directory'], (season_settings['report_filename'] + '_matrix.xlsx'))
-    generate_report(outfile, teams, results)
+    generate_report(outfile, teams, results, seed)
+
+def __parse_options(args):
+    '''
+    Separates command line arguments into positional arguments and options given as `--option value`
+
+    Parameters
+    ----------
+    args (list):
+        Command line arguments after the command name
+
+    Returns
+    -------
+    positional (list):
+        Positional arguments
+    options (dict):
+        Dictionary of options given on the command line. The program exits with a usage message if an option is unknown or has no value
+    '''
+    positional = []
+    options = {}
+    i = 0
+    while i < len(args):
+        if args[i].startswith('--'):
+            option = args[i][2:]
+            if option not in command_line_options:
+                sys.exit('Unknown option {0}. Options are {1}'.format(args[i], ', '.join('--' + option for option in command_line_options)))
+            if i + 1 == len(args) or args[i+1].startswith('--'):
+                sys.exit('No value was given for {0}. Usage: {0} [{1}]'.format(args[i], command_line_options[option]))
+            options[option] = args[i+1]
+            i += 2
+        else:
+            positional.append(args[i])
+            i += 1
+    return positional, options
 
 def main():
     '''
-    The main function that calls either `initialize_season()`, `predictify()`, or `matrix()` depending on what the user specifies.
+    The main function that calls either `initialize_season()`, `predictify()`, `matrix()`, `import_score_store()`, or `export_score_store()`
+    depending on what the user specifies.
+    The number of worker processes can be given with `--workers [n]`.
     '''
-    if sys.argv[1] == 'initialize_season':
+    (args, options) = __parse_options(sys.argv[1:])
+    workers = int(options['workers']) if 'workers' in options else None
+
+    if args[0] == 'initialize_season':
         initialize_season()
 
-    elif sys.argv[1] == 'predictify':
-        predictify(int(sys.argv[2]))
+    elif args[0] == 'predictify':
+        predictify(int(args[1]), workers)
 
-    elif sys.argv[1] == 'matrix':
-        if len(sys.argv) > 2:
-            matrix(sys.argv[2])
+    elif args[0] == 'matrix':
+        if len(args) > 1:
+            matrix(args[1], workers)
         else: # User did not specify outfile name
-            matrix()
\ No newline at end of file
+            matrix(workers = workers)
+
+    elif args[0] == 'import_score_store':
+        import_score_store()
+
+    elif args[0] == 'export_score_store':
+        export_score_store()
\ No newline at end of file
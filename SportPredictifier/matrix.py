@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
 
+from .objects import StatsTensor
+
 def __get_team_list(matrix_settings):
     '''
     Obtains a list of all teams given in the matrix settings. It does not separate them by group.
@@ -71,26 +73,6 @@ def __get_matchup_list(team_list, matrix_settings, teams):
             matchups.append((team_list[i], team_list[j], __assign_venue(team_list[i], team_list[j], matrix_settings, teams)))
     return matchups
 
-def __get_allocated_teams(matchups):
-    '''
-    Obtains list of teams within matchups. This is used to prevent matchups with the same team from being allocated into the round.
-
-    Parameters
-    ----------
-    matchups (list):
-        List of length-4 tuples indicating each team, the venue, and a collection of all teams
-
-    Returns
-    -------
-    allocated_teams (list):
-        List of codes for teams that are present in the matchup
-    '''
-    allocated_teams = []
-    for matchup in matchups:
-        allocated_teams.append(matchup[0])
-        allocated_teams.append(matchup[1])
-    return allocated_teams
-
 def __allocate_matchups(matchups, roundno = 0):
     '''
     Allocates the matchups to different rounds so that games can be simulated in parallel, but one team won't be in multiple simulations in the same round.
@@ -110,11 +92,12 @@ def __allocate_matchups(matchups, roundno = 0):
     matchups_by_round = {}
     while len(matchups) > 0:
         matchups_by_round[roundno] = []
+        allocated_teams = set()
         for matchup in matchups:
-            allocated_teams = __get_allocated_teams(matchups_by_round[roundno])
             if matchup[0] in allocated_teams or matchup[1] in allocated_teams:
                 continue
             matchups_by_round[roundno].append(matchup)
+            allocated_teams.update(matchup[:2])
         
         for matchup in matchups_by_round[roundno]:
             matchups.remove(matchup)
@@ -144,24 +127,80 @@ def generate_schedule(matrix_settings, teams):
     matchups = __get_matchup_list(team_list, matrix_settings, teams)
     matchups_by_round = __allocate_matchups(matchups, matrix_settings['round_number'])
 
-    matrix_schedule = pd.DataFrame(columns = ['round_number',
-                                              'year',
-                                              'month',
-                                              'day',
-                                              'team1',
-                                              'team2',
-                                              'venue',
-                                              'knockout'])
-
-    ix = 0
-    
+    # The rows are collected first so that the data frame is built in one go rather than one row at a time
+    rows = []
     for roundno in matchups_by_round:
         for matchup in matchups_by_round[roundno]:
-            matrix_schedule.loc[ix] = [roundno, 2023, 1, 1] + list(matchup) + [True]
-            ix += 1
+            rows.append([roundno, 2023, 1, 1] + list(matchup) + [True])
+
+    matrix_schedule = pd.DataFrame(rows, columns = ['round_number',
+                                                    'year',
+                                                    'month',
+                                                    'day',
+                                                    'team1',
+                                                    'team2',
+                                                    'venue',
+                                                    'knockout'])
 
     return matrix_schedule
 
+def expected_score_matrix(teams, team_codes = None):
+    '''
+    Calculates the expected scores of every team against every other team in a single vectorised pass over the team statistics, giving
+    the same values as the expected scores of a `Game` between each pair of teams
+
+    Parameters
+    ----------
+    teams (SportPredictifier.ObjectCollection):
+        Collection of teams in the competition. Their stats must have been calculated
+    team_codes (list, optional):
+        Codes of the teams to include, in order. If not given, every team is included
+
+    Returns
+    -------
+    means (numpy.ndarray):
+        Array of shape (teams, teams, score types) where element [i, j, k] is the expected number of scores of type k by team i against
+        team j, or the probability of the score being successful for probabilistic score types. The diagonal is NaN
+    variances (numpy.ndarray):
+        Array of the same shape with the variance of the number of scores, which is NaN for probabilistic score types
+    '''
+    tensor = StatsTensor.of(teams)
+    positions = tensor.positions(tensor.teams if team_codes is None else list(team_codes))
+    (means, variances) = tensor.expected_scores(positions[:, np.newaxis], positions[np.newaxis, :])
+
+    diagonal = np.arange(len(positions))
+    means[diagonal, diagonal] = np.nan
+    variances[diagonal, diagonal] = np.nan
+    return means, variances
+
+def matchup_expected_scores(matrix_schedule, teams):
+    '''
+    Looks up the expected scores of every matchup in the matrix schedule from the expected score matrix, so that each `Game` doesn't have
+    to calculate them
+
+    Parameters
+    ----------
+    matrix_schedule (pandas.DataFrame):
+        Data frame with the schedule from `generate_schedule()`
+    teams (SportPredictifier.ObjectCollection):
+        Collection of teams in the competition. Their stats must have been calculated
+
+    Returns
+    -------
+    expected_scores (list):
+        Dictionary with the expected scores of each team for every matchup, in the format used by `Game`
+    '''
+    team_codes = list(pd.unique(np.concatenate([matrix_schedule['team1'].values, matrix_schedule['team2'].values]).astype(object)))
+    index = {team: i for (i, team) in enumerate(team_codes)}
+    (means, variances) = expected_score_matrix(teams, team_codes)
+
+    tensor = StatsTensor.of(teams)
+    expected_scores = []
+    for (team1, team2) in zip(matrix_schedule['team1'], matrix_schedule['team2']):
+        rows = ([index[team1], index[team2]], [index[team2], index[team1]])
+        expected_scores.append(tensor.game_expected_scores([team1, team2], means[rows], variances[rows]))
+    return expected_scores
+
 def write_matrix(matrix_settings, results, outfile):
     '''
     Writes the results of the matrix analysis to a CSV file where each cell value is the estimated chance of [row label] defeating [column label]
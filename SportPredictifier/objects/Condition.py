@@ -0,0 +1,191 @@
+import re
+import numpy as np
+import ast
+
+class Condition:
+    '''
+    A condition for a probabilistic score type (e.g. "TD_{F} - GOFOR2_{F}") compiled into a linear combination of the number of scores of
+    each type. Score types are referred to as `CODE_{F}` for the team's own scores and `CODE_{A}` for the opposition's. The expression is
+    parsed once when the score settings are loaded so that it can be evaluated many times on arrays without being parsed again.
+
+    Attributes
+    ----------
+    expression (str):
+        Condition as written in the score settings
+    terms (list):
+        List of (score type, direction, coefficient) tuples, where the direction is "F" or "A"
+    constant (numeric):
+        Constant term of the condition
+    '''
+    def __init__(self, expression):
+        self.expression = expression
+        try:
+            tree = ast.parse(re.sub(r'(\w+)_\{([FA])\}', r'\1_\2', expression), mode = 'eval')
+        except SyntaxError:
+            raise ValueError('Could not parse condition {}'.format(expression))
+
+        (coefficients, constant) = self.__compile(tree.body)
+        self.terms = [(code, direction, self.__simplify(coefficient)) for ((code, direction), coefficient) in coefficients.items() if coefficient != 0]
+        self.constant = self.__simplify(constant)
+
+    def __repr__(self):
+        return 'Condition({})'.format(repr(self.expression))
+
+    @staticmethod
+    def __simplify(number):
+        '''
+        Converts whole numbers to integers so that conditions on integer counts stay integers
+        '''
+        return int(number) if float(number).is_integer() else number
+
+    def __compile(self, node):
+        '''
+        Recursively converts a node of the parsed expression into a linear combination of score types
+
+        Parameters
+        ----------
+        node (ast.AST):
+            Node of the parsed expression
+
+        Returns
+        -------
+        coefficients (dict):
+            Dictionary mapping (score type, direction) to its coefficient
+        constant (numeric):
+            Constant term
+        '''
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+            return {}, node.value
+
+        elif isinstance(node, ast.Name):
+            (code, _, direction) = node.id.rpartition('_')
+            if code == '' or direction not in ['F', 'A']:
+                raise ValueError('{0} in condition {1} is not of the form CODE_{{F}} or CODE_{{A}}'.format(node.id, self.expression))
+            return {(code, direction): 1}, 0
+
+        elif isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.UAdd, ast.USub)):
+            (coefficients, constant) = self.__compile(node.operand)
+            sign = -1 if isinstance(node.op, ast.USub) else 1
+            return {variable: sign*coefficient for (variable, coefficient) in coefficients.items()}, sign*constant
+
+        elif isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Add, ast.Sub)):
+            (left_coefficients, left_constant) = self.__compile(node.left)
+            (right_coefficients, right_constant) = self.__compile(node.right)
+            sign = -1 if isinstance(node.op, ast.Sub) else 1
+            coefficients = dict(left_coefficients)
+            for (variable, coefficient) in right_coefficients.items():
+                coefficients[variable] = coefficients.get(variable, 0) + sign*coefficient
+            return coefficients, left_constant + sign*right_constant
+
+        elif isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Mult, ast.Div)):
+            (left_coefficients, left_constant) = self.__compile(node.left)
+            (right_coefficients, right_constant) = self.__compile(node.right)
+            if isinstance(node.op, ast.Mult) and len(left_coefficients) == 0:
+                (coefficients, constant, factor) = (right_coefficients, right_constant, left_constant)
+            elif len(right_coefficients) == 0:
+                if isinstance(node.op, ast.Div) and right_constant == 0:
+                    raise ValueError('Condition {} divides by zero'.format(self.expression))
+                (coefficients, constant) = (left_coefficients, left_constant)
+                factor = right_constant if isinstance(node.op, ast.Mult) else 1/right_constant
+            else:
+                raise ValueError('Condition {} must be a sum of score types multiplied by constants'.format(self.expression))
+            return {variable: factor*coefficient for (variable, coefficient) in coefficients.items()}, factor*constant
+
+        raise ValueError('Condition {} must be a sum of score types multiplied by constants'.format(self.expression))
+
+    @property
+    def codes(self):
+        '''
+        Codes of the score types that the condition refers to
+        '''
+        return sorted({code for (code, direction, coefficient) in self.terms})
+
+    def validate(self, score_codes):
+        '''
+        Checks that the condition only refers to known score types
+
+        Parameters
+        ----------
+        score_codes (list):
+            Codes of the score types that the condition may refer to
+        '''
+        unknown = [code for code in self.codes if code not in score_codes]
+        if len(unknown) > 0:
+            raise ValueError('Condition {0} refers to unknown score types: {1}'.format(self.expression, ', '.join(unknown)))
+
+    def __call__(self, scores_for, scores_against):
+        '''
+        Evaluates the condition
+
+        Parameters
+        ----------
+        scores_for (dict-like):
+            Mapping from the code of each score type to the number of scores of that type by the team (e.g. a dictionary of arrays)
+        scores_against (dict-like):
+            Mapping from the code of each score type to the number of scores of that type by the opposition
+
+        Returns
+        -------
+        value (numpy.ndarray or pandas.Series):
+            Value of the condition
+        '''
+        value = None
+        for (code, direction, coefficient) in self.terms:
+            x = scores_for[code] if direction == 'F' else scores_against[code]
+            if value is None:
+                value = x if coefficient == 1 else coefficient*x
+            elif coefficient == 1:
+                value = value + x
+            elif coefficient == -1:
+                value = value - x
+            else:
+                value = value + coefficient*x
+
+        if value is None:
+            return self.constant
+        elif self.constant != 0:
+            value = value + self.constant
+        return value
+
+    def evaluate_columns(self, table, for_suffix, against_suffix):
+        '''
+        Evaluates the condition on a table with a column for each score type and team, such as a score table or a score matrix
+
+        Parameters
+        ----------
+        table (pandas.DataFrame):
+            Table with columns named `CODE_SUFFIX`
+        for_suffix (str):
+            Suffix of the columns with the team's scores (e.g. "F" or a team code)
+        against_suffix (str):
+            Suffix of the columns with the opposition's scores (e.g. "A" or the opposition's code)
+
+        Returns
+        -------
+        value (pandas.Series):
+            Value of the condition for each row of the table
+        '''
+        return self({code: table['{0}_{1}'.format(code, for_suffix)] for code in self.codes},
+                    {code: table['{0}_{1}'.format(code, against_suffix)] for code in self.codes})
+
+    def evaluate_indexed(self, scores_for, scores_against, index):
+        '''
+        Evaluates the condition on arrays where the first axis is the score type. The numbers of scores are read as signed integers so that
+        a condition that subtracts scores can come out negative rather than wrapping around when they're stored as unsigned integers
+
+        Parameters
+        ----------
+        scores_for (numpy.ndarray):
+            Array of the number of scores of each type by the team
+        scores_against (numpy.ndarray):
+            Array of the number of scores of each type by the opposition
+        index (dict):
+            Dictionary mapping the code of each score type to its position along the first axis
+
+        Returns
+        -------
+        value (numpy.ndarray):
+            Value of the condition
+        '''
+        return self({code: scores_for[index[code]].astype(np.int64) for code in self.codes},
+                    {code: scores_against[index[code]].astype(np.int64) for code in self.codes})
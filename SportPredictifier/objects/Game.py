@@ -4,6 +4,8 @@ import numpy as np
 
 from ..util import *
 from ..simulate import simulate_game
+from ..seeding import game_seed_sequence
+from ..store import simulation_path
 
 class Game(threading.Thread):
     '''
@@ -28,12 +30,33 @@ class Game(threading.Thread):
     knockout (bool):
         If set to `False`, a draw is possible
     n_simulations (int):
-        Number of simulations to run when simulating the game
+        Number of simulations to run when simulating the game. If `target_standard_error` is given, this is the minimum number
     store_results (bool):
-        If set to `True`, every simulated game will be stored in a CSV
+        If set to `True`, every simulated game will be kept in memory and returned with the results
+    min_expected_mean (float):
+        Minimum expected number of scores for non-probabilistic score types
+    chunk_size (int, optional):
+        If given, the game will be simulated in blocks of this many simulations to limit the memory used
+    engine (str):
+        "monte_carlo" to simulate the game or "exact" to calculate the distribution of scores exactly
+    target_standard_error (float, optional):
+        If given, the game will be simulated until the standard error of each team's chance of winning is at most this
+    max_simulations (int, optional):
+        Maximum number of simulations to run if `target_standard_error` is given
+    seed (int, optional):
+        Seed for the run. The game's random numbers are drawn from a stream spawned from it for this round and matchup
+    variance_reduction (str, optional):
+        "antithetic", "quasi", or "common" to use a variance reduction method when simulating the game
+    store_directory (str, optional):
+        If given, every simulated game will be written to a binary file in this directory as it is simulated
+    expected_scores (dict, optional):
+        Expected scores of each team that have already been calculated (e.g. for every matchup at once by `matrix.expected_score_matrix()`).
+        If not given, they're calculated from the teams' stats
     '''
 
-    def __init__(self, result_dict, round_number, date, team1, team2, venue, knockout, score_settings, n_simulations, store_results, min_expected_mean):
+    def __init__(self, result_dict, round_number, date, team1, team2, venue, knockout, score_settings, n_simulations, store_results, min_expected_mean, chunk_size = None, engine = 'monte_carlo',
+                 target_standard_error = None, max_simulations = None, seed = None, variance_reduction = None,
+                 store_directory = None, expected_scores = None):
         
         threading.Thread.__init__(self)
 
@@ -48,24 +71,41 @@ class Game(threading.Thread):
         self.n_simulations = n_simulations
         self.store_results = store_results
         self.min_expected_mean = min_expected_mean
+        self.chunk_size = chunk_size
+        self.engine = engine
+        self.target_standard_error = target_standard_error
+        self.max_simulations = max_simulations
+        self.variance_reduction = variance_reduction
+        self.store_path = None if store_directory is None else simulation_path(store_directory, '{0}v{1}'.format(team1.code, team2.code))
+        self.seed_sequence = game_seed_sequence(seed, round_number, '{0}v{1}'.format(team1.code, team2.code))
         
+        # Calculate expected scores unless they've already been calculated
+        if expected_scores is not None:
+            self.expected_scores = expected_scores
+        else:
+            self.__get_expected_scores()
+        
+    def __get_expected_scores(self):
+        '''
+        Calculates the expected scores for each team by adding each team's residual statistics to the opposition's typical performance.
+        '''
+        # When both teams' stats are views of the same `StatsTensor`, both teams are calculated at once without touching the teams
+        tensor = getattr(self.team1.stats, 'tensor', None)
+        if tensor is not None and tensor is getattr(self.team2.stats, 'tensor', None):
+            codes = [self.team1.code, self.team2.code]
+            self.expected_scores = tensor.game_expected_scores(codes, *tensor.expected_scores(codes, codes[::-1]))
+            return
+
         # Initialize expected scores
         self.expected_scores = {
-            team1.code: {},
-            team2.code: {}
+            self.team1.code: {},
+            self.team2.code: {}
         }
 
         # Set oppponents for each team
-        self.team1.opp = team2
-        self.team2.opp = team1
+        self.team1.opp = self.team2
+        self.team2.opp = self.team1
 
-        # Calculate expected scores
-        self.__get_expected_scores()
-        
-    def __get_expected_scores(self):
-        '''
-        Calculates the expected scores for each team by adding each team's residual statistics to the opposition's typical performance.
-        '''
         for score_type in self.score_settings:
             for team in [self.team1, self.team2]:
 
@@ -74,8 +114,8 @@ class Game(threading.Thread):
 
                     # If the opposition has an effect on the score type, average the team's expected attack and the opposition's expected defense
                     if self.score_settings[score_type].opp_effect:
-                        self.expected_scores[team.code][score_type] = np.average([team.stats['F']['RES_' + score_type] + team.opp.stats['A'][score_type],
-                                                                                  team.opp.stats['A']['RES_' + score_type] + team.stats['F'][score_type]])
+                        self.expected_scores[team.code][score_type] = ((team.stats['F']['RES_' + score_type] + team.opp.stats['A'][score_type]) +
+                                                                        (team.opp.stats['A']['RES_' + score_type] + team.stats['F'][score_type]))/2
                     else:
                         self.expected_scores[team.code][score_type] = team.stats['F'][score_type]
 
@@ -87,8 +127,8 @@ class Game(threading.Thread):
 
                     # If the opposition has an effect on the score type, average the team's expected attack and the opposition's expected defense
                     if self.score_settings[score_type].opp_effect:
-                        self.expected_scores[team.code][score_type] = (np.average([team.stats['F']['RES_' + score_type][0] + team.opp.stats['A'][score_type],
-                                                                                   team.opp.stats['A']['RES_' + score_type][0] + team.stats['F'][score_type]]),
+                        self.expected_scores[team.code][score_type] = (((team.stats['F']['RES_' + score_type][0] + team.opp.stats['A'][score_type]) +
+                                                                        (team.opp.stats['A']['RES_' + score_type][0] + team.stats['F'][score_type]))/2,
                                                                        0.25*(team.stats['F']['RES_' + score_type][1] + team.opp.stats['A']['RES_' + score_type][1])
                         )
 
@@ -96,6 +136,39 @@ class Game(threading.Thread):
                     else:
                         self.expected_scores[team.code][score_type] = (team.stats['F'][score_type][0], team.stats['F'][score_type][1])
 
+    def spec(self):
+        '''
+        Returns a compact, picklable specification of the game that can be simulated in another process
+
+        Returns
+        -------
+        spec (tuple):
+            Tuple containing the matchup key and the arguments to pass to `simulate_game()` other than the venue
+        '''
+        expected_scores = {}
+        for team in self.expected_scores:
+            expected_scores[team] = {}
+            for score_type in self.expected_scores[team]:
+                if self.score_settings[score_type].prob:
+                    expected_scores[team][score_type] = float(self.expected_scores[team][score_type])
+                else:
+                    expected_scores[team][score_type] = tuple(float(x) for x in self.expected_scores[team][score_type])
+
+        return ('{0}v{1}'.format(self.team1.code, self.team2.code),
+                self.n_simulations,
+                expected_scores,
+                self.score_settings,
+                self.knockout,
+                self.store_results,
+                self.min_expected_mean,
+                self.chunk_size,
+                self.engine,
+                self.target_standard_error,
+                self.max_simulations,
+                self.seed_sequence,
+                self.variance_reduction,
+                self.store_path)
+
     def run(self):
         '''
         Runs the simulation of the game
@@ -114,5 +187,12 @@ class Game(threading.Thread):
                                                                                              self.venue,
                                                                                              self.knockout,
                                                                                              self.store_results,
-                                                                                             self.min_expected_mean
+                                                                                             self.min_expected_mean,
+                                                                                             self.chunk_size,
+                                                                                             self.engine,
+                                                                                             self.target_standard_error,
+                                                                                             self.max_simulations,
+                                                                                             self.seed_sequence,
+                                                                                             self.variance_reduction,
+                                                                                             self.store_path
                                                                                              )
\ No newline at end of file
@@ -1,3 +1,5 @@
+from .Condition import Condition
+
 class ScoreSettings:
     '''
     Settings for different ways to score and various characteristics of them, such as how many points they're worth, whether or not they're probabilistic,
@@ -18,9 +20,12 @@ class ScoreSettings:
         Indicates whether or not the opposition has an effect on this score
     base (bool):
         Base probability for probabilistic scoring
-    condition (bool):
-        Condition for when the probabilistic scoring should be run based on score types defined earlier
+    condition (SportPredictifier.Condition):
+        Condition for when the probabilistic scoring should be run based on score types defined earlier. Strings are compiled into a
+        `Condition` when the score settings are created
     '''
+    __slots__ = ('code', 'description', 'points', 'prob', 'opp_effect', 'base', 'condition')
+
     def __init__(self, code, description, points, prob, opp_effect, base, condition):
         self.code = code
         self.description = description
@@ -28,4 +33,4 @@ class ScoreSettings:
         self.prob = prob
         self.opp_effect = opp_effect
         self.base = base
-        self.condition = condition
\ No newline at end of file
+        self.condition = Condition(condition) if isinstance(condition, str) else condition
\ No newline at end of file
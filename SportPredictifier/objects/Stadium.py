@@ -1,4 +1,5 @@
 class Stadium:
+    __slots__ = ('code', 'name', 'location', 'lat', 'lon', 'elev')
 
     def __init__(self, code, name, location, lat, lon, elev):
         """
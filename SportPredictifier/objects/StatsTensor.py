@@ -0,0 +1,274 @@
+import numpy as np
+from collections.abc import Mapping
+
+from ..util import directions, cap_probability
+
+moments = ['mean', 'variance']
+
+class StatsTensor:
+    '''
+    The `StatsTensor` object holds the statistics of every team in the competition in a single array, so that they can be used for many
+    teams at once. It is created and filled by the `calculate` stage, and each team's `stats` attribute is a `TeamStats` view of it that
+    can be used like the nested dictionaries of `team.stats[direction][stat]`.
+
+    The stats are the score types followed by the residual stats (`RES_` followed by the score type). Stats that have a variance (those of
+    non-probabilistic score types without an opponent effect, and the residuals of non-probabilistic score types) are returned as a tuple
+    of the mean and variance, and the rest only have a mean.
+
+    Parameters
+    ----------
+    teams (iterable):
+        Codes of the teams in the competition
+    score_settings (SportPredictifier.ObjectCollection):
+        Collection of score settings for the competition
+
+    Attributes
+    ----------
+    values (numpy.ndarray):
+        Array with shape (teams, directions, stats, moments). Moments that a stat doesn't have are NaN
+    team_index (dict):
+        Dictionary mapping each team code to its position in the first axis
+    direction_index (dict):
+        Dictionary mapping "F" and "A" to their position in the second axis
+    stat_index (dict):
+        Dictionary mapping each stat to its position in the third axis
+    has_variance (numpy.ndarray):
+        Whether each stat is a tuple of the mean and variance
+    calculated (numpy.ndarray):
+        Whether each stat has been calculated in each direction, with shape (directions, stats)
+    '''
+    __slots__ = ('teams', 'score_types', 'stats', 'values', 'team_index', 'direction_index', 'stat_index', 'has_variance', 'calculated', 'prob', 'opp_effect')
+
+    def __init__(self, teams, score_settings):
+        self.teams = list(teams)
+        self.score_types = list(score_settings.keys())
+        self.stats = self.score_types + ['RES_' + score_type for score_type in self.score_types]
+
+        self.team_index = {team: i for (i, team) in enumerate(self.teams)}
+        self.direction_index = {direction: i for (i, direction) in enumerate(directions)}
+        self.stat_index = {stat: i for (i, stat) in enumerate(self.stats)}
+
+        self.prob = np.array([bool(score_settings[score_type].prob) for score_type in self.score_types])
+        self.opp_effect = np.array([bool(score_settings[score_type].opp_effect) for score_type in self.score_types])
+        self.has_variance = np.concatenate([~self.prob & ~self.opp_effect, ~self.prob])
+
+        self.values = np.full((len(self.teams), len(directions), len(self.stats), len(moments)), np.nan)
+        self.calculated = np.zeros((len(directions), len(self.stats)), bool)
+
+    @classmethod
+    def of(cls, teams):
+        '''
+        Returns the tensor that the stats of every team are a view of
+
+        Parameters
+        ----------
+        teams (SportPredictifier.ObjectCollection):
+            Collection of teams competing in the competition
+
+        Returns
+        -------
+        tensor (SportPredictifier.StatsTensor):
+            Tensor with the stats of every team
+        '''
+        tensors = {id(getattr(team.stats, 'tensor', None)): getattr(team.stats, 'tensor', None) for team in teams.values()}
+        if len(tensors) != 1 or None in tensors.values():
+            raise ValueError('The stats of every team must have been calculated together')
+        return list(tensors.values())[0]
+
+    def fill(self, direction, stat, values, teams = None):
+        '''
+        Sets a stat in one direction for many teams at once
+
+        Parameters
+        ----------
+        direction (str):
+            "F" or "A"
+        stat (str):
+            Score type or residual stat
+        values (numpy.ndarray or tuple):
+            Value of the stat for each team, or a tuple of the mean and variance of each team if the stat has a variance
+        teams (list, optional):
+            Codes of the teams that `values` are for. If not given, they're for every team in order
+        '''
+        rows = slice(None) if teams is None else [self.team_index[team] for team in teams]
+        (d, s) = (self.direction_index[direction], self.stat_index[stat])
+        if self.has_variance[s]:
+            (self.values[rows, d, s, 0], self.values[rows, d, s, 1]) = values
+        else:
+            self.values[rows, d, s, 0] = values
+        self.calculated[d, s] = True
+
+    def get(self, team, direction, stat):
+        '''
+        Returns a single team's stat in the same format as the values of `team.stats[direction]`
+
+        Parameters
+        ----------
+        team (str):
+            Team code
+        direction (str):
+            "F" or "A"
+        stat (str):
+            Score type or residual stat
+
+        Returns
+        -------
+        value (float or tuple):
+            Value of the stat, or a tuple of the mean and variance if the stat has a variance
+        '''
+        (d, s) = (self.direction_index[direction], self.stat_index[stat])
+        value = self.values[self.team_index[team], d, s]
+        return (value[0], value[1]) if self.has_variance[s] else value[0]
+
+    def set(self, team, direction, stat, value):
+        '''
+        Sets a single team's stat, taking the value in the same format as `get()` returns it
+        '''
+        (d, s) = (self.direction_index[direction], self.stat_index[stat])
+        if self.has_variance[s]:
+            self.values[self.team_index[team], d, s] = value
+        else:
+            self.values[self.team_index[team], d, s, 0] = value
+        self.calculated[d, s] = True
+
+    def view(self, team):
+        '''
+        Returns a view of a team's stats that can be used as its `stats` attribute
+        '''
+        return TeamStats(self, team)
+
+    def assign(self, teams):
+        '''
+        Sets the `stats` attribute of every team to a view of its stats in the tensor
+
+        Parameters
+        ----------
+        teams (SportPredictifier.ObjectCollection):
+            Collection of teams competing in the competition
+        '''
+        for team in teams:
+            teams[team].stats = self.view(team)
+
+    def positions(self, teams):
+        '''
+        Converts team codes to their positions in the tensor. Integer arrays are assumed to already be positions.
+        '''
+        teams = np.asarray(teams)
+        if np.issubdtype(teams.dtype, np.integer):
+            return teams
+        return np.array([self.team_index[team] for team in teams.ravel()], int).reshape(teams.shape)
+
+    def expected_scores(self, team1, team2):
+        '''
+        Calculates the expected scores of team 1 against team 2 for any number of pairs of teams at once, in the same way as the expected
+        scores of a `Game`. Where the opposition has an effect on the score type, each team's residual stat is added to the opposition's
+        typical performance and averaged with the opposition's residual added to the team's typical performance. Probabilities are capped
+        between 0 and 1.
+
+        Parameters
+        ----------
+        team1 (array-like):
+            Codes (or positions in the tensor) of the teams whose expected scores are calculated
+        team2 (array-like):
+            Codes (or positions in the tensor) of their opponents, with the same shape as `team1`
+
+        Returns
+        -------
+        means (numpy.ndarray):
+            Expected number of scores (or probability of the score being successful) of each score type for team 1, with the shape of
+            `team1` followed by the number of score types
+        variances (numpy.ndarray):
+            Variance of the number of scores, which is NaN for probabilistic score types
+        '''
+        (d_for, d_against) = (self.direction_index['F'], self.direction_index['A'])
+        (base, residual) = (slice(0, len(self.score_types)), slice(len(self.score_types), len(self.stats)))
+        team_for = self.values[self.positions(team1), d_for]
+        opp_against = self.values[self.positions(team2), d_against]
+
+        adjusted = ((team_for[..., residual, 0] + opp_against[..., base, 0]) + (opp_against[..., residual, 0] + team_for[..., base, 0]))/2
+        means = np.where(self.opp_effect, adjusted, team_for[..., base, 0])
+        means = np.where(self.prob, cap_probability(means), means)
+
+        variances = np.where(self.opp_effect, 0.25*(team_for[..., residual, 1] + opp_against[..., residual, 1]), team_for[..., base, 1])
+        variances = np.where(self.prob, np.nan, variances)
+        return means, variances
+
+    def game_expected_scores(self, teams, means, variances):
+        '''
+        Converts the expected scores of both teams in a game from `expected_scores()` to the dictionary used by `Game` and `simulate_game()`
+
+        Parameters
+        ----------
+        teams (list):
+            Codes of the two teams in the game
+        means (numpy.ndarray):
+            Array of shape (2, score types) with the expected number of scores (or probability) of each type for each team
+        variances (numpy.ndarray):
+            Array of shape (2, score types) with the variance of the number of scores of each type for each team
+
+        Returns
+        -------
+        expected_scores (dict):
+            Dictionary with the probability of each probabilistic score type and a tuple of the expected number of scores and its variance
+            for every other score type, for each team
+        '''
+        expected_scores = {}
+        for (t, team) in enumerate(teams):
+            expected_scores[team] = {}
+            for (k, score_type) in enumerate(self.score_types):
+                expected_scores[team][score_type] = means[t, k] if self.prob[k] else (means[t, k], variances[t, k])
+        return expected_scores
+
+class TeamStats(Mapping):
+    '''
+    View of a team's stats in a `StatsTensor` that can be used like the dictionary of each direction's stats that `team.stats` used to be
+    '''
+    __slots__ = ('tensor', 'team')
+
+    def __init__(self, tensor, team):
+        self.tensor = tensor
+        self.team = team
+
+    def __getitem__(self, direction):
+        if direction not in self.tensor.direction_index:
+            raise KeyError(direction)
+        return DirectionStats(self.tensor, self.team, direction)
+
+    def __iter__(self):
+        return iter(directions)
+
+    def __len__(self):
+        return len(directions)
+
+    def __repr__(self):
+        return repr({direction: dict(self[direction]) for direction in self})
+
+class DirectionStats(Mapping):
+    '''
+    View of a team's stats in one direction in a `StatsTensor`, with the stats that have been calculated as its keys. Stats can also be set
+    through it.
+    '''
+    __slots__ = ('tensor', 'team', 'direction')
+
+    def __init__(self, tensor, team, direction):
+        self.tensor = tensor
+        self.team = team
+        self.direction = direction
+
+    def __getitem__(self, stat):
+        if stat not in self.tensor.stat_index or not self.tensor.calculated[self.tensor.direction_index[self.direction], self.tensor.stat_index[stat]]:
+            raise KeyError(stat)
+        return self.tensor.get(self.team, self.direction, stat)
+
+    def __setitem__(self, stat, value):
+        self.tensor.set(self.team, self.direction, stat, value)
+
+    def __iter__(self):
+        calculated = self.tensor.calculated[self.tensor.direction_index[self.direction]]
+        return iter([stat for (stat, is_calculated) in zip(self.tensor.stats, calculated) if is_calculated])
+
+    def __len__(self):
+        return int(self.tensor.calculated[self.tensor.direction_index[self.direction]].sum())
+
+    def __repr__(self):
+        return repr(dict(self))
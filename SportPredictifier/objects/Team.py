@@ -1,4 +1,5 @@
 class Team:
+    __slots__ = ('code', 'name', 'stadium', 'color1', 'color2', 'stats', 'residual_stats', 'opp')
 
     def __init__(self, code, name, stadium, color1, color2):
         """
@@ -1,5 +1,7 @@
 from .Team import *
 from .Stadium import *
+from .Condition import *
 from .ScoreSettings import *
 from .Game import *
-from .ObjectCollection import *
\ No newline at end of file
+from .ObjectCollection import *
+from .StatsTensor import *
\ No newline at end of file
@@ -1,42 +1,102 @@
 import pandas as pd
 import numpy as np
 import os
-from scipy.stats.distributions import norm
-
-def rank(score_table_path, ranking_filepath, score_settings, round_name, round_number):
-
-    pf = {}
-    pa = {}
-
-    score_array = score_settings.extract_attribute('points')
-    score_types_f = []
-    score_types_a = []
-    for score_type in score_settings:
-        score_types_f.append(score_type + '_F')
-        score_types_a.append(score_type + '_A')
-
-    for team in os.listdir(score_table_path):
-        data = pd.read_csv(os.path.join(score_table_path, team)).query('{0} < {1}'.format(round_name.upper(), round_number))
-        pf[team[:-4]] = np.dot(data[score_types_f], score_array).mean()
-        pa[team[:-4]] = np.dot(data[score_types_a], score_array).mean()
-
-    results = pd.DataFrame(index = pf.keys(), columns = ['Attack', 'Defense', 'Overall'])
-
-    for team in os.listdir(score_table_path):
-        data = pd.read_csv(os.path.join(score_table_path, team))
-        data['For'] = np.dot(data[score_types_f], score_array)
-        data['Against'] = np.dot(data[score_types_a], score_array)
-        data['OppFor'] = data['OPP'].map(pf)
-        data['OppAgainst'] = data['OPP'].map(pa)
-        data['Attack'] = data['For'] - data['OppAgainst']
-        data['Defense'] = data['Against'] - data['OppFor']
-        data['Overall'] = data['Attack'] - data['Defense']
-    
-        results.loc[team[:-4]] = data[results.columns].mean()
 
+from .calculate import long_score_table
+from .objects import ObjectCollection
+from .score_store import is_score_store, read_score_store
+
+def __read_score_tables(score_table_path):
+    '''
+    Reads the score tables from a score store or a directory of score table CSV files, for when they haven't already been loaded
+    '''
+    if is_score_store(score_table_path):
+        return read_score_store(score_table_path)
+    score_tables = ObjectCollection()
+    for score_table_file in os.listdir(score_table_path):
+        if score_table_file.endswith('.csv'):
+            score_tables[score_table_file[:-4]] = pd.read_csv(os.path.join(score_table_path, score_table_file))
+    return score_tables
+
+def ratings(score_table, teams, score_settings):
+    '''
+    Solves for the opponent-adjusted attack and defense rating of every team at once. The points scored in every game by every team are
+    modelled as an overall mean plus the team's attack rating plus its opponent's defense rating, and the ratings are fitted to all of the
+    games as a single sparse linear least-squares problem. The attack and defense ratings each sum to zero so that they're relative to an
+    average team.
+
+    Parameters
+    ----------
+    score_table (pandas.DataFrame):
+        Long-format score table from `calculate.long_score_table()` with the games to use
+    teams (list):
+        Codes of the teams to rate
+    score_settings (SportPredictifier.ObjectCollection):
+        Collection of score settings for the competition
+
+    Returns
+    -------
+    attack (numpy.ndarray):
+        Points each team scores above what an average team would against the same opponents
+    defense (numpy.ndarray):
+        Points each team concedes above what an average team would against the same opponents
+    '''
+    from scipy import sparse
+    from scipy.sparse.linalg import lsqr
+
+    points = score_table[[score_type + '_F' for score_type in score_settings]].values.astype(float) @ score_settings.extract_attribute('points').values.astype(float)
+    team_index = pd.Categorical(score_table['TEAM'].astype(object), categories = teams).codes
+    opponent_index = pd.Categorical(score_table['OPP'], categories = teams).codes
+    played = ~np.isnan(points) & (team_index >= 0) & (opponent_index >= 0)
+    (points, team_index, opponent_index) = (points[played], team_index[played], opponent_index[played])
+
+    # The columns are the mean, each team's attack rating, then each team's defense rating. The last two rows make each set of ratings sum to 0
+    n_games = len(points)
+    n_teams = len(teams)
+    rows = np.concatenate([np.tile(np.arange(n_games), 3), np.full(n_teams, n_games), np.full(n_teams, n_games + 1)])
+    columns = np.concatenate([np.zeros(n_games, int), 1 + team_index, 1 + n_teams + opponent_index,
+                              1 + np.arange(n_teams), 1 + n_teams + np.arange(n_teams)])
+    design = sparse.csr_matrix((np.ones(len(rows)), (rows, columns)), shape = (n_games + 2, 1 + 2*n_teams))
+
+    solution = lsqr(design, np.concatenate([points, [0, 0]]), atol = 1e-12, btol = 1e-12, iter_lim = 10*(1 + 2*n_teams))[0]
+    return solution[1:1 + n_teams], solution[1 + n_teams:]
+
+def rank(score_tables, ranking_filepath, score_settings, round_name, round_number):
+    '''
+    Ranks the teams by their opponent-adjusted ratings from the games played before a round and writes the rankings to a CSV file. The
+    `Quantile` column is how good the team is compared to the rest of the competition, which is used when calculating the hype of games.
+
+    Parameters
+    ----------
+    score_tables (SportPredictifier.ObjectCollection or str):
+        Collection of score tables that have already been loaded, or the path of the score tables or score store to read them from
+    ranking_filepath (str):
+        CSV file to write the rankings to
+    score_settings (SportPredictifier.ObjectCollection):
+        Collection of score settings for the competition
+    round_name (str):
+        The name of a round as defined in settings.yaml
+    round_number (int):
+        Only games before this round are used
+
+    Returns
+    -------
+    results (pandas.DataFrame):
+        Attack, defense, and overall ratings of each team along with the standardised overall rating and its quantile
+    '''
+    from scipy.stats import norm
+
+    if isinstance(score_tables, str):
+        score_tables = __read_score_tables(score_tables)
+
+    teams = list(score_tables.keys())
+    score_table = long_score_table(score_tables)
+    score_table = score_table[score_table[round_name.upper()] < round_number]
+    (attack, defense) = ratings(score_table, teams, score_settings)
+
+    results = pd.DataFrame({'Attack': attack, 'Defense': defense, 'Overall': attack - defense}, index = teams)
     results['Standardised'] = (results['Overall'] - results['Overall'].mean())/results['Overall'].std()
-    
     results['Quantile'] = norm.cdf(results['Standardised'].astype(float))
-    
+
     results.sort_values('Overall', ascending = False).to_csv(ranking_filepath)
-    return results
\ No newline at end of file
+    return results
@@ -1,11 +1,10 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 import os
-import xlsxwriter
+import sys
 from .util import get_plot_shape, get_font_size
 
-def generate_report(fp, teams, results):
+def generate_report(fp, teams, results, seed = None):
     '''
     Generates the report XLSX file that has the chances of each team winning, the hype, and the characteristics of the distribution of scores from the simulations.
 
@@ -17,7 +16,11 @@ def generate_report(fp, teams, results):
         Collection of teams in the competition
     results (dict):
         Dictionary of simulation results
+    seed (int, optional):
+        Seed the simulations were run with, which is written to the report so that the run can be reproduced
     '''
+    import xlsxwriter
+
     print("Generating report")
     book = xlsxwriter.Workbook(fp, {'nan_inf_to_errors': True})
 
@@ -27,6 +30,8 @@ def generate_report(fp, teams, results):
     percent_format = book.add_format({'num_format': '#0%', 'align': 'right'})
     merged_format = book.add_format({'num_format': '#0.00', 'align': 'center'})
     merged_format2 = book.add_format({'num_format': '0.000', 'align': 'center'})
+    count_format = book.add_format({'num_format': '#,##0', 'align': 'center'})
+    error_format = book.add_format({'num_format': '0.0000', 'align': 'center'})
     team_formats = {}
     for team in teams:
         team_formats[team] = book.add_format({'align': 'center', 'bold': True, 'border': True,
@@ -43,6 +48,12 @@ def generate_report(fp, teams, results):
     sheet.write_string(6, 0, 'Expected Score', index_format)
     for i in range(1, 20):
         sheet.write_string(6+i, 0, str(5*i) + 'th Percentile Score', index_format)
+    sheet.write_string(26, 0, 'Simulations', index_format)
+    sheet.write_string(27, 0, 'Standard Error', index_format)
+    sheet.write_string(28, 0, 'Effective Sample Size', index_format)
+    if seed is not None:
+        sheet.write_string(29, 0, 'Seed', index_format)
+        sheet.write_string(29, 1, str(seed))
     sheet.freeze_panes(0, 1)
 
     sheet.set_column(0, 0, 20)
@@ -75,6 +86,11 @@ def generate_report(fp, teams, results):
             sheet.write_number(6+j, team1col, team1_dist[str(5*j)+'%'], score_format)
             sheet.write_number(6+j, team2col, team2_dist[str(5*j)+'%'], score_format)
 
+        # Results without an effective sample size (such as from the exact engine) leave the cell blank
+        for (row, key, row_format) in [(26, 'n_simulations', count_format), (27, 'standard_error', error_format), (28, 'effective_sample_size', count_format)]:
+            value = results[result].get(key)
+            sheet.merge_range(row, team1col, row, team2col, None if value is None or np.isnan(value) else value, row_format)
+
         sheet.set_column(team1col, team2col, 7.5)
         sheet.set_column(team2col+1, team2col+1, 1)
 
@@ -82,6 +98,22 @@ def generate_report(fp, teams, results):
 
     book.close()
 
+def __pyplot():
+    '''
+    Imports `matplotlib.pyplot` the first time a plot is made. The non-interactive Agg backend is used unless pyplot has already been
+    imported (e.g. in a notebook), since the plots are only saved to files.
+
+    Returns
+    -------
+    plt (module):
+        The `matplotlib.pyplot` module
+    '''
+    if 'matplotlib.pyplot' not in sys.modules:
+        import matplotlib
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
 def __plot_pie_chart_group(fp, teams, group_results, round_name, round_number):
     '''
     Plots pie charts for a group to be in the image
@@ -104,6 +136,7 @@ def __plot_pie_chart_group(fp, teams, group_results, round_name, round_number):
     
     font_size = get_font_size(n_games_in_group)
 
+    plt = __pyplot()
     plt.figure(figsize = (15, 15), dpi = 96)
     plt.axis("off")
     counter = 0
@@ -226,14 +259,3 @@ def generate_pie_charts(fp, teams, results, round_name, round_number):
                 round_name,
                 round_number
                 )
-            
-def store_simulation_results(dir, results):
-    assert "scores" in results[list(results.keys())[0]], "Scores must be present in results to store them"
-
-    # Check if path to keep results in exists, and if not make it
-    if not os.path.isdir(dir):
-        os.mkdir(dir)
-
-    for matchup in results:
-        print("Writing scores for " + matchup)
-        results[matchup]["scores"].to_csv(os.path.join(dir, matchup + '_simresults.csv'))
\ No newline at end of file
@@ -0,0 +1,188 @@
+import json
+import os
+import re
+import numpy as np
+import pandas as pd
+
+from .objects import ObjectCollection
+
+store_version = 1
+meta_filename = 'score_store.json'
+
+def is_score_store(path):
+    '''
+    Checks whether a path is a score store written by `write_score_store()` rather than a directory of score table CSV files
+
+    Parameters
+    ----------
+    path (str):
+        Path to check
+
+    Returns
+    -------
+    is_store (bool):
+        `True` if the path is a score store
+    '''
+    return os.path.isfile(os.path.join(path, meta_filename))
+
+def __column_path(directory, column):
+    '''
+    Path of the file that a column of the score store is kept in
+    '''
+    return os.path.join(directory, column + '.npy')
+
+def write_score_store(directory, score_tables, round_column = 'ROUND'):
+    '''
+    Writes the score tables of every team to a columnar score store. Each column is kept in its own `.npy` file with one row for each game
+    played by each team, sorted by round so that a range of rounds can be read without reading the rest of the season. Team, opponent,
+    venue, and any other text columns are stored as integer codes into lists of categories.
+
+    Parameters
+    ----------
+    directory (str):
+        Directory to write the score store to. It is created if it doesn't exist and any existing store in it is replaced
+    score_tables (SportPredictifier.ObjectCollection):
+        Collection of score tables for every team in the competition
+    round_column (str):
+        Name of the round column of the score tables (e.g. "ROUND")
+    '''
+    codes = list(score_tables.keys())
+    score_table = pd.concat([score_tables[team] for team in codes], ignore_index = True)
+    score_table.insert(0, 'TEAM', np.repeat(codes, [len(score_tables[team]) for team in codes]))
+    score_table = score_table.iloc[np.argsort(score_table[round_column].values, kind = 'stable')]
+
+    os.makedirs(directory, exist_ok = True)
+    if is_score_store(directory): # Columns that are no longer in the score tables are removed
+        with open(os.path.join(directory, meta_filename)) as f:
+            for column in json.load(f)['columns']:
+                if os.path.isfile(__column_path(directory, column)):
+                    os.remove(__column_path(directory, column))
+
+    categories = {}
+    for column in score_table.columns:
+        values = score_table[column]
+        if column == 'TEAM':
+            categories[column] = codes
+            values = pd.Categorical(values, categories = codes).codes
+        elif not pd.api.types.is_numeric_dtype(values):
+            categories[column] = list(pd.unique(values.dropna()))
+            values = pd.Categorical(values, categories = categories[column]).codes
+        else:
+            values = values.values
+        np.save(__column_path(directory, column), values)
+
+    meta = {'version': store_version, 'round_column': round_column, 'n_rows': len(score_table), 'columns': list(score_table.columns),
+            'categories': categories}
+    with open(os.path.join(directory, meta_filename), 'w') as f:
+        json.dump(meta, f, indent = 1)
+
+def __round_range(query, round_column):
+    '''
+    Finds the range of rounds that a query is limited to if it only compares the round to numbers (e.g. "ROUND < 5" or
+    "ROUND >= 3 & ROUND < 8"). `None` is returned for either end of the range that isn't limited or if the query is more complicated.
+    '''
+    comparisons = re.split(r'\s*(?:&|\band\b)\s*', query.strip())
+    (start, stop) = (None, None)
+    for comparison in comparisons:
+        match = re.fullmatch(r'\(?\s*{}\s*(<|<=|>|>=|==)\s*(-?\d+)\s*\)?'.format(re.escape(round_column)), comparison)
+        if match is None:
+            return (None, None)
+        (operator, value) = (match.group(1), int(match.group(2)))
+        if operator in ['>', '>=', '==']:
+            value_start = value + 1 if operator == '>' else value
+            start = value_start if start is None else max(start, value_start)
+        if operator in ['<', '<=', '==']:
+            value_stop = value + 1 if operator in ['<=', '=='] else value
+            stop = value_stop if stop is None else min(stop, value_stop)
+    return (start, stop)
+
+def read_score_store(directory, query = None):
+    '''
+    Reads the score tables of every team from a score store. If the query only limits the range of rounds, only the rows in that range are
+    read from disk, otherwise the query is applied after reading each score table in the same way as `pandas.DataFrame.query()`.
+
+    Parameters
+    ----------
+    directory (str):
+        Directory of the score store
+    query (str, optional):
+        Query used to filter each score table
+
+    Returns
+    -------
+    score_tables (SportPredictifier.ObjectCollection):
+        Collection of score tables stored as `pandas.DataFrame` objects, with the same columns as the per-team CSV files
+    '''
+    with open(os.path.join(directory, meta_filename)) as f:
+        meta = json.load(f)
+    assert meta['version'] == store_version, "Score store version {} isn't supported".format(meta['version'])
+
+    # Rows are sorted by round so a range of rounds is a contiguous block of each column
+    (first, last) = (0, meta['n_rows'])
+    if query is not None:
+        (start, stop) = __round_range(query, meta['round_column'])
+        rounds = np.load(__column_path(directory, meta['round_column']), mmap_mode = 'r')
+        if start is not None:
+            first = int(np.searchsorted(rounds, start, 'left'))
+        if stop is not None:
+            last = max(first, int(np.searchsorted(rounds, stop, 'left')))
+
+    columns = {}
+    for column in meta['columns']:
+        values = np.array(np.load(__column_path(directory, column), mmap_mode = 'r')[first:last])
+        if column in meta['categories']:
+            values = np.array(meta['categories'][column] + [np.nan], object)[values] # Missing values have a code of -1
+        columns[column] = values
+    score_table = pd.DataFrame(columns)
+
+    if query is not None:
+        score_table = score_table.query(query)
+
+    score_tables = ObjectCollection()
+    team_rows = score_table.groupby('TEAM', sort = False).indices
+    for team in meta['categories']['TEAM']:
+        score_tables[team] = score_table.iloc[team_rows.get(team, [])].drop(columns = 'TEAM').reset_index(drop = True)
+    return score_tables
+
+def import_score_tables(score_table_path, directory, round_column = 'ROUND'):
+    '''
+    Converts a directory of per-team score table CSV files into a score store
+
+    Parameters
+    ----------
+    score_table_path (str):
+        Directory with score tables
+    directory (str):
+        Directory to write the score store to
+    round_column (str):
+        Name of the round column of the score tables (e.g. "ROUND")
+    '''
+    score_tables = ObjectCollection()
+    for score_table_file in sorted(os.listdir(score_table_path)):
+        if score_table_file.endswith('.csv'):
+            score_tables[score_table_file[:-4]] = pd.read_csv(os.path.join(score_table_path, score_table_file))
+    print("Importing {0} score tables into {1}".format(len(score_tables), directory))
+    write_score_store(directory, score_tables, round_column)
+
+def export_score_tables(directory, score_table_path):
+    '''
+    Converts a score store back into a directory of per-team score table CSV files
+
+    Parameters
+    ----------
+    directory (str):
+        Directory of the score store
+    score_table_path (str):
+        Directory to write the score tables to. It is created if it doesn't exist
+    '''
+    score_tables = read_score_store(directory)
+    print("Exporting {0} score tables to {1}".format(len(score_tables), score_table_path))
+    os.makedirs(score_table_path, exist_ok = True)
+    for team in score_tables:
+        score_table = score_tables[team]
+        # Columns of whole numbers are stored as floats if any team has a missing value, so they're written as integers again
+        for column in score_table.columns:
+            values = score_table[column]
+            if pd.api.types.is_float_dtype(values) and np.all(np.mod(values.dropna(), 1) == 0):
+                score_table[column] = values.astype('Int64')
+        score_table.to_csv(os.path.join(score_table_path, team + '.csv'), index = False)
@@ -0,0 +1,105 @@
+import hashlib
+from numpy.random import SeedSequence, Generator, PCG64
+
+def get_seed(settings):
+    '''
+    Obtains the seed for a run from the settings. If there isn't one, a new seed is drawn from the operating system and put in the
+    settings so that every game in the run uses it and it can be written to the report to reproduce the run.
+
+    Parameters
+    ----------
+    settings (dict):
+        Settings for the competition. `seed` is read if present and set if not
+
+    Returns
+    -------
+    seed (int):
+        Seed for the run
+    '''
+    if settings.get('seed') is None:
+        settings['seed'] = int(SeedSequence().entropy % 2**63)
+    return settings['seed']
+
+def game_seed_sequence(seed, round_number, matchup):
+    '''
+    Creates the seed sequence of a game. It depends only on the seed of the run and the game itself, so each game gets the same
+    independent stream of random numbers no matter which other games are simulated, in what order, or on how many workers.
+
+    Parameters
+    ----------
+    seed (int):
+        Seed for the run. If `None`, fresh entropy is used
+    round_number (int):
+        Round number of the game
+    matchup (str):
+        Key of the game (e.g. "KCvSF")
+
+    Returns
+    -------
+    seed_sequence (numpy.random.SeedSequence):
+        Seed sequence to spawn the game's random number generators from
+    '''
+    matchup_key = int.from_bytes(hashlib.sha256(matchup.encode()).digest()[:8], 'little')
+    return SeedSequence(seed, spawn_key = (int(round_number), matchup_key))
+
+def round_seed_sequence(seed, matchups):
+    '''
+    Creates a single seed sequence for a batch of games that are simulated together from one stream, so that every score type can be
+    drawn for all of the games at once. The results are reproducible for the same seed and games, but unlike with `game_seed_sequence()`,
+    each game's results depend on which other games are in the batch.
+
+    Parameters
+    ----------
+    seed (int):
+        Seed for the run. If `None`, fresh entropy is used
+    matchups (list):
+        Keys of the games in the batch (e.g. "KCvSF")
+
+    Returns
+    -------
+    seed_sequence (numpy.random.SeedSequence):
+        Seed sequence to spawn the batch's random number generators from
+    '''
+    batch_key = int.from_bytes(hashlib.sha256('round:{}'.format('|'.join(matchups)).encode()).digest()[:8], 'little')
+    return SeedSequence(seed, spawn_key = (batch_key,))
+
+def chunk_generator(seed_sequence, chunk):
+    '''
+    Creates the random number generator for one block of simulations of a game
+
+    Parameters
+    ----------
+    seed_sequence (numpy.random.SeedSequence):
+        Seed sequence of the game from `game_seed_sequence()`. If `None`, fresh entropy is used
+    chunk (int):
+        Index of the block of simulations
+
+    Returns
+    -------
+    rng (numpy.random.Generator):
+        Random number generator using the PCG64 bit generator
+    '''
+    if seed_sequence is None:
+        return Generator(PCG64())
+    return Generator(PCG64(SeedSequence(seed_sequence.entropy, spawn_key = seed_sequence.spawn_key + (chunk,))))
+
+def team_seed_sequence(seed_sequence, team):
+    '''
+    Creates the seed sequence of a team from the seed sequence of one of its games. It depends only on the seed of the run and the team,
+    so every game involving the team in the run (whatever round or slot of a matrix it is in) gets the same sequence, which is what
+    common random numbers are drawn from.
+
+    Parameters
+    ----------
+    seed_sequence (numpy.random.SeedSequence):
+        Seed sequence of a game from `game_seed_sequence()` (or of a round from `round_seed_sequence()`)
+    team (str):
+        Code of the team
+
+    Returns
+    -------
+    seed_sequence (numpy.random.SeedSequence):
+        Seed sequence of the team
+    '''
+    team_key = int.from_bytes(hashlib.sha256('team:{}'.format(team).encode()).digest()[:8], 'little')
+    return SeedSequence(seed_sequence.entropy, spawn_key = (team_key,))
@@ -1,9 +1,14 @@
 import pandas as pd
 import numpy as np
-from numpy.random import poisson, binomial, negative_binomial
-from pandas._libs.tslibs import timestamps
 
-def __sim_poisson(mean, n_sim):
+from .exact import solve_game, describe_pmf, tail_probability
+from .seeding import chunk_generator, team_seed_sequence
+from .store import SimulationWriter, simulation_columns
+
+variance_reduction_modes = ['antithetic', 'quasi', 'common']
+n_quasi_replicates = 8
+
+def __sim_poisson(mean, n_sim, rng):
     '''
     Simulates from a Poisson distribution when the mean is equal to the variance
 
@@ -13,15 +18,17 @@ def __sim_poisson(mean, n_sim):
         Mean of the Poisson distribution to sample from
     n_sim (int):
         Number of simulations to run
+    rng (numpy.random.Generator):
+        Random number generator to draw from
 
     Returns
     -------
     simulation_results (array of floats):
         An array of length-`n_sim` with results of each simulation
     '''
-    return poisson(mean, n_sim)
+    return rng.poisson(mean, n_sim)
 
-def __sim_negative_binomial(mean, var, n_sim):
+def __sim_negative_binomial(mean, var, n_sim, rng):
     '''
     Simulates from a negative binomial distribution when the mean is less than the variance
 
@@ -33,6 +40,8 @@ def __sim_negative_binomial(mean, var, n_sim):
         Variance of the negative binomial distribution to sample from
     n_sim (int):
         Number of simulations to run
+    rng (numpy.random.Generator):
+        Random number generator to draw from
 
     Returns
     -------
@@ -42,13 +51,13 @@ def __sim_negative_binomial(mean, var, n_sim):
     p = mean / var
     n = mean * p / (1-p)
     try:
-        return negative_binomial(n, p, n_sim)
+        return rng.negative_binomial(n, p, n_sim)
     except ValueError:
         print(mean, var)
         print(n, p)
         raise Exception
 
-def __sim_binomial(mean, var, n_sim):
+def __sim_binomial(mean, var, n_sim, rng):
     '''
     Simulates from a binomial distribution when the mean is greater than the variance
 
@@ -60,6 +69,8 @@ def __sim_binomial(mean, var, n_sim):
         Variance of the binomial distribution to sample from
     n_sim (int):
         Number of simulations to run
+    rng (numpy.random.Generator):
+        Random number generator to draw from
 
     Returns
     -------
@@ -70,13 +81,13 @@ def __sim_binomial(mean, var, n_sim):
     n = (mean / p)
     floor_n = int(n)
     high_prob = n - floor_n
-    ns = floor_n + binomial(1, high_prob, n_sim)
+    ns = floor_n + rng.binomial(1, high_prob, n_sim)
     try:
-        return binomial(ns, p)
+        return rng.binomial(ns, p)
     except ValueError:
         print(mean, var, p)
 
-def __sim(mean, var, n_sim, min_expected_mean):
+def __sim(mean, var, n_sim, min_expected_mean, rng):
     '''
     Runs the simulation. The Poisson, binomial, or negative binomial distributions will be used depending on the values of the mean and the variance.
 
@@ -88,6 +99,8 @@ def __sim(mean, var, n_sim, min_expected_mean):
         Variance of the distribution to be sampled from
     n_sim (int):
         Number of simulations to run
+    rng (numpy.random.Generator):
+        Random number generator to draw from
 
     Returns
     -------
@@ -101,11 +114,11 @@ def __sim(mean, var, n_sim, min_expected_mean):
     #     var = mean
 
     # if mean > var:
-    #     return __sim_binomial(mean, var, n_sim)
+    #     return __sim_binomial(mean, var, n_sim, rng)
     # elif mean < var:
-    #     return __sim_negative_binomial(mean, var, n_sim)
+    #     return __sim_negative_binomial(mean, var, n_sim, rng)
     # else:
-    return __sim_poisson(np.maximum(mean, min_expected_mean), n_sim)
+    return __sim_poisson(np.maximum(mean, min_expected_mean), n_sim, rng)
 
 def __initialize_score_matrix(n_simulations, teams, score_settings):
     '''
@@ -149,37 +162,6 @@ def __calculate_score(scores, score_array):
     '''
     return scores.values.dot(score_array.values)
 
-def __eval_results(scores, knockout = False):
-    '''
-    Evaluates the results of the games based on the simulated scores, returning the number of wins for each teams (as well as draws if applicable)
-
-    Parameters
-    ----------
-    scores (pandas.DataFrame):
-        Data frame containing the scores for each team in every simulation (the teams are the columns)
-    knockout (bool):
-        Flag indicating if there has to be a winner for the game. If `True`, each team will be given a half win in the case of a draw
-
-    Returns
-    -------
-    team_1_wins (numpy.array):
-        Array with the games that were won by team 1
-    team_2_wins (numpy.array):
-        Array with the games that were won by team 2
-    draws (numpyarray):
-        Array with the games that ended in a draw
-    '''
-    team1 = scores.columns[0]
-    team2 = scores.columns[1]
-    team1_wins = (scores[team1] > scores[team2]).astype(float)
-    team2_wins = (scores[team1] < scores[team2]).astype(float)
-    draws = (scores[team1] == scores[team2]).astype(float)
-    if knockout:
-        team1_wins += (0.5*draws)
-        team2_wins += (0.5*draws)
-        draws = np.zeros_like(team1_wins)
-    return team1_wins, team2_wins, draws
-
 #def eval_try_bonus(team_1_tries, team_2_tries, req_diff):
 #    team_1_bp = (team_1_tries - team_2_tries >= req_diff).astype(int)
 #    team_2_bp = (team_2_tries - team_1_tries >= req_diff).astype(int)
@@ -191,9 +173,9 @@ def __eval_results(scores, knockout = False):
 #    team_2_bp = ((diff > 0)*(diff <= req_diff)).astype(int)
 #    return team_1_bp, team_2_bp
 
-def simulate_game(n_simulations, expected_scores, score_settings, venue, knockout, return_scores, min_expected_mean):
+def __simulate_scores(n_simulations, expected_scores, score_settings, min_expected_mean, rng, uniforms = None):
     '''
-    Simulates a game based on the input `expected_scores` among other settings
+    Simulates the number of scores of each type and the final score of each team for a number of simulations of a game
 
     Parameters
     ----------
@@ -203,39 +185,49 @@ def simulate_game(n_simulations, expected_scores, score_settings, venue, knockou
         Dictionary with the expected number of scores of each type for each team
     score_settings (SportPredictifier.ObjectCollection):
         Collection of score settings for the competition
-    venue (SportPredictifier.stadium):
-        Venue of game being simulated
-    knockout (bool):
-        Flag indicating if there has to be a winner for the game. If `True`, each team will be given a half win in the case of a draw
-    return_scores (bool):
-        Flag indicating if all of the scores from the simulations should be returned
+    min_expected_mean (float):
+        Minimum expected number of scores for non-probabilistic score types
+    rng (numpy.random.Generator):
+        Random number generator to draw from
+    uniforms (numpy.ndarray, optional):
+        Array of shape (teams, score types, simulations) from `__draw_uniforms()`. If given, the numbers of scores are found by inverting
+        their distributions at these instead of being drawn from `rng`
 
     Returns
     -------
-    results (dict):
-        Dictionary containing the chances of each team winning along with the distribution of final scores
+    score_matrix (pandas.DataFrame):
+        Data frame with the number of scores of each type for each team in every simulation
+    scores (pandas.DataFrame):
+        Data frame containing the final score for each team in every simulation (the teams are the columns)
     '''
-    scores = pd.DataFrame(np.empty((n_simulations, 2),
-                                   dtype = np.uint8),
-                          columns = expected_scores.keys())
     score_matrix = __initialize_score_matrix(n_simulations,
                                                 expected_scores.keys(),
                                                 score_settings)
-    for score_type in score_settings:
+    for (k, score_type) in enumerate(score_settings):
         if score_settings[score_type].prob:
-            for team in expected_scores:
+            for (t, team) in enumerate(expected_scores):
                 teams = list(expected_scores.keys())
                 teams.remove(team)
                 opp = teams[0]
-                condition = score_settings[score_type].condition.replace('{F}', team).replace('{A}', opp)
-                score_matrix['{0}_{1}'.format(score_type, team)] = np.random.binomial(score_matrix.eval(condition),
-                                                                                      expected_scores[team][score_type])
+                # A condition that comes out negative means there are no attempts
+                condition = np.maximum(score_settings[score_type].condition.evaluate_columns(score_matrix, team, opp), 0)
+                if uniforms is None:
+                    score_matrix['{0}_{1}'.format(score_type, team)] = rng.binomial(condition,
+                                                                                    expected_scores[team][score_type])
+                else:
+                    score_matrix['{0}_{1}'.format(score_type, team)] = __inverse_binomial(uniforms[t, k], condition.values,
+                                                                                          expected_scores[team][score_type])
         else:
-            for team in expected_scores:
-                score_matrix['{0}_{1}'.format(score_type, team)] = __sim(expected_scores[team][score_type][0],
-                                                                        expected_scores[team][score_type][1],
-                                                                        n_simulations,
-                                                                        min_expected_mean)
+            for (t, team) in enumerate(expected_scores):
+                if uniforms is None:
+                    score_matrix['{0}_{1}'.format(score_type, team)] = __sim(expected_scores[team][score_type][0],
+                                                                            expected_scores[team][score_type][1],
+                                                                            n_simulations,
+                                                                            min_expected_mean,
+                                                                            rng)
+                else:
+                    score_matrix['{0}_{1}'.format(score_type, team)] = __inverse_poisson(uniforms[t, k],
+                                                                                         np.maximum(expected_scores[team][score_type][0], min_expected_mean))
 
     scores = pd.DataFrame(np.empty((n_simulations, 2)), columns = expected_scores.keys())
     for team in expected_scores:
@@ -247,24 +239,755 @@ def simulate_game(n_simulations, expected_scores, score_settings, venue, knockou
         scores[team] = __calculate_score(score_matrix[team_columns],
                                          score_settings.extract_attribute('points'))
 
-    (team1_wins, team2_wins, draws) = __eval_results(scores)
+    return score_matrix, scores
 
+def __accumulate_outcomes(outcomes, histograms, team1_scores, team2_scores):
+    '''
+    Folds a block of simulated scores into running totals so that the block itself can be discarded. Both inputs are updated in place.
+
+    Parameters
+    ----------
+    outcomes (numpy.ndarray):
+        Length-3 array with the number of wins for team 1, wins for team 2, and draws so far
+    histograms (list):
+        List with an integer histogram of the final scores so far for each team
+    team1_scores (numpy.ndarray):
+        Final scores of team 1 in the block
+    team2_scores (numpy.ndarray):
+        Final scores of team 2 in the block
+    '''
+    outcomes[0] += np.count_nonzero(team1_scores > team2_scores)
+    outcomes[1] += np.count_nonzero(team1_scores < team2_scores)
+    outcomes[2] += np.count_nonzero(team1_scores == team2_scores)
+
+    for (i, team_scores) in enumerate([team1_scores, team2_scores]):
+        block_histogram = np.bincount(team_scores.astype(np.int64))
+        if len(block_histogram) > len(histograms[i]):
+            block_histogram[:len(histograms[i])] += histograms[i]
+            histograms[i] = block_histogram
+        else:
+            histograms[i][:len(block_histogram)] += block_histogram
+
+def __distribution_index():
+    '''
+    Returns the index of the score distribution summaries, which is the same as the index from `pandas.DataFrame.describe()` with
+    percentiles every 5%
+    '''
+    return ['count', 'mean', 'std', 'min'] + ['{}%'.format(5*i) for i in range(1, 20)] + ['max']
+
+def score_quantiles(histogram, quantiles):
+    '''
+    Calculates quantiles of a team's final score from the histogram stored in `results['score_histograms']`, so that any quantile can be
+    found without keeping the raw scores. Integer histograms of simulated scores are interpolated linearly between the closest ranks, which
+    gives the same values as `pandas.Series.quantile()` on the raw scores. Probability mass functions from the exact engine give the lowest
+    score with at least that probability of not being exceeded.
+
+    Parameters
+    ----------
+    histogram (numpy.ndarray):
+        Number of simulations (or probability) of each score from 0 up to the highest score
+    quantiles (float or array-like):
+        Quantiles to calculate, between 0 and 1
+
+    Returns
+    -------
+    scores (float or numpy.ndarray):
+        Score at each quantile
+    '''
+    quantiles = np.asarray(quantiles, float)
+    cumulative = np.cumsum(histogram)
+
+    if not np.issubdtype(histogram.dtype, np.integer):
+        return np.searchsorted(cumulative, quantiles*cumulative[-1] - tail_probability).astype(float)
+
+    # Linear interpolation between the closest ranks, as done by `pandas.DataFrame.describe()`
+    n = cumulative[-1]
+    positions = quantiles*(n - 1)
+    lower = np.floor(positions)
+    lower_values = np.searchsorted(cumulative, lower, side = 'right')
+    upper_values = np.searchsorted(cumulative, np.minimum(lower + 1, n - 1), side = 'right')
+    return lower_values + (upper_values - lower_values)*(positions - lower)
+
+def __describe_histograms(histograms, teams):
+    '''
+    Summarises the distribution of final scores from integer histograms. The output is the same as calling `pandas.DataFrame.describe()`
+    with percentiles every 5% on the raw scores, but only needs time and memory proportional to the highest score.
+
+    Parameters
+    ----------
+    histograms (list):
+        List with an integer histogram of the final scores for each team
+    teams (list):
+        Codes of the teams, in the same order as `histograms`
+
+    Returns
+    -------
+    score_distributions (pandas.DataFrame):
+        Data frame with the count, mean, standard deviation, minimum, every 5th percentile, and maximum of each team's scores
+    '''
+    percentiles = np.arange(0.05, 1, 0.05)
+    score_distributions = pd.DataFrame(index = __distribution_index(), columns = teams, dtype = float)
+    for (histogram, team) in zip(histograms, teams):
+        values = np.arange(len(histogram))
+        n = histogram.sum()
+        mean = (values*histogram).sum() / n
+
+        score_distributions[team] = np.hstack((
+            n,
+            mean,
+            np.sqrt((histogram*np.square(values - mean)).sum() / (n - 1)),
+            np.flatnonzero(histogram)[0],
+            score_quantiles(histogram, percentiles),
+            np.flatnonzero(histogram)[-1]
+        ))
+    return score_distributions
+
+def __chances(outcomes, knockout):
+    '''
+    Calculates the chances of each team winning from the number of wins and draws
+
+    Parameters
+    ----------
+    outcomes (numpy.ndarray):
+        Length-3 array with the number of wins for team 1, wins for team 2, and draws
+    knockout (bool):
+        Flag indicating if there has to be a winner for the game. If `True`, each team will be given a half win in the case of a draw
+
+    Returns
+    -------
+    team1_chance (float):
+        Chance of team 1 winning
+    team2_chance (float):
+        Chance of team 2 winning
+    '''
+    (team1_wins, team2_wins, draws) = outcomes / outcomes.sum()
     if knockout:
         team1_wins += 0.5*draws
         team2_wins += 0.5*draws
+    return team1_wins, team2_wins
+
+def __win_variances(outcomes, knockout):
+    '''
+    Calculates the variance of a single simulation's contribution to each team's chance of winning, which is used to find the Monte Carlo
+    standard error of the chances
+
+    Parameters
+    ----------
+    outcomes (numpy.ndarray):
+        Length-3 array with the number of wins for team 1, wins for team 2, and draws
+    knockout (bool):
+        Flag indicating if each team is given a half win in the case of a draw
+
+    Returns
+    -------
+    variances (numpy.ndarray):
+        Variance for each team
+    '''
+    (team1_wins, team2_wins, draws) = outcomes / outcomes.sum()
+    draw_value = 0.5 if knockout else 0
+    return np.array([wins + draws*draw_value**2 - (wins + draws*draw_value)**2 for wins in [team1_wins, team2_wins]])
+
+def __accumulate_groups(group_stats, team1_scores, team2_scores, knockout, group_size):
+    '''
+    Folds the mean chance of each team winning within each group of correlated simulations (e.g. antithetic pairs) into running totals.
+    The variance between groups is what gives the standard error when the simulations aren't independent. `group_stats` is updated in place.
+
+    Parameters
+    ----------
+    group_stats (numpy.ndarray):
+        Array of shape (teams, 3) with the number of groups, the sum of the group means, and the sum of their squares for each team
+    team1_scores (numpy.ndarray):
+        Final scores of team 1 in the block
+    team2_scores (numpy.ndarray):
+        Final scores of team 2 in the block
+    knockout (bool):
+        Flag indicating if each team is given a half win in the case of a draw
+    group_size (int):
+        Number of consecutive simulations in each group
+    '''
+    n_groups = len(team1_scores) // group_size
+    team1_scores = team1_scores[:n_groups*group_size].reshape(n_groups, group_size)
+    team2_scores = team2_scores[:n_groups*group_size].reshape(n_groups, group_size)
+    draw_value = 0.5 if knockout else 0
+    for (t, (team_scores, opp_scores)) in enumerate([(team1_scores, team2_scores), (team2_scores, team1_scores)]):
+        group_means = ((team_scores > opp_scores) + draw_value*(team_scores == opp_scores)).mean(axis = 1)
+        group_stats[t] += [n_groups, group_means.sum(), np.square(group_means).sum()]
+
+def __standard_error(outcomes, knockout, group_stats, group_size):
+    '''
+    Calculates the Monte Carlo standard error of the chances of winning and the effective sample size, which is the number of independent
+    simulations that would give the same standard error
+
+    Parameters
+    ----------
+    outcomes (numpy.ndarray):
+        Length-3 array with the number of wins for team 1, wins for team 2, and draws
+    knockout (bool):
+        Flag indicating if each team is given a half win in the case of a draw
+    group_stats (numpy.ndarray):
+        Group totals from `__accumulate_groups()`
+    group_size (int):
+        Number of simulations in each group. If 1, the simulations are independent
+
+    Returns
+    -------
+    standard_error (float):
+        The larger of the two teams' standard errors
+    effective_sample_size (float):
+        The smaller of the two teams' effective sample sizes
+    '''
+    variances = __win_variances(outcomes, knockout)
+    effective_sample_sizes = np.full(2, float(outcomes.sum()))
+
+    if group_size > 1:
+        (n_groups, sums, sums_of_squares) = group_stats.T
+        with np.errstate(divide = 'ignore', invalid = 'ignore'):
+            group_variances = (sums_of_squares - np.square(sums)/n_groups) / (n_groups - 1)
+            estimated = np.where(group_variances > 0, variances*n_groups/group_variances, np.inf)
+        use_groups = (n_groups > 1) & (variances > 0)
+        effective_sample_sizes[use_groups] = estimated[use_groups]
+
+    return np.sqrt(variances / effective_sample_sizes).max(), effective_sample_sizes.min()
+
+def __required_simulations(standard_error, n_done, target_standard_error, max_simulations):
+    '''
+    Estimates how many simulations are needed for the standard error of both teams' chances of winning to be within the target
+
+    Parameters
+    ----------
+    standard_error (float):
+        Standard error from the simulations run so far
+    n_done (int):
+        Number of simulations run so far
+    target_standard_error (float):
+        Target standard error of each team's chance of winning
+    max_simulations (int, optional):
+        Maximum number of simulations to run
+
+    Returns
+    -------
+    n_simulations (int):
+        Total number of simulations to run, which is never less than the number that have already been run
+    '''
+    n_required = max(int(np.ceil(n_done*(standard_error / target_standard_error)**2)), int(n_done))
+    if max_simulations is not None:
+        n_required = min(n_required, max_simulations)
+    return n_required
+
+def __check_adaptive_settings(n_simulations, target_standard_error, max_simulations):
+    '''
+    Checks that the settings for adaptive simulation counts can be met, so that a bad setting fails before any games are simulated rather
+    than partway through a run
+
+    Parameters
+    ----------
+    n_simulations (int):
+        Number of simulations to run before the standard error is first checked
+    target_standard_error (float, optional):
+        Target standard error of each team's chance of winning
+    max_simulations (int, optional):
+        Maximum number of simulations to run for each game
+    '''
+    if target_standard_error is None:
+        return
+    if not target_standard_error > 0:
+        raise ValueError('{} is an invalid target standard error. Must be greater than 0'.format(target_standard_error))
+    if max_simulations is not None and max_simulations < n_simulations:
+        raise ValueError('The maximum number of simulations ({0}) must be at least the number run first ({1})'.format(max_simulations, n_simulations))
+
+def __group_size(variance_reduction, chunk_size):
+    '''
+    Finds the number of consecutive simulations that are correlated with each other and have to be treated as a group for the standard
+    error. It's set once for each game from the chunk size, so that every block of the game (including a shorter last block, or the
+    extra blocks run to reach a target standard error) is made of groups of the same size
+
+    Parameters
+    ----------
+    variance_reduction (str):
+        Variance reduction mode (see `__draw_uniforms()`)
+    chunk_size (int):
+        Number of simulations in each full block
+
+    Returns
+    -------
+    group_size (int):
+        Number of simulations in each group, which is 1 if the simulations are independent
+    '''
+    if variance_reduction == 'antithetic':
+        return 2
+    elif variance_reduction == 'quasi':
+        # Each block has at least `n_quasi_replicates` groups, each with a power of two points to keep the balance of the Sobol sequence
+        return 2**int(np.floor(np.log2(max(chunk_size / n_quasi_replicates, 1))))
+    return 1
+
+def __draw_uniforms(n_simulations, n_types, variance_reduction, group_size, rng, team_rngs):
+    '''
+    Draws the uniform random numbers that are turned into numbers of scores by inverting their distributions when variance reduction is used
+
+    Parameters
+    ----------
+    n_simulations (int):
+        Number of simulations to run
+    n_types (int):
+        Number of score types
+    variance_reduction (str):
+        "antithetic" to pair every draw u with 1 - u, "quasi" to use scrambled Sobol sequences, or "common" to draw from each team's own
+        stream so that every game involving a team uses the same random numbers for it
+    group_size (int):
+        Number of simulations in each group from `__group_size()`. A block that isn't a multiple of it ends with a partial group
+    rng (numpy.random.Generator):
+        Random number generator of the block of simulations
+    team_rngs (list):
+        Random number generators of each team's block of simulations, which are only used for common random numbers
+
+    Returns
+    -------
+    uniforms (numpy.ndarray):
+        Array of shape (teams, score types, simulations)
+    '''
+    if variance_reduction == 'antithetic':
+        half = rng.random((2, n_types, (n_simulations + 1)//2))
+        uniforms = np.empty((2, n_types, 2*half.shape[-1]))
+        uniforms[:, :, 0::2] = half
+        uniforms[:, :, 1::2] = 1 - half
+        return uniforms[:, :, :n_simulations]
+
+    elif variance_reduction == 'quasi':
+        from scipy.stats import qmc
+        # Each group is a separately scrambled Sobol sequence
+        n_groups = -(-n_simulations // group_size)
+        points = np.vstack([qmc.Sobol(2*n_types, seed = rng).random(group_size) for group in range(n_groups)])[:n_simulations]
+        return points.T.reshape(2, n_types, n_simulations)
+
+    elif variance_reduction == 'common':
+        return np.stack([team_rng.random((n_types, n_simulations)) for team_rng in team_rngs])
+
+    raise ValueError('{0} is an invalid variance reduction mode. Must be one of {1}'.format(variance_reduction, ', '.join(variance_reduction_modes)))
+
+def __inverse_poisson(uniforms, mean):
+    '''
+    Turns uniform random numbers into draws from a Poisson distribution by inverting its cumulative distribution function
+
+    Parameters
+    ----------
+    uniforms (numpy.ndarray):
+        Uniform random numbers between 0 and 1
+    mean (float):
+        Mean of the Poisson distribution
+
+    Returns
+    -------
+    draws (numpy.ndarray):
+        Number of scores for each uniform random number
+    '''
+    from scipy.stats import poisson
+    cdf = poisson.cdf(np.arange(poisson.isf(tail_probability, mean) + 1), mean)
+    return np.minimum(np.searchsorted(cdf, uniforms), len(cdf) - 1)
+
+def __inverse_binomial(uniforms, n, p):
+    '''
+    Turns uniform random numbers into draws from binomial distributions by inverting their cumulative distribution functions
+
+    Parameters
+    ----------
+    uniforms (numpy.ndarray):
+        Uniform random numbers between 0 and 1
+    n (numpy.ndarray):
+        Number of trials for each uniform random number (e.g. the value of the condition)
+    p (float):
+        Probability of success
+
+    Returns
+    -------
+    draws (numpy.ndarray):
+        Number of successes for each uniform random number
+    '''
+    from scipy.stats import binom
+    n = np.asarray(n)
+    draws = np.zeros(uniforms.shape, np.int64)
+    for trials in np.unique(n[n > 0]):
+        cdf = binom.cdf(np.arange(trials + 1), trials, p)
+        in_group = (n == trials)
+        draws[in_group] = np.minimum(np.searchsorted(cdf, uniforms[in_group]), trials)
+    return draws
+
+def __solve_game_exactly(expected_scores, score_settings, venue, knockout, min_expected_mean):
+    '''
+    Calculates the chances of each team winning and the distribution of final scores from the exact joint distribution of scores
+    given by `solve_game()` rather than by simulating. See `simulate_game()` for a description of the parameters and the output.
+    '''
+    teams = list(expected_scores.keys())
+    joint_pmf = solve_game(expected_scores, score_settings, min_expected_mean)
+
+    # Rows are team 1's score and columns are team 2's score
+    outcomes = np.array([np.tril(joint_pmf, -1).sum(), np.triu(joint_pmf, 1).sum(), np.trace(joint_pmf)])
+    (team1_chance, team2_chance) = __chances(outcomes, knockout)
 
     results = {}
     results['venue'] = venue
-    results['chances'] = {scores.columns[0]: team1_wins.mean(),
-                          scores.columns[1]: team2_wins.mean()}
+    results['chances'] = {teams[0]: team1_chance,
+                          teams[1]: team2_chance}
+    results['score_histograms'] = {teams[0]: joint_pmf.sum(axis = 1),
+                                   teams[1]: joint_pmf.sum(axis = 0)}
+    results['standard_error'] = 0.0
+    results['effective_sample_size'] = np.nan # Nothing is sampled
+    results['n_simulations'] = 0
+    results['score_distributions'] = pd.DataFrame({team: describe_pmf(results['score_histograms'][team]) for team in teams},
+                                                  index = __distribution_index())
+    return results
+
+def simulate_game(n_simulations, expected_scores, score_settings, venue, knockout, return_scores, min_expected_mean, chunk_size = None, engine = 'monte_carlo',
+                  target_standard_error = None, max_simulations = None, seed_sequence = None, variance_reduction = None, store_path = None):
+    '''
+    Simulates a game based on the input `expected_scores` among other settings
 
-    percentiles = np.arange(0.05, 1, 0.05)
-    results['score_distributions'] = scores.describe(percentiles)
+    Parameters
+    ----------
+    n_simulations (int):
+        Number of simulations to run. If `target_standard_error` is given, this is the minimum number of simulations
+    expected_scores (dict):
+        Dictionary with the expected number of scores of each type for each team
+    score_settings (SportPredictifier.ObjectCollection):
+        Collection of score settings for the competition
+    venue (SportPredictifier.stadium):
+        Venue of game being simulated
+    knockout (bool):
+        Flag indicating if there has to be a winner for the game. If `True`, each team will be given a half win in the case of a draw
+    return_scores (bool):
+        Flag indicating if all of the scores from the simulations should be returned
+    min_expected_mean (float):
+        Minimum expected number of scores for non-probabilistic score types
+    chunk_size (int, optional):
+        If given, the simulations will be run in blocks of this size that are folded into running win/draw/loss counts and score
+        histograms, so the memory used doesn't depend on `n_simulations` (unless `return_scores` is `True`)
+    engine (str):
+        "monte_carlo" to simulate the game `n_simulations` times or "exact" to calculate the distribution of scores exactly with
+        `solve_game()`. Nothing is sampled with the exact engine, so `n_simulations`, `return_scores`, and `chunk_size` are ignored
+    target_standard_error (float, optional):
+        If given, more simulations will be run in blocks after the first `n_simulations` until the standard error of each team's chance
+        of winning is at most this
+    max_simulations (int, optional):
+        Maximum number of simulations to run if `target_standard_error` is given
+    seed_sequence (numpy.random.SeedSequence, optional):
+        Seed sequence of the game from `seeding.game_seed_sequence()`. Each block of simulations draws from its own generator spawned
+        from it, so the results are reproducible. If `None`, fresh entropy is used
+    variance_reduction (str, optional):
+        "antithetic", "quasi", or "common" to use antithetic draws, scrambled Sobol sequences, or common random numbers for each team
+        across games (see `__draw_uniforms()`). Common random numbers need `seed_sequence` to be given
+    store_path (str, optional):
+        If given, every simulation is written to this `.npy` file by a `store.SimulationWriter` as each block is simulated, without
+        keeping them in memory. They can be read back with `store.load_simulation_results()`
+
+    Returns
+    -------
+    results (dict):
+        Dictionary containing the chances of each team winning along with the distribution of final scores. The histogram of each team's
+        final scores is stored in `score_histograms` so that other quantiles can be found with `score_quantiles()`. The number of
+        simulations run, the standard error of the chances, and the effective sample size are stored in `n_simulations`,
+        `standard_error`, and `effective_sample_size`. The effective sample size is NaN with common random numbers, which don't change
+        the variance of a single game but of the differences between games involving the same team
+    '''
+    if engine == 'exact':
+        return __solve_game_exactly(expected_scores, score_settings, venue, knockout, min_expected_mean)
+    elif engine != 'monte_carlo':
+        raise ValueError('{} is an invalid engine. Must be "monte_carlo" or "exact"'.format(engine))
+    if variance_reduction is not None and variance_reduction not in variance_reduction_modes:
+        raise ValueError('{0} is an invalid variance reduction mode. Must be one of {1}'.format(variance_reduction, ', '.join(variance_reduction_modes)))
+    if variance_reduction == 'common' and seed_sequence is None:
+        raise ValueError('Common random numbers need a seed so that every game uses the same stream for each team')
+    __check_adaptive_settings(n_simulations, target_standard_error, max_simulations)
+
+    # Without chunking, all of the simulations are run in a single block
+    if chunk_size is None or chunk_size > n_simulations:
+        chunk_size = n_simulations
+
+    teams = list(expected_scores.keys())
+    outcomes = np.zeros(3, np.int64)
+    histograms = [np.zeros(0, np.int64), np.zeros(0, np.int64)]
+    group_stats = np.zeros((2, 3))
+    group_size = __group_size(variance_reduction, chunk_size)
+    score_matrices = []
+    n_done = 0
+    chunk = 0
+    writer = None if store_path is None else SimulationWriter(store_path, simulation_columns(teams, score_settings))
+
+    while n_done < n_simulations:
+        block_size = min(chunk_size, n_simulations - n_done)
+        rng = chunk_generator(seed_sequence, chunk)
+        uniforms = None
+        if variance_reduction is not None:
+            team_rngs = [chunk_generator(team_seed_sequence(seed_sequence, team), chunk) for team in teams] if variance_reduction == 'common' else None
+            uniforms = __draw_uniforms(block_size, len(score_settings), variance_reduction, group_size, rng, team_rngs)
+
+        (score_matrix, scores) = __simulate_scores(block_size, expected_scores, score_settings, min_expected_mean, rng, uniforms)
+        __accumulate_outcomes(outcomes, histograms, scores[teams[0]].values, scores[teams[1]].values)
+        if group_size > 1:
+            __accumulate_groups(group_stats, scores[teams[0]].values, scores[teams[1]].values, knockout, group_size)
+
+        if return_scores: # Storing every simulation means memory will scale with `n_simulations` again
+            for team in teams:
+                score_matrix['SCORE_' + team] = scores[team]
+            score_matrix.index += n_done
+            score_matrices.append(score_matrix)
+        if writer is not None:
+            writer.write([score_matrix[column].values for column in score_matrix.columns[:2*len(score_settings)]] +
+                         [scores[team].values for team in teams])
+
+        n_done += len(scores)
+        chunk += 1
+        if n_done == n_simulations and target_standard_error is not None:
+            (standard_error, effective_sample_size) = __standard_error(outcomes, knockout, group_stats, group_size)
+            n_simulations = __required_simulations(standard_error, n_done, target_standard_error, max_simulations)
+
+    if writer is not None:
+        writer.close()
+
+    (team1_chance, team2_chance) = __chances(outcomes, knockout)
+
+    results = {}
+    results['venue'] = venue
+    results['chances'] = {teams[0]: team1_chance,
+                          teams[1]: team2_chance}
+    results['score_distributions'] = __describe_histograms(histograms, teams)
+    results['score_histograms'] = dict(zip(teams, histograms))
+    (results['standard_error'], results['effective_sample_size']) = __standard_error(outcomes, knockout, group_stats, group_size)
+    if variance_reduction == 'common': # The gain is in comparisons between games, which a single game can't measure
+        results['effective_sample_size'] = np.nan
+    results['n_simulations'] = n_done
 
     if return_scores:
-        for team in scores:
-            score_matrix['SCORE_' + team] = scores[team]
-        score_matrix.index.name = 'SIMULATION'
-        results['scores'] = score_matrix
+        results['scores'] = score_matrices[0] if len(score_matrices) == 1 else pd.concat(score_matrices)
+        results['scores'].index.name = 'SIMULATION'
+
+    return results
+
+def __stack_expected_scores(expected_scores, score_settings, min_expected_mean):
+    '''
+    Stacks the expected scores of several games into a single array so that they can be simulated together
+
+    Parameters
+    ----------
+    expected_scores (list):
+        List of dictionaries with the expected number of scores of each type for each team (one per game)
+    score_settings (SportPredictifier.ObjectCollection):
+        Collection of score settings for the competition
+    min_expected_mean (float):
+        Minimum expected number of scores for non-probabilistic score types
+
+    Returns
+    -------
+    values (numpy.ndarray):
+        Array of shape (games, teams, score types) containing the probability of probabilistic score types and the expected number of
+        scores of every other score type
+    '''
+    values = np.empty((len(expected_scores), 2, len(score_settings)))
+    for (g, game_expected_scores) in enumerate(expected_scores):
+        for (t, team) in enumerate(game_expected_scores):
+            for (k, score_type) in enumerate(score_settings):
+                if score_settings[score_type].prob:
+                    values[g, t, k] = game_expected_scores[team][score_type]
+                else:
+                    values[g, t, k] = np.maximum(game_expected_scores[team][score_type][0], min_expected_mean)
+    return values
+
+def __simulate_round_scores(values, score_settings, n_simulations, rngs, uniforms = None):
+    '''
+    Simulates the number of scores of each type and the final scores for every team in every game of a round
+
+    Parameters
+    ----------
+    values (numpy.ndarray):
+        Array of shape (games, teams, score types) from `__stack_expected_scores()`
+    score_settings (SportPredictifier.ObjectCollection):
+        Collection of score settings for the competition
+    n_simulations (int):
+        Number of simulations to run for each game
+    rngs (list or numpy.random.Generator):
+        Random number generator of each game, so that each game draws the same numbers as it would with `simulate_game()`, or a single
+        generator for the whole round, in which case each score type is drawn for every game with one vectorised call
+    uniforms (numpy.ndarray, optional):
+        Array of shape (games, teams, score types, simulations) with the uniform random numbers from `__draw_uniforms()` for each game.
+        If given, the numbers of scores are found by inverting their distributions at these instead of being drawn from `rngs`
+
+    Returns
+    -------
+    counts (numpy.ndarray):
+        Array of shape (score types, games, teams, simulations) with the number of scores of each type
+    scores (numpy.ndarray):
+        Array of shape (games, teams, simulations) with the final scores
+    '''
+    (n_games, n_teams, n_types) = values.shape
+    counts = np.empty((n_types, n_games, n_teams, n_simulations), np.ushort)
+    scores = np.zeros((n_games, n_teams, n_simulations), np.int32)
+    index = {score_type: k for (k, score_type) in enumerate(score_settings)}
+    for (k, score_type) in enumerate(score_settings):
+        if score_settings[score_type].prob:
+            # The opposition is the other team in the same game
+            condition = np.maximum(score_settings[score_type].condition.evaluate_indexed(counts, counts[:, :, ::-1], index), 0)
+            if uniforms is None and not isinstance(rngs, list):
+                counts[k] = rngs.binomial(condition, values[:, :, k, np.newaxis])
+            else:
+                for g in range(n_games):
+                    if uniforms is None:
+                        counts[k, g] = rngs[g].binomial(condition[g], values[g, :, k, np.newaxis])
+                    else:
+                        for t in range(n_teams):
+                            counts[k, g, t] = __inverse_binomial(uniforms[g, t, k], condition[g, t], values[g, t, k])
+        else:
+            if uniforms is None and not isinstance(rngs, list):
+                counts[k] = rngs.poisson(values[:, :, k, np.newaxis], (n_games, n_teams, n_simulations))
+            else:
+                for g in range(n_games):
+                    if uniforms is None:
+                        counts[k, g] = rngs[g].poisson(values[g, :, k, np.newaxis], (n_teams, n_simulations))
+                    else:
+                        for t in range(n_teams):
+                            counts[k, g, t] = __inverse_poisson(uniforms[g, t, k], values[g, t, k])
+        scores += score_settings[score_type].points*counts[k]
+    return counts, scores
+
+def simulate_round(n_simulations, expected_scores, score_settings, venues, knockouts, return_scores, min_expected_mean, chunk_size = None,
+                   target_standard_error = None, max_simulations = None, seed_sequences = None, variance_reduction = None, store_paths = None):
+    '''
+    Simulates every game of a round at once. The expected scores of all games are stacked into arrays of shape (games, teams, score types)
+    so that the conditions are evaluated for every game at once. If a seed sequence is given for each game, each game draws from its own
+    random number generators so that the results are the same as from `simulate_game()`. Otherwise the round draws from a single stream and
+    each score type is drawn for every team in every game with one vectorised call.
 
-    return results
\ No newline at end of file
+    Parameters
+    ----------
+    n_simulations (int):
+        Number of simulations to run for each game. If `target_standard_error` is given, this is the minimum number of simulations
+    expected_scores (list):
+        List of dictionaries with the expected number of scores of each type for each team (one per game)
+    score_settings (SportPredictifier.ObjectCollection):
+        Collection of score settings for the competition
+    venues (list):
+        Venue of each game being simulated
+    knockouts (list):
+        Flags indicating if there has to be a winner for each game
+    return_scores (bool):
+        Flag indicating if all of the scores from the simulations should be returned
+    min_expected_mean (float):
+        Minimum expected number of scores for non-probabilistic score types
+    chunk_size (int, optional):
+        If given, the simulations will be run in blocks of this size that are folded into running accumulators
+    target_standard_error (float, optional):
+        If given, games will keep being simulated in blocks until the standard error of each team's chance of winning is at most this.
+        Games that have converged are left out of later blocks
+    max_simulations (int, optional):
+        Maximum number of simulations to run for each game if `target_standard_error` is given
+    seed_sequences (list or numpy.random.SeedSequence, optional):
+        Seed sequence of each game from `seeding.game_seed_sequence()`, or a single seed sequence for the whole round from
+        `seeding.round_seed_sequence()`. If `None`, the round draws from a single stream with fresh entropy
+    variance_reduction (str, optional):
+        "antithetic", "quasi", or "common" to use a variance reduction method (see `simulate_game()`)
+    store_paths (list, optional):
+        Path of the `.npy` file to write every simulation of each game to as it is simulated (see `simulate_game()`). Games with a path
+        of `None` aren't stored
+
+    Returns
+    -------
+    results (list):
+        List of dictionaries containing the chances of each team winning along with the distribution of final scores (one per game),
+        in the same format as returned by `simulate_game()`
+    '''
+    if variance_reduction is not None and variance_reduction not in variance_reduction_modes:
+        raise ValueError('{0} is an invalid variance reduction mode. Must be one of {1}'.format(variance_reduction, ', '.join(variance_reduction_modes)))
+    values = __stack_expected_scores(expected_scores, score_settings, min_expected_mean)
+    n_games = len(expected_scores)
+    if chunk_size is None or chunk_size > n_simulations:
+        chunk_size = n_simulations
+    if seed_sequences is None and variance_reduction == 'common':
+        raise ValueError('Common random numbers need a seed so that every game uses the same stream for each team')
+    __check_adaptive_settings(n_simulations, target_standard_error, max_simulations)
+    # Without a stream for each game, each block of the round gets its own generator
+    per_game_streams = isinstance(seed_sequences, (list, tuple))
+    round_chunk = 0
+
+    outcomes = np.zeros((n_games, 3), np.int64)
+    histograms = [[np.zeros(0, np.int64), np.zeros(0, np.int64)] for g in range(n_games)]
+    score_matrices = [[] for g in range(n_games)]
+    n_done = np.zeros(n_games, np.int64)
+    n_targets = np.full(n_games, n_simulations, np.int64)
+    chunks = np.zeros(n_games, np.int64)
+    group_stats = np.zeros((n_games, 2, 3))
+    group_size = __group_size(variance_reduction, chunk_size)
+    if store_paths is None:
+        store_paths = n_games*[None]
+    writers = [None if path is None else SimulationWriter(path, simulation_columns(list(game.keys()), score_settings))
+               for (game, path) in zip(expected_scores, store_paths)]
+
+    while (n_done < n_targets).any():
+        # Games are simulated in the same blocks as they would be on their own, so games needing different block sizes are drawn separately
+        block_sizes = np.minimum(chunk_size, n_targets - n_done)
+        for block_size in np.unique(block_sizes[n_done < n_targets]):
+            active = np.flatnonzero((n_done < n_targets) & (block_sizes == block_size))
+            if per_game_streams:
+                rngs = [chunk_generator(seed_sequences[g], chunks[g]) for g in active]
+            else:
+                rngs = chunk_generator(seed_sequences, round_chunk)
+                round_chunk += 1
+            uniforms = None
+            if variance_reduction is not None:
+                uniforms = []
+                for (i, g) in enumerate(active):
+                    rng = rngs[i] if per_game_streams else rngs
+                    team_rngs = None
+                    if variance_reduction == 'common':
+                        seed_sequence = seed_sequences[g] if per_game_streams else seed_sequences
+                        team_rngs = [chunk_generator(team_seed_sequence(seed_sequence, team), chunks[g]) for team in expected_scores[g]]
+                    uniforms.append(__draw_uniforms(int(block_size), len(score_settings), variance_reduction, group_size, rng, team_rngs))
+                uniforms = np.stack(uniforms)
+            (counts, scores) = __simulate_round_scores(values[active], score_settings, int(block_size), rngs, uniforms)
+
+            for (i, g) in enumerate(active):
+                __accumulate_outcomes(outcomes[g], histograms[g], scores[i, 0], scores[i, 1])
+                if group_size > 1:
+                    __accumulate_groups(group_stats[g], scores[i, 0], scores[i, 1], knockouts[g], group_size)
+
+                if return_scores:
+                    teams = list(expected_scores[g].keys())
+                    score_matrix = pd.DataFrame(index = pd.RangeIndex(n_done[g], n_done[g] + block_size, name = 'SIMULATION'))
+                    for (t, team) in enumerate(teams):
+                        for (k, score_type) in enumerate(score_settings):
+                            score_matrix['{0}_{1}'.format(score_type, team)] = counts[k, i, t]
+                    for (t, team) in enumerate(teams):
+                        score_matrix['SCORE_' + team] = scores[i, t].astype(float)
+                    score_matrices[g].append(score_matrix)
+                if writers[g] is not None:
+                    writers[g].write([counts[k, i, t] for t in range(2) for k in range(len(score_settings))] + [scores[i, 0], scores[i, 1]])
+
+                n_done[g] += block_size
+                chunks[g] += 1
+                if n_done[g] == n_targets[g] and target_standard_error is not None:
+                    (standard_error, effective_sample_size) = __standard_error(outcomes[g], knockouts[g], group_stats[g], group_size)
+                    n_targets[g] = __required_simulations(standard_error, n_done[g], target_standard_error, max_simulations)
+
+    for writer in writers:
+        if writer is not None:
+            writer.close()
+
+    results = []
+    for g in range(n_games):
+        teams = list(expected_scores[g].keys())
+        (team1_chance, team2_chance) = __chances(outcomes[g], knockouts[g])
+
+        game_results = {}
+        game_results['venue'] = venues[g]
+        game_results['chances'] = {teams[0]: team1_chance,
+                                   teams[1]: team2_chance}
+        game_results['score_distributions'] = __describe_histograms(histograms[g], teams)
+        game_results['score_histograms'] = dict(zip(teams, histograms[g]))
+        (game_results['standard_error'], game_results['effective_sample_size']) = __standard_error(outcomes[g], knockouts[g], group_stats[g],
+                                                                                                    group_size)
+        if variance_reduction == 'common':
+            game_results['effective_sample_size'] = np.nan
+        game_results['n_simulations'] = int(n_done[g])
+
+        if return_scores:
+            game_results['scores'] = pd.concat(score_matrices[g])
+
+        results.append(game_results)
+
+    return results
@@ -0,0 +1,147 @@
+import os
+import numpy as np
+
+class SimulationWriter:
+    '''
+    Writes simulated games to a binary NumPy `.npy` file one block at a time, so that every simulation can be stored without keeping them
+    all in memory or formatting them as text. Each simulation is a record with the number of scores of each type for each team and each
+    team's final score, all stored as 16-bit unsigned integers. The header is rewritten with the final number of simulations when the
+    writer is closed, so the number of simulations doesn't need to be known in advance.
+
+    Parameters
+    ----------
+    path (str):
+        Path of the `.npy` file to write. Its directory is created if it doesn't exist
+    columns (list):
+        Names of the columns (e.g. "TD_KC" and "SCORE_KC") in the order they will be written
+
+    Attributes
+    ----------
+    path (str):
+        Path of the file being written
+    dtype (numpy.dtype):
+        Structured data type of each simulation
+    n_rows (int):
+        Number of simulations written so far
+    '''
+    def __init__(self, path, columns):
+        self.path = path
+        self.dtype = np.dtype([(column, np.uint16) for column in columns])
+        self.n_rows = 0
+
+        directory = os.path.dirname(path)
+        if directory != '' and not os.path.isdir(directory):
+            os.makedirs(directory, exist_ok = True)
+
+        # Space is reserved for a header with the largest possible number of simulations so it can be rewritten in place
+        self.__header_length = -(-(len(np.lib.format.magic(1, 0)) + 3 + len(self.__header(2**63))) // 64)*64
+        self.__file = open(path, 'wb')
+        self.__write_header()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __header(self, n_rows):
+        '''
+        Creates the header of the file, which describes the structured array stored in it
+        '''
+        return "{{'descr': {0}, 'fortran_order': False, 'shape': ({1},), }}".format(repr(np.lib.format.dtype_to_descr(self.dtype)), n_rows)
+
+    def __write_header(self):
+        '''
+        Writes the header for the number of simulations written so far at the start of the file
+        '''
+        magic = np.lib.format.magic(1, 0)
+        header = self.__header(self.n_rows).ljust(self.__header_length - len(magic) - 3) + '\n'
+        self.__file.seek(0)
+        self.__file.write(magic + np.uint16(len(header)).astype('<u2').tobytes() + header.encode('latin1'))
+
+    def write(self, columns):
+        '''
+        Appends a block of simulations to the file
+
+        Parameters
+        ----------
+        columns (list):
+            List of arrays with the values of each column for every simulation in the block, in the same order as the column names. Every
+            value must be between 0 and 65535
+        '''
+        block = np.empty(len(columns[0]), self.dtype)
+        limit = np.iinfo(np.uint16).max
+        for (name, column) in zip(self.dtype.names, columns):
+            column = np.asarray(column)
+            # Values outside the range of the column type would otherwise silently wrap around
+            if len(column) > 0 and not (column.min() >= 0 and column.max() <= limit):
+                raise ValueError('{0} has values outside of the range that can be stored (0 to {1})'.format(name, limit))
+            block[name] = column
+        self.__file.seek(0, os.SEEK_END)
+        self.__file.write(block.tobytes())
+        self.n_rows += len(block)
+
+    def close(self):
+        '''
+        Writes the final number of simulations to the header and closes the file
+        '''
+        if not self.__file.closed:
+            self.__write_header()
+            self.__file.close()
+
+def simulation_columns(teams, score_settings):
+    '''
+    Names of the columns stored for each simulation of a game, which are the same as the columns of the `scores` data frame returned by
+    `simulate_game()`
+
+    Parameters
+    ----------
+    teams (list):
+        Codes of the two teams in the game
+    score_settings (SportPredictifier.ObjectCollection):
+        Collection of score settings for the competition
+
+    Returns
+    -------
+    columns (list):
+        Column names
+    '''
+    return ['{0}_{1}'.format(score_type, team) for team in teams for score_type in score_settings] + ['SCORE_' + team for team in teams]
+
+def simulation_path(directory, matchup):
+    '''
+    Path of the file that the simulations of a game are stored in
+
+    Parameters
+    ----------
+    directory (str):
+        Directory the simulations are stored in
+    matchup (str):
+        Key of the game (e.g. "KCvSF")
+
+    Returns
+    -------
+    path (str):
+        Path of the `.npy` file
+    '''
+    return os.path.join(directory, matchup + '_simresults.npy')
+
+def load_simulation_results(path):
+    '''
+    Memory-maps stored simulations back for analysis without reading them all into memory
+
+    Parameters
+    ----------
+    path (str):
+        Path of a `.npy` file written by `SimulationWriter`, or a directory of them
+
+    Returns
+    -------
+    simulations (numpy.memmap or dict):
+        Structured array with a field for each column (e.g. `simulations['SCORE_KC']`). If `path` is a directory, a dictionary mapping
+        each matchup to its simulations is returned
+    '''
+    if os.path.isdir(path):
+        return {filename[:-len('_simresults.npy')]: load_simulation_results(os.path.join(path, filename))
+                for filename in sorted(os.listdir(path)) if filename.endswith('_simresults.npy')}
+    return np.load(path, mmap_mode = 'r')
@@ -3,6 +3,9 @@ import numpy as np
 import os
 from math import log2
 
+from .simulate import simulate_round
+from .seeding import round_seed_sequence
+
 directions = ['F', 'A']
 
 def compliment_direction(direction):
@@ -99,6 +102,48 @@ def run_multithreaded_games(games):
     for game in games:
         game.join()
 
+def run_batched_games(games, result_dict, per_game_streams = True):
+    '''
+    Runs simulations of every game in a round at once using `simulate_round()` rather than putting each game on its own thread
+
+    Parameters
+    ----------
+    games (list):
+        List of games to simulate. These must not have been started as threads
+    result_dict (dict):
+        Dictionary to store results of games in
+    per_game_streams (bool):
+        If `True`, each game draws from its own stream so that its results are the same as with any other backend. If `False`, the
+        whole batch draws from a single stream so that each score type is drawn for every game with one vectorised call
+    '''
+    if len(games) == 0:
+        return
+
+    # The exact engine doesn't sample anything, so there is nothing to batch
+    if games[0].engine == 'exact':
+        for game in games:
+            game.run()
+        return
+
+    print('Simulating {} games in a single batch'.format(len(games)))
+    round_results = simulate_round(games[0].n_simulations,
+                                   [game.expected_scores for game in games],
+                                   games[0].score_settings,
+                                   [game.venue for game in games],
+                                   [game.knockout for game in games],
+                                   any(game.store_results for game in games),
+                                   games[0].min_expected_mean,
+                                   games[0].chunk_size,
+                                   games[0].target_standard_error,
+                                   games[0].max_simulations,
+                                   [game.seed_sequence for game in games] if per_game_streams else
+                                   round_seed_sequence(games[0].seed_sequence.entropy, ['{0}v{1}'.format(game.team1.code, game.team2.code) for game in games]),
+                                   games[0].variance_reduction,
+                                   [game.store_path for game in games])
+
+    for (game, game_results) in zip(games, round_results):
+        result_dict['{0}v{1}'.format(game.team1.code, game.team2.code)] = game_results
+
 def create_score_table(directory, team, schedule, score_settings):
     '''
     Creates a blank score table when initializing a season based on the schedule and score_settings
@@ -116,7 +116,7 @@ def check_validity(errors, score_tables, score_settings, settings):
 
             if score_settings[score_type].prob:
 
-                current_team['condition'] = current_team.eval(score_settings[score_type].condition.replace('{F}', 'F').replace('{A}', 'A'))
+                current_team['condition'] = score_settings[score_type].condition.evaluate_columns(current_team, 'F', 'A')
                 current_team['invalid'] = (current_team[score_type + '_F'] > current_team['condition'])
 
                 if current_team['invalid'].sum() == 0:
@@ -134,7 +134,34 @@ def check_validity(errors, score_tables, score_settings, settings):
 
     return errors
                 
-def validate_score_tables(score_tables, score_settings, teams, stadia, settings):
+def check_score_table(team, score_table, score_settings, teams, stadia, settings):
+    '''
+    Runs the checks that only need a single team's score table, so that each score table can be checked as soon as it is loaded
+
+    Parameters
+    ----------
+    team (str):
+        Code of the team that the score table is for
+    score_table (pandas.DataFrame):
+        Score table to check
+    score_settings (SportPredictifier.ObjectCollection):
+        Collection of score_settings for the competition
+    teams (SportPredictifier.ObjectCollection):
+        Collection of teams competing in the competition
+    stadia (SportPredictifier.ObjectCollection):
+        Collection of stadia used in the competition
+    settings (dict):
+        Settings for the competition
+
+    Returns
+    -------
+    errors (list):
+        List of errors that are found in the score table
+    '''
+    errors = check_teams_and_venues([], {team: score_table}, teams, stadia, settings)
+    return check_validity(errors, {team: score_table}, score_settings, settings)
+
+def validate_score_tables(score_tables, score_settings, teams, stadia, settings, table_errors = None):
     '''
     Validates the score tables before running anything. If any errors are found, they will be printed in the console window and an exception will be raised
 
@@ -150,12 +177,18 @@ def validate_score_tables(score_tables, score_settings, teams, stadia, settings)
         Collection of stadia used in the competition
     settings (dict):
         Settings for the competition
+    table_errors (dict, optional):
+        Errors found by `check_score_table()` for each team. If given, only the checks between score tables are run
     '''
     print("Validating score tables")
-    errors = []
-    errors = check_teams_and_venues(errors, score_tables, teams, stadia, settings)
-    errors = check_consistency(errors, score_tables, score_settings, settings)
-    errors = check_validity(errors, score_tables, score_settings, settings)
+    if table_errors is None:
+        errors = []
+        errors = check_teams_and_venues(errors, score_tables, teams, stadia, settings)
+        errors = check_consistency(errors, score_tables, score_settings, settings)
+        errors = check_validity(errors, score_tables, score_settings, settings)
+    else:
+        errors = [error for team in score_tables for error in table_errors[team]]
+        errors = check_consistency(errors, score_tables, score_settings, settings)
 
     if len(errors) > 0:
         for error in errors:
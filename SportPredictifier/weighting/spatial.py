@@ -1,4 +1,7 @@
 import math
+import os
+import numpy as np
+import pandas as pd
 
 def geodesic_distance(olat, olng, dlat, dlng):
     '''
@@ -27,6 +30,99 @@ def geodesic_distance(olat, olng, dlat, dlng):
     a = math.sin(delta_lat/2)**2 + math.cos(olat)*math.cos(dlat)*math.sin(delta_lng/2)**2
     return 4*math.atan2(math.sqrt(a), math.sqrt(1-a))/math.tau
 
+def geodesic_distances(olat, olng, dlat, dlng):
+    '''
+    Vectorised version of `geodesic_distance()` that works on arrays of coordinates, which are broadcast against each other
+
+    Parameters
+    ----------
+    olat (array-like):
+        Origin latitudes in degrees
+    olng (array-like):
+        Origin longitudes in degrees
+    dlat (array-like):
+        Destination latitudes in degrees
+    dlng (array-like):
+        Destination longitudes in degrees
+
+    Returns
+    -------
+    distances (numpy.ndarray):
+        Geodesic distances in percentage of half the earth's circumference
+    '''
+    (olat, olng, dlat, dlng) = (np.radians(np.asarray(x, float)) for x in (olat, olng, dlat, dlng))
+    a = np.square(np.sin((dlat - olat)/2)) + np.cos(olat)*np.cos(dlat)*np.square(np.sin((dlng - olng)/2))
+    return 4*np.arctan2(np.sqrt(a), np.sqrt(1-a))/math.tau
+
+def distance_matrix(codes, lats, lons, cache_file = None):
+    '''
+    Calculates the geodesic distance between every pair of stadia. If a cache file is given, the matrix is read from it when it was calculated
+    for the same stadia and coordinates, and otherwise it is calculated and written to it.
+
+    Parameters
+    ----------
+    codes (array-like):
+        Code of each stadium
+    lats (array-like):
+        Latitude of each stadium in degrees
+    lons (array-like):
+        Longitude of each stadium in degrees
+    cache_file (str, optional):
+        Path of a `.npz` file to cache the matrix in
+
+    Returns
+    -------
+    distances (pandas.DataFrame):
+        Matrix of distances in percentage of half the earth's circumference, with the stadium codes as the index and columns
+    '''
+    codes = np.asarray(codes, str)
+    lats = np.asarray(lats, float)
+    lons = np.asarray(lons, float)
+
+    if cache_file is not None and os.path.isfile(cache_file):
+        with np.load(cache_file) as cache:
+            if np.array_equal(cache['codes'], codes) and np.array_equal(cache['lats'], lats) and np.array_equal(cache['lons'], lons):
+                print("Loading distance matrix from {}".format(cache_file))
+                return pd.DataFrame(cache['distances'], index = codes, columns = codes)
+
+    print("Calculating distance matrix")
+    distances = geodesic_distances(lats[:, np.newaxis], lons[:, np.newaxis], lats[np.newaxis, :], lons[np.newaxis, :])
+    if cache_file is not None:
+        with open(cache_file, 'wb') as f: # Writing to an open file stops NumPy from changing the extension
+            np.savez(f, codes = codes, lats = lats, lons = lons, distances = distances)
+    return pd.DataFrame(distances, index = codes, columns = codes)
+
+def get_spatial_weights(distances, home, venues, references):
+    '''
+    Vectorised version of `get_spatial_weight()` that gets the travel weight of a team's games for several reference locations at once by
+    indexing into a distance matrix
+
+    Parameters
+    ----------
+    distances (pandas.DataFrame):
+        Matrix of distances between stadia from `distance_matrix()`
+    home (str or array-like):
+        Code of the team's home stadium, or of the home stadium of the team in each game
+    venues (array-like):
+        Code of the stadium of each game
+    references (array-like):
+        Codes of the stadia to use as reference locations
+
+    Returns
+    -------
+    weights (numpy.ndarray):
+        2D array with the weight of each game (row) for each reference location (column)
+    '''
+    (home_index, venue_index, reference_index) = (distances.index.get_indexer(np.atleast_1d(np.asarray(codes, object)))
+                                                  for codes in (home, venues, references))
+    for (codes, index) in zip((home, venues, references), (home_index, venue_index, reference_index)):
+        if (index < 0).any():
+            raise KeyError('Unknown stadia: {}'.format(', '.join(sorted(set(np.atleast_1d(np.asarray(codes, object))[index < 0])))))
+
+    travel_distance = distances.values[home_index, venue_index]
+    reference_distance = distances.values[home_index[:, np.newaxis], reference_index[np.newaxis, :]]
+    return 1 - np.abs(travel_distance[:, np.newaxis] - reference_distance)
+
 def get_spatial_weight(stadium, home, reference):
     '''
     Gets the travel weight based on a venue, a team's home lat/long coordinates, and a reference location.
@@ -1,36 +1,126 @@
-'''
-SCRIPT UNDER CONSTRUCTION
-'''
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
 from numpy.polynomial import Polynomial
 
 class TemporalWeightingFunction:
+    '''
+    Decays the weight of a game with the number of days since it was played. The weight is `exp(-(c1*x + c2*x**2 + ...))`, where `x` is
+    the number of days, so a single coefficient gives an exponential decay with a half-life of `log(2)/c1` days. Negative coefficients are
+    treated as 0 so that older games are never weighted more heavily.
 
+    Parameters
+    ----------
+    coefs (list):
+        Coefficients of the polynomial in the number of days, starting with the linear term
+    '''
     def __init__(self, coefs):
-        self.coefs = np.array(coefs)
+        self.coefs = np.atleast_1d(np.array(coefs, float))
 
     def eval(self, x):
         return np.exp(Polynomial(np.hstack((0, -np.maximum(0, self.coefs))))(x))
 
     def __call__(self, x):
-        self.eval(x)
-
-def __apply_temporal_function_to_score_table(score_table, weighting_function):
-    score_table['weight'] *= score_table['DaysSince'].apply(weighting_function)
-
-def __get_days_since(score_table, reference_date):
-    score_table['DaysSince'] = reference_date - pd.to_datetime(score_table[['YEAR', 'MONTH', 'DAY']])
-
-def __get_reference_dates(schedule, teams, settings, roundno):
-    round_games = schedule.query('{0} == {1}'.format(settings['round_name'].upper(), roundno))
-    round_games['date'] = pd.to_datetime(round_games[['year', 'month', 'day']])
-    
-    reference_dates = {}
-    for team in teams:
-        for ix, row in round_games.iterrows():
-            if row['team1'] == team or row['team2'] == team:
-                reference_dates[team] = row['date']
-                break
-            break
\ No newline at end of file
+        return self.eval(x)
+
+def game_dates(score_table, schedule, round_column):
+    '''
+    Finds the date of every row of a long-format score table. If the score table has `YEAR`, `MONTH`, and `DAY` columns they are used,
+    otherwise each row's date is looked up in the schedule from its team and round.
+
+    Parameters
+    ----------
+    score_table (pandas.DataFrame):
+        Long-format score table from `calculate.long_score_table()`
+    schedule (pandas.DataFrame):
+        Schedule of the competition
+    round_column (str):
+        Name of the round column in the score table (e.g. "ROUND")
+
+    Returns
+    -------
+    dates (numpy.ndarray):
+        Date of each row as a `datetime64[D]` array
+    '''
+    if {'YEAR', 'MONTH', 'DAY'}.issubset(score_table.columns):
+        dates = pd.to_datetime(score_table[['YEAR', 'MONTH', 'DAY']].set_axis(['year', 'month', 'day'], axis = 1)).values
+    else:
+        schedule_dates = pd.to_datetime(schedule[['year', 'month', 'day']]).values
+        lookup = pd.MultiIndex.from_arrays([np.concatenate([schedule['team1'].values, schedule['team2'].values]),
+                                            np.tile(schedule['round_number'].values, 2)])
+        positions = lookup.get_indexer(pd.MultiIndex.from_arrays([score_table['TEAM'].astype(object).values, score_table[round_column].values]))
+        assert (positions >= 0).all(), "Dates couldn't be found in the schedule for {} score table rows".format((positions < 0).sum())
+        dates = np.tile(schedule_dates, 2)[positions]
+    return dates.astype('datetime64[D]')
+
+def reference_dates(schedule, teams, round_number):
+    '''
+    Finds the date that each team's games are weighted relative to, which is the date of their game in the round being modeled. Teams
+    without a game in the round use the first date of the round.
+
+    Parameters
+    ----------
+    schedule (pandas.DataFrame):
+        Schedule of the competition
+    teams (iterable):
+        Codes of the teams
+    round_number (int):
+        Round being modeled
+
+    Returns
+    -------
+    reference_dates (dict):
+        Dictionary mapping each team to its reference date. It is empty if the round isn't in the schedule
+    '''
+    round_games = schedule[schedule['round_number'] == round_number]
+    dates = pd.to_datetime(round_games[['year', 'month', 'day']]).values.astype('datetime64[D]')
+    if len(dates) == 0:
+        return {}
+
+    game_dates = dict(zip(round_games['team2'], dates))
+    game_dates.update(zip(round_games['team1'], dates))
+    return {team: game_dates.get(team, dates.min()) for team in teams}
+
+def get_temporal_weights(score_table, dates, references, weighting_function, weight_cache = None):
+    '''
+    Gets the temporal weight of every row of a long-format score table relative to its team's reference date. The number of days since
+    each reference date is calculated for all rows at once, and the weights for each reference date are kept in `weight_cache` so that
+    teams playing on the same day (and later calls with the same dates) reuse them.
+
+    Parameters
+    ----------
+    score_table (pandas.DataFrame):
+        Long-format score table from `calculate.long_score_table()`
+    dates (numpy.ndarray):
+        Date of each row from `game_dates()`
+    references (dict):
+        Reference date of each team from `reference_dates()`. Teams without one are weighted relative to their latest game
+    weighting_function (SportPredictifier.weighting.temporal.TemporalWeightingFunction):
+        Function giving the weight from the number of days since a game
+    weight_cache (dict, optional):
+        Weights of every row for each reference date that have already been calculated. It is updated in place
+
+    Returns
+    -------
+    weights (numpy.ndarray):
+        Temporal weight of each row
+    '''
+    if weight_cache is None:
+        weight_cache = {}
+
+    index = score_table['TEAM'].cat.codes.values
+    categories = score_table['TEAM'].cat.categories
+    # Teams without any rows (e.g. new teams) have no latest game and don't need a reference date
+    latest = pd.Series(dates).groupby(index).max().reindex(range(len(categories))).values.astype('datetime64[D]')
+    team_references = np.array([references[team] if team in references else latest[position] for (position, team) in enumerate(categories)],
+                               'datetime64[D]')
+
+    unique_references = np.unique(team_references[~np.isnat(team_references)])
+    missing = [reference for reference in unique_references if reference not in weight_cache]
+    if len(missing) > 0:
+        days_since = (np.array(missing, 'datetime64[D]')[:, np.newaxis] - dates[np.newaxis, :]).astype(float)
+        for (reference, weights) in zip(missing, weighting_function(days_since)):
+            weight_cache[reference] = weights
+
+    # Each row takes its weight from the vector for its team's reference date
+    reference_position = np.searchsorted(unique_references, team_references)[index]
+    return np.vstack([weight_cache[reference] for reference in unique_references])[reference_position, np.arange(len(index))]
@@ -0,0 +1,46 @@
+'''
+Benchmarks the simulation backends against the number of cores used. Run from anywhere with
+
+    python benchmarkBackends.py [season directory] [round number] [number of simulations (optional)]
+
+The round is simulated once with the thread and batch backends and then with the process backend using 1, 2, 4, ... workers up
+to the number of CPUs. The time taken and the speedup relative to the thread backend are printed for each run.
+'''
+import os
+import sys
+import time
+import SportPredictifier as sp
+from SportPredictifier.executor import run_games
+
+season_directory = sys.argv[1]
+round_number = int(sys.argv[2])
+
+os.chdir(season_directory)
+settings = sp.load.settings('settings.yaml')
+if len(sys.argv) > 3:
+    settings['n_simulations'] = int(sys.argv[3])
+settings['store_simulation_results'] = False
+
+(stadia, teams, score_settings) = sp.load.data(settings, round_number, '{0} < {1}'.format(settings['round_name'].upper(), round_number))
+
+def time_backend(backend, workers = None):
+    results = {}
+    games = sp.load.schedule(settings, teams, stadia, score_settings, round_number, multithreaded = True, result_dict = results, start_threads = False)
+    t0 = time.perf_counter()
+    run_games(games, results, backend, workers)
+    return time.perf_counter() - t0
+
+runs = [('thread', 1), ('batch', 1)]
+workers = 1
+while workers < os.cpu_count():
+    runs.append(('process', workers))
+    workers *= 2
+runs.append(('process', os.cpu_count()))
+
+timings = []
+for (backend, workers) in runs:
+    timings.append((backend, workers, time_backend(backend, workers)))
+
+print('\n{0:>8} {1:>8} {2:>10} {3:>8}'.format('Backend', 'Workers', 'Time (s)', 'Speedup'))
+for (backend, workers, seconds) in timings:
+    print('{0:>8} {1:>8} {2:>10.2f} {3:>8.2f}'.format(backend, workers, seconds, timings[0][2]/seconds))
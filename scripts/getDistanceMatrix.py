@@ -1,6 +1,6 @@
 import pandas as pd
 import numpy as np
-from SportPredictifier.weighting.spatial import geodesic_distance
+from SportPredictifier.weighting.spatial import distance_matrix
 import sys
 from subprocess import Popen
 
@@ -21,24 +21,12 @@ stadia = pd.read_csv(
     stadia_file
 )
 
-N = len(stadia)
-matrix = pd.DataFrame(
-    np.zeros(
-        (N, N),
-        float
-    ),
-    index = stadia["code"],
-    columns = stadia["code"]
+matrix = unit_mult*distance_matrix(
+    stadia["code"],
+    stadia["lat"],
+    stadia["lon"]
 )
-
-for oix, orow in stadia.iterrows():
-    for dix, drow in stadia.iterrows():
-        matrix.loc[orow["code"], drow["code"]] = unit_mult*geodesic_distance(
-            orow["lat"],
-            orow["lon"],
-            drow["lat"],
-            drow["lon"]
-        )
+matrix.index.name = "code"
 
 matrix.to_csv(outfile)
-Popen(outfile, shell = True)
\ No newline at end of file
+Popen(outfile, shell = True)
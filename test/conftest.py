@@ -0,0 +1,74 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from SportPredictifier.objects import ObjectCollection, ScoreSettings, Team
+
+# Round, home team, away team, home tries, home penalty goals, away tries, away penalty goals
+games = [(1, 'AUS', 'DAL', 3, 1, 1, 2), (1, 'HOU', 'NOLA', 2, 2, 4, 0), (2, 'DAL', 'HOU', 2, 1, 2, 2), (2, 'NOLA', 'AUS', 1, 3, 3, 1),
+         (3, 'AUS', 'HOU', 5, 0, 0, 3), (3, 'DAL', 'NOLA', 1, 1, 2, 1)]
+
+@pytest.fixture
+def season_settings(tmp_path, monkeypatch):
+    '''
+    Writes the input files of a small season with four teams to a temporary directory
+    '''
+    monkeypatch.chdir(tmp_path)
+    teams = ['AUS', 'DAL', 'HOU', 'NOLA']
+    with open('stadia.csv', 'w') as f:
+        f.write('code,name,location,lat,lon,elev\n')
+        f.writelines('{0},{0} Stadium,{0},{1},{2},100\n'.format(team, 30 + i, -90 - i) for (i, team) in enumerate(teams))
+    with open('teams.csv', 'w') as f:
+        f.write('code,name,stadium,r1,g1,b1,r2,g2,b2\n')
+        f.writelines('{0},{0},{0},0,0,0,255,255,255\n'.format(team) for team in teams)
+    with open('scoring.csv', 'w') as f:
+        f.write('code,description,points,prob,opp_effect,base,condition\nT,Try,5,FALSE,TRUE,,\nPG,Penalty Goal,3,FALSE,FALSE,,\n')
+    with open('schedule.csv', 'w') as f:
+        f.write('round_number,team1,team2,venue,year,month,day\n4,AUS,NOLA,AUS,2022,4,2\n4,DAL,HOU,DAL,2022,4,2\n')
+    os.mkdir('ScoreTables')
+    for team in teams:
+        with open(os.path.join('ScoreTables', team + '.csv'), 'w') as f:
+            f.write('ROUND,OPP,VENUE,T_F,PG_F,T_A,PG_A,weight\n')
+            for (game_round, home, away, home_t, home_pg, away_t, away_pg) in games:
+                if team == home:
+                    f.write('{0},{1},{2},{3},{4},{5},{6},1\n'.format(game_round, away, home, home_t, home_pg, away_t, away_pg))
+                elif team == away:
+                    f.write('{0},{1},{2},{3},{4},{5},{6},1\n'.format(game_round, home, home, away_t, away_pg, home_t, home_pg))
+    return {'stadia_file': 'stadia.csv', 'teams_file': 'teams.csv', 'score_settings_file': 'scoring.csv', 'schedule_file': 'schedule.csv',
+            'score_table_path': 'ScoreTables', 'round_name': 'Round', 'use_spatial_weights': False}
+
+@pytest.fixture
+def score_settings():
+    '''
+    Score settings with tries, penalty goals, and conversions of tries
+    '''
+    score_settings = ObjectCollection()
+    score_settings['T'] = ScoreSettings('T', 'Try', 5, False, True, np.nan, np.nan)
+    score_settings['PG'] = ScoreSettings('PG', 'Penalty Goal', 3, False, False, np.nan, np.nan)
+    score_settings['C'] = ScoreSettings('C', 'Conversion', 2, True, True, 0.7, 'T_{F}')
+    return score_settings
+
+@pytest.fixture
+def score_tables():
+    '''
+    Score tables of three teams over three rounds for `score_settings`, with a weight for each game
+    '''
+    # Round, opponent, venue, tries, penalty goals, and conversions for and against, weight
+    games = {
+        'AUS': [(1, 'DAL', 'AUS', 3, 1, 2, 1, 2, 0, 1.0), (2, 'HOU', 'HOU', 4, 0, 3, 2, 1, 1, 0.5), (3, 'DAL', 'DAL', 1, 2, 0, 5, 0, 4, 0.8)],
+        'DAL': [(1, 'AUS', 'AUS', 1, 2, 1, 3, 1, 2, 1.0), (2, 'HOU', 'DAL', 2, 1, 2, 2, 2, 2, 0.5), (3, 'AUS', 'DAL', 5, 0, 4, 1, 2, 0, 0.8)],
+        'HOU': [(1, 'AUS', 'HOU', 2, 1, 1, 4, 0, 3, 0.5), (2, 'DAL', 'DAL', 2, 2, 2, 2, 1, 2, 0.5), (3, 'DAL', 'HOU', 0, 3, 0, 2, 2, 1, 1.0)],
+    }
+    score_tables = ObjectCollection()
+    for team in games:
+        score_tables[team] = pd.DataFrame(games[team], columns = ['ROUND', 'OPP', 'VENUE', 'T_F', 'PG_F', 'C_F', 'T_A', 'PG_A', 'C_A', 'weight'])
+    return score_tables
+
+@pytest.fixture
+def teams(score_tables):
+    teams = ObjectCollection()
+    for team in score_tables:
+        teams[team] = Team(team, team, None, '#000000', '#FFFFFF')
+    return teams
@@ -0,0 +1,63 @@
+import os
+
+import numpy as np
+import pytest
+
+from SportPredictifier import cache, load
+
+@pytest.fixture
+def settings(season_settings):
+    return dict(season_settings, cache_directory = 'cache', report_cache = True)
+
+def test_key_depends_on_inputs(settings):
+    key = cache.data_key(settings)
+    assert cache.data_key(dict(settings, seed = 1234)) == key
+    assert cache.data_key(settings, score_table_query = 'ROUND < 5') != key
+    assert cache.data_key(dict(settings, use_spatial_weights = True)) != key
+
+    with open(os.path.join('ScoreTables', 'AUS.csv'), 'a') as f:
+        f.write('\n')
+    assert cache.data_key(settings) != key
+
+def test_repeat_load_hits_cache(settings, capsys):
+    (_, expected, _) = load.data(settings)
+    assert 'Cache miss' in capsys.readouterr().out
+
+    (_, teams, _) = load.data(settings)
+    output = capsys.readouterr().out
+    assert 'Cache hit' in output
+    assert 'Loaded score table' not in output # The statistics pipeline is skipped
+
+    (_, cached, _, score_tables) = load.data(settings, return_score_tables = True)
+    assert 'Cache hit' in capsys.readouterr().out
+    assert sorted(score_tables.keys()) == sorted(cached.keys()) and len(score_tables['AUS']) == 3
+
+    for team in expected:
+        for direction in ['F', 'A']:
+            for stat in expected[team].stats[direction]:
+                assert np.allclose(expected[team].stats[direction][stat], teams[team].stats[direction][stat])
+
+def test_eviction_keeps_most_recent(tmp_path):
+    directory = str(tmp_path / 'cache')
+    data = np.zeros(2**17) # 1 MB
+    for key in ['a', 'b', 'c']:
+        cache.store(directory, key, data, max_size = 2.5)
+        os.utime(os.path.join(directory, key + '.pkl'), (0, {'a': 1, 'b': 2, 'c': 3}[key]))
+    cache.store(directory, 'd', data, max_size = 2.5)
+
+    assert sorted(os.listdir(directory)) == ['c.pkl', 'd.pkl']
+    assert cache.load(directory, 'a') is None
+    assert np.array_equal(cache.load(directory, 'd'), data)
+
+@pytest.mark.parametrize('contents', [b'cSportPredictifier.cache\nOldClass\n.', b'cSportPredictifier.old_module\nOldClass\n.', b'\x80\x05'])
+def test_unreadable_entries_are_misses(tmp_path, contents):
+    # Entries written by older builds refer to classes and modules that no longer exist
+    directory = str(tmp_path / 'cache')
+    os.makedirs(directory)
+    with open(os.path.join(directory, 'a.pkl'), 'wb') as f:
+        f.write(contents)
+
+    assert cache.load(directory, 'a') is None
+    assert not os.path.exists(os.path.join(directory, 'a.pkl'))
+    cache.store(directory, 'a', [1, 2])
+    assert cache.load(directory, 'a') == [1, 2]
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from SportPredictifier import calculate
+from SportPredictifier.objects import ObjectCollection, Stadium, Team
+from SportPredictifier.weighting.spatial import distance_matrix, get_spatial_weights
+
+def test_team_stats(teams, score_settings, score_tables):
+    calculate.team_stats(teams, score_settings, calculate.long_score_table(score_tables))
+    for team in teams:
+        table = score_tables[team]
+        assert teams[team].stats['F']['T'] == pytest.approx(np.average(table['T_F'], weights = table['weight']))
+        assert teams[team].stats['A']['PG'] == pytest.approx((np.average(table['PG_A'], weights = table['weight']),
+                                                              calculate.weighted_variance(table['PG_A'], table['weight'])))
+        assert teams[team].stats['F']['C'] == pytest.approx((table['C_F']*table['weight']).sum() / (table['T_F']*table['weight']).sum())
+
+def test_residual_stats(teams, score_settings, score_tables):
+    score_table = calculate.long_score_table(score_tables)
+    calculate.team_stats(teams, score_settings, score_table)
+    calculate.opponent_stats(teams, score_settings, score_table)
+    calculate.residual_stats(teams, score_settings, score_table)
+
+    table = score_tables['AUS']
+    opponent_tries = table['OPP'].map({team: teams[team].stats['A']['T'] for team in teams})
+    assert teams['AUS'].stats['F']['RES_T'] == pytest.approx((np.average(table['T_F'] - opponent_tries, weights = table['weight']),
+                                                              calculate.weighted_variance(table['T_F'] - opponent_tries, table['weight'])))
+
+    opponent_conversions = table['OPP'].map({team: teams[team].stats['F']['C'] for team in teams})
+    assert teams['AUS'].stats['A']['RES_C'] == pytest.approx(np.average(table['C_A']/table['T_A'] - opponent_conversions,
+                                                                        weights = table['T_A']*table['weight']))
+
+def test_spatial_stats_are_reused(teams, score_settings, score_tables):
+    for team in score_tables:
+        score_tables[team]['spatial_weight_AUS'] = [1.0, 0.6, 0.9]
+        score_tables[team]['spatial_weight_HOU'] = [0.7, 1.0, 0.4]
+        score_tables[team]['spatial_weight_DAL'] = [0.5, 0.8, 1.0]
+    score_table = calculate.long_score_table(score_tables)
+    venue_stats = calculate.spatial_stats(score_table, score_settings, ['AUS'])
+    calculate.team_stats(teams, score_settings, score_table, {'AUS': 'HOU', 'HOU': 'HOU'}, venue_stats)
+    assert sorted(venue_stats.keys()) == ['AUS', 'HOU']
+
+    table = score_tables['AUS']
+    assert teams['AUS'].stats['F']['T'] == pytest.approx(np.average(table['T_F'], weights = table['spatial_weight_HOU']))
+    assert teams['DAL'].stats['F']['T'] == pytest.approx(np.average(score_tables['DAL']['T_F'], weights = score_tables['DAL']['weight']))
+
+    # Opponents are weighted for the venue of the first game against them
+    calculate.opponent_stats(teams, score_settings, score_table, True, venue_stats)
+    first_game = score_table.query('TEAM == "AUS" and OPP == "DAL"').iloc[0]
+    dal = score_tables['DAL']
+    assert list(score_table.query('TEAM == "AUS" and OPP == "DAL"')['OPP_T_A']) == 2*[
+        pytest.approx(np.average(dal['T_A'], weights = dal['spatial_weight_{}'.format(first_game['VENUE'])]))]
+
+def test_lazy_spatial_weights_match_columns(score_settings, score_tables):
+    stadia = ObjectCollection()
+    stadia['AUS'] = Stadium('AUS', 'Bold Stadium', 'Austin', 30.39, -97.72, 0)
+    stadia['DAL'] = Stadium('DAL', 'Choctaw Stadium', 'Arlington', 32.75, -97.08, 0)
+    stadia['HOU'] = Stadium('HOU', 'SaberCats Stadium', 'Houston', 29.62, -95.47, 0)
+    stadia['SEA'] = Stadium('SEA', 'Starfire Sports Stadium', 'Tukwila', 47.46, -122.24, 0)
+    teams = ObjectCollection()
+    for team in score_tables:
+        teams[team] = Team(team, team, stadia[team], '#000000', '#FFFFFF')
+    distances = distance_matrix(list(stadia.keys()), stadia.extract_attribute('lat'), stadia.extract_attribute('lon'))
+
+    lazy = calculate.spatial_stats(calculate.long_score_table(score_tables), score_settings, ['HOU', 'SEA'], teams = teams, distances = distances)
+    for team in score_tables:
+        weights = get_spatial_weights(distances, teams[team].stadium.code, score_tables[team]['VENUE'].values, ['HOU', 'SEA'])
+        for (i, venue) in enumerate(['HOU', 'SEA']):
+            score_tables[team]['spatial_weight_{}'.format(venue)] = weights[:, i]
+    materialised = calculate.spatial_stats(calculate.long_score_table(score_tables), score_settings, ['HOU', 'SEA'])
+    for venue in ['HOU', 'SEA']:
+        assert np.allclose(lazy[venue]['F']['T'], materialised[venue]['F']['T'])
+        assert np.allclose(lazy[venue]['A']['PG'], materialised[venue]['A']['PG'])
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from SportPredictifier.objects import Condition, ScoreSettings
+
+def test_linear_terms():
+    condition = Condition('TD_{A} - PAT1_{A} - PAT2_{A}')
+    assert condition.terms == [('TD', 'A', 1), ('PAT1', 'A', -1), ('PAT2', 'A', -1)]
+    assert condition.constant == 0
+    assert condition.codes == ['PAT1', 'PAT2', 'TD']
+
+    condition = Condition('2*(T_{F} - 1) + T_{F}/2')
+    assert condition.terms == [('T', 'F', 2.5)]
+    assert condition.constant == -2
+
+def test_matches_dataframe_eval():
+    rng = np.random.default_rng(0)
+    table = pd.DataFrame(rng.integers(0, 10, (50, 4)), columns = ['TD_F', 'TD_A', 'GOFOR2_F', 'GOFOR2_A'])
+    for expression in ['TD_{F}', 'TD_{F} - GOFOR2_{F}', 'TD_{A} + 2*GOFOR2_{F} - 1']:
+        expected = table.eval(expression.replace('{F}', 'F').replace('{A}', 'A'))
+        assert (Condition(expression).evaluate_columns(table, 'F', 'A') == expected).all()
+
+def test_evaluate_indexed():
+    counts = np.arange(24).reshape(3, 2, 4)
+    condition = Condition('T_{F} - C_{A}')
+    value = condition.evaluate_indexed(counts, counts[:, ::-1], {'T': 0, 'C': 2})
+    assert (value == counts[0] - counts[2][::-1]).all()
+
+@pytest.mark.parametrize('expression', ['T_{F}*C_{F}', 'max(T_{F}, 1)', 'T_{F} -', 'T', 'T_{F}/0', 'T_{F}/(2 - 2)'])
+def test_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        Condition(expression)
+
+def test_validate():
+    condition = Condition('TD_{F} - GOFOR2_{F}')
+    condition.validate(['TD', 'FG', 'GOFOR2'])
+    with pytest.raises(ValueError):
+        condition.validate(['TD', 'FG'])
+
+def test_score_settings_compile_condition():
+    score_settings = ScoreSettings('C', 'Conversion', 2, True, True, 0.75, 'T_{F}')
+    assert isinstance(score_settings.condition, Condition)
+    assert score_settings.condition.terms == [('T', 'F', 1)]
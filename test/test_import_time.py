@@ -0,0 +1,21 @@
+import os
+import subprocess
+import sys
+
+package_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def imported_modules(module):
+    '''
+    Imports a module in a new interpreter and returns the names of every module that was imported along with the time it took in seconds
+    '''
+    code = ('import sys, time; start = time.perf_counter(); import {}; duration = time.perf_counter() - start; '
+            'print(duration); print("\\n".join(sys.modules))').format(module)
+    output = subprocess.run([sys.executable, '-c', code], cwd = package_directory, capture_output = True, text = True, check = True).stdout
+    lines = output.splitlines()
+    return set(lines[1:]), float(lines[0])
+
+def test_heavy_dependencies_are_lazy():
+    (modules, duration) = imported_modules('SportPredictifier')
+    print("SportPredictifier imported in {0:.3f} s".format(duration))
+    assert 'SportPredictifier' in modules
+    assert [module for module in ['scipy', 'scipy.stats', 'scipy.sparse', 'matplotlib', 'matplotlib.pyplot', 'xlsxwriter'] if module in modules] == []
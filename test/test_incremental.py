@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from SportPredictifier import calculate, incremental
+from SportPredictifier.objects import ObjectCollection, Team
+
+def new_teams(score_tables):
+    teams = ObjectCollection()
+    for team in score_tables:
+        teams[team] = Team(team, team, None, '#000000', '#FFFFFF')
+    return teams
+
+def full_stats(score_settings, score_tables):
+    teams = new_teams(score_tables)
+    score_table = calculate.long_score_table(score_tables)
+    calculate.team_stats(teams, score_settings, score_table)
+    calculate.opponent_stats(teams, score_settings, score_table)
+    calculate.residual_stats(teams, score_settings, score_table)
+    return teams
+
+def assert_same_stats(expected, actual):
+    for team in expected:
+        for direction in ['F', 'A']:
+            assert list(expected[team].stats[direction]) == list(actual[team].stats[direction])
+            for stat in expected[team].stats[direction]:
+                assert np.allclose(expected[team].stats[direction][stat], actual[team].stats[direction][stat])
+
+def filtered(score_tables, query):
+    tables = ObjectCollection()
+    for team in score_tables:
+        tables[team] = score_tables[team].query(query)
+    return tables
+
+def test_incremental_matches_full_recompute(tmp_path, score_settings, score_tables, capsys):
+    state_file = str(tmp_path / 'stats_state.pkl')
+    for query in ['ROUND < 3', 'ROUND < 4']:
+        tables = filtered(score_tables, query)
+        teams = new_teams(tables)
+        incremental.update_stats(state_file, teams, score_settings, tables)
+        assert_same_stats(full_stats(score_settings, tables), teams)
+    # Only the third round was added in the second update
+    assert 'Adding 3 new rows to the statistics (0 teams recalculated)' in capsys.readouterr().out
+
+def test_changed_rows_are_recalculated(tmp_path, score_settings, score_tables, capsys):
+    state_file = str(tmp_path / 'stats_state.pkl')
+    incremental.update_stats(state_file, new_teams(score_tables), score_settings, score_tables)
+    score_tables['HOU'].loc[0, 'T_F'] = 5
+    teams = new_teams(score_tables)
+    incremental.update_stats(state_file, teams, score_settings, score_tables)
+    assert 'Adding 3 new rows to the statistics (1 teams recalculated)' in capsys.readouterr().out
+    assert_same_stats(full_stats(score_settings, score_tables), teams)
@@ -0,0 +1,35 @@
+import os
+
+import pytest
+
+from SportPredictifier import load
+
+def test_parallel_load_keeps_order(season_settings, capsys):
+    (stadia, teams, score_settings) = load.data(dict(season_settings, io_workers = 3))
+    output = capsys.readouterr().out
+
+    assert list(stadia.keys()) == ['AUS', 'DAL', 'HOU', 'NOLA']
+    assert list(teams.keys()) == ['AUS', 'DAL', 'HOU', 'NOLA']
+    assert list(score_settings.keys()) == ['T', 'PG']
+
+    # Score tables are reported in the order they're listed in the directory whichever finishes first
+    reported = [line.split()[4] for line in output.splitlines() if line.startswith('Loaded score table for')]
+    assert reported == [filename[:-4] for filename in os.listdir('ScoreTables')]
+    assert 'Loaded stadia from stadia.csv in' in output
+
+def test_errors_found_while_loading(season_settings, capsys):
+    with open(os.path.join('ScoreTables', 'AUS.csv'), 'a') as f:
+        f.write('4,AUS,XYZ,1,1,1,1,1\n')
+
+    with pytest.raises(IOError):
+        load.data(season_settings)
+    output = capsys.readouterr().out
+    assert 'AUS is recorded as playing against themselves in Round 4' in output
+    assert 'XYZ is not a valid venue for AUS in Round 4' in output
+
+def test_objects_use_slots(season_settings):
+    (stadia, teams, score_settings) = load.data(season_settings)
+    for collection in [stadia, teams, score_settings]:
+        assert not any(hasattr(value, '__dict__') for value in collection.values())
+    assert teams['DAL'].stadium is stadia['DAL']
+    assert stadia['HOU'].lat == 32
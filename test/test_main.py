@@ -0,0 +1,11 @@
+import importlib
+
+import pytest
+
+main = importlib.import_module('SportPredictifier.main')
+
+def test_parse_options():
+    assert main.__parse_options(['predictify', '3', '--workers', '4']) == (['predictify', '3'], {'workers': '4'})
+    for args in [['predictify', '3', '--workers'], ['matrix', '--workers', '--workers', '2'], ['predictify', '3', '--threads', '4']]:
+        with pytest.raises(SystemExit):
+            main.__parse_options(args)
@@ -0,0 +1,39 @@
+import datetime
+import importlib
+
+import numpy as np
+
+from SportPredictifier import load
+from SportPredictifier.objects import Game
+
+matrix = importlib.import_module('SportPredictifier.matrix')
+
+matrix_settings = {'round_number': 4, 'teams': {'south': ['HOU', 'AUS', 'NOLA'], 'north': ['DAL']}, 'neutral_venues': {'DAL': ['south', 'north']}}
+
+def test_expected_score_matrix_matches_games(season_settings):
+    (stadia, teams, score_settings) = load.data(season_settings)
+    codes = ['NOLA', 'AUS', 'DAL']
+    (means, variances) = matrix.expected_score_matrix(teams, codes)
+    assert means.shape == variances.shape == (3, 3, 2)
+    assert np.isnan(means[[0, 1, 2], [0, 1, 2]]).all()
+
+    for (i, team1) in enumerate(codes):
+        for (j, team2) in enumerate(codes):
+            if i != j:
+                game = Game({}, 4, datetime.date(2022, 4, 2), teams[team1], teams[team2], stadia[team1], False, score_settings, 10, False, 0.01)
+                assert game.expected_scores[team1] == {'T': (means[i, j, 0], variances[i, j, 0]), 'PG': (means[i, j, 1], variances[i, j, 1])}
+
+def test_matrix_games_use_matchup_expected_scores(season_settings):
+    (stadia, teams, score_settings) = load.data(season_settings)
+    matrix_schedule = matrix.generate_schedule(matrix_settings, teams)
+    assert len(matrix_schedule) == 6
+    for round_number in matrix_schedule['round_number'].unique(): # No team plays twice in the same round
+        round_teams = matrix_schedule.loc[matrix_schedule['round_number'] == round_number, ['team1', 'team2']].values.ravel()
+        assert len(round_teams) == len(set(round_teams))
+
+    matrix_schedule['expected_scores'] = matrix.matchup_expected_scores(matrix_schedule, teams)
+    games = load.schedule(dict(season_settings, n_simulations = 10, store_simulation_results = False, min_expected_mean = 0.01), teams, stadia,
+                          score_settings, multithreaded = True, result_dict = {}, schedule_override = matrix_schedule, start_threads = False)
+    for game in games:
+        assert game.expected_scores == Game({}, 4, game.date, game.team1, game.team2, game.venue, True, score_settings, 10, False, 0.01).expected_scores
+    assert all(team.opp is None for team in teams.values())
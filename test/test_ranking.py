@@ -0,0 +1,31 @@
+import pandas as pd
+import pytest
+
+from SportPredictifier import load, ranking
+from SportPredictifier.objects import ObjectCollection
+
+def test_ratings_recover_exact_scores(score_settings):
+    # Every score is the mean plus the team's attack plus the opponent's defense, so the ratings should be recovered exactly
+    (attack, defense) = ({'A': 6, 'B': 1, 'C': -2, 'D': -5}, {'A': -4, 'B': 0, 'C': 3, 'D': 1})
+    score_tables = ObjectCollection()
+    for team in attack:
+        rows = []
+        for opponent in [team_opponent for team_opponent in attack if team_opponent != team]:
+            (points_for, points_against) = (20 + attack[team] + defense[opponent], 20 + attack[opponent] + defense[team])
+            rows += 2*[(opponent, 0, points_for/3, 0, 0, points_against/3, 0)]
+        score_tables[team] = pd.DataFrame(rows, columns = ['OPP', 'T_F', 'PG_F', 'C_F', 'T_A', 'PG_A', 'C_A'])
+
+    (attack_ratings, defense_ratings) = ranking.ratings(ranking.long_score_table(score_tables), list(attack.keys()), score_settings)
+    assert attack_ratings == pytest.approx(list(attack.values()))
+    assert defense_ratings == pytest.approx(list(defense.values()))
+
+def test_rank_from_memory_matches_files(season_settings, tmp_path):
+    (_, _, score_settings, score_tables) = load.data(season_settings, return_score_tables = True)
+    from_memory = ranking.rank(score_tables, str(tmp_path / 'memory.csv'), score_settings, 'Round', 3)
+    from_files = ranking.rank('ScoreTables', str(tmp_path / 'files.csv'), score_settings, 'Round', 3)
+
+    pd.testing.assert_frame_equal(from_memory.sort_index(), from_files.sort_index())
+    written = pd.read_csv(str(tmp_path / 'memory.csv'), index_col = 0)
+    assert list(written.columns) == ['Attack', 'Defense', 'Overall', 'Standardised', 'Quantile']
+    assert list(written['Overall']) == sorted(written['Overall'], reverse = True)
+    assert written['Attack'].sum() == pytest.approx(0, abs = 1e-9)
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from SportPredictifier.objects import ObjectCollection, ScoreSettings, Stadium, Team
+from SportPredictifier.report import generate_report
+from SportPredictifier.simulate import simulate_game
+
+openpyxl = pytest.importorskip('openpyxl') # Only used to read the report back
+
+def test_report_rows_for_each_engine(tmp_path):
+    score_settings = ObjectCollection()
+    score_settings['T'] = ScoreSettings('T', 'Try', 5, False, True, np.nan, np.nan)
+    stadium = Stadium('AUS', 'AUS Stadium', 'Austin', 30, -97, 100)
+    teams = ObjectCollection()
+    for team in ['AUS', 'DAL', 'HOU', 'NOLA']:
+        teams[team] = Team(team, team, stadium, '#000000', '#FFFFFF')
+
+    results = {}
+    for (matchup, engine) in [('AUSvDAL', 'exact'), ('HOUvNOLA', 'monte_carlo')]:
+        expected_scores = {team: {'T': (3.0, 3.0)} for team in matchup.split('v')}
+        results[matchup] = simulate_game(1000, expected_scores, score_settings, stadium, False, False, 0.01, engine = engine)
+    generate_report(str(tmp_path / 'report.xlsx'), teams, results, seed = 5)
+
+    sheet = openpyxl.load_workbook(str(tmp_path / 'report.xlsx'))['Forecasts']
+    rows = {sheet.cell(row, 1).value: row for row in range(27, 31)}
+    assert list(rows) == ['Simulations', 'Standard Error', 'Effective Sample Size', 'Seed']
+
+    # The exact engine has no effective sample size, but the rows after it are still written
+    assert [sheet.cell(row, 2).value for row in range(27, 30)] == [0, 0, None]
+    assert [sheet.cell(row, 5).value for row in range(27, 30)] == pytest.approx([1000, results['HOUvNOLA']['standard_error'], 1000])
+    assert sheet.cell(30, 2).value == '5'
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from SportPredictifier import score_store
+from SportPredictifier.objects import ObjectCollection
+
+@pytest.fixture
+def score_tables():
+    games = {
+        'AUS': [(1, 'DAL', 'AUS', 3, 1, 1.0), (2, 'HOU', 'HOU', 4, 0, 0.5), (3, 'DAL', 'DAL', np.nan, np.nan, 1.0)],
+        'DAL': [(1, 'AUS', 'AUS', 1, 2, 1.0), (2, 'HOU', 'DAL', 2, 1, 0.5), (3, 'AUS', 'DAL', np.nan, np.nan, 1.0)],
+        'HOU': [(2, 'DAL', 'DAL', 2, 2, 0.5), (1, 'AUS', 'HOU', 2, 1, 0.5)],
+    }
+    score_tables = ObjectCollection()
+    for team in games:
+        score_tables[team] = pd.DataFrame(games[team], columns = ['ROUND', 'OPP', 'VENUE', 'T_F', 'T_A', 'weight'])
+    return score_tables
+
+@pytest.mark.parametrize('query', [None, 'ROUND < 3', 'ROUND >= 2 & ROUND < 3', 'ROUND == 1', 'ROUND > 5', 'OPP == "DAL"'])
+def test_read_matches_query(tmp_path, score_tables, query):
+    score_store.write_score_store(str(tmp_path), score_tables)
+    assert score_store.is_score_store(str(tmp_path))
+
+    read = score_store.read_score_store(str(tmp_path), query)
+    assert list(read.keys()) == ['AUS', 'DAL', 'HOU']
+    for team in score_tables:
+        expected = score_tables[team].sort_values('ROUND', kind = 'stable')
+        if query is not None:
+            expected = expected.query(query)
+        pd.testing.assert_frame_equal(read[team], expected.reset_index(drop = True), check_dtype = False)
+
+def test_codes_are_stored(tmp_path, score_tables):
+    score_store.write_score_store(str(tmp_path), score_tables)
+    assert np.issubdtype(np.load(str(tmp_path / 'VENUE.npy')).dtype, np.integer)
+    assert np.issubdtype(np.load(str(tmp_path / 'TEAM.npy')).dtype, np.integer)
+    assert list(np.load(str(tmp_path / 'ROUND.npy'))) == [1, 1, 1, 2, 2, 2, 3, 3]
+
+def test_import_export(tmp_path, score_tables):
+    (tmp_path / 'csv').mkdir()
+    for team in score_tables:
+        score_tables[team].to_csv(str(tmp_path / 'csv' / (team + '.csv')), index = False)
+    score_store.import_score_tables(str(tmp_path / 'csv'), str(tmp_path / 'store'))
+    score_store.export_score_tables(str(tmp_path / 'store'), str(tmp_path / 'exported'))
+
+    for team in score_tables:
+        expected = pd.read_csv(str(tmp_path / 'csv' / (team + '.csv'))).sort_values('ROUND', kind = 'stable').reset_index(drop = True)
+        pd.testing.assert_frame_equal(pd.read_csv(str(tmp_path / 'exported' / (team + '.csv'))), expected)
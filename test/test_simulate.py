@@ -0,0 +1,277 @@
+import numpy as np
+import pytest
+
+import importlib
+
+from SportPredictifier.objects import ObjectCollection, ScoreSettings, Stadium, Team
+from SportPredictifier.simulate import simulate_game, simulate_round, score_quantiles
+from SportPredictifier.exact import solve_game
+from SportPredictifier.seeding import game_seed_sequence, chunk_generator, round_seed_sequence
+
+matrix = importlib.import_module('SportPredictifier.matrix')
+
+N_SIMULATIONS = 200000
+
+@pytest.fixture
+def score_settings():
+    '''
+    Score settings from the mechanical NFL test, which include probabilistic score types conditioned on both teams' scores
+    '''
+    score_settings = ObjectCollection()
+    score_settings['TD'] = ScoreSettings('TD', 'Touchdown', 6, False, True, np.nan, np.nan)
+    score_settings['FG'] = ScoreSettings('FG', 'Field Goal', 3, False, True, np.nan, np.nan)
+    score_settings['S'] = ScoreSettings('S', 'Safety', 2, False, True, np.nan, np.nan)
+    score_settings['GOFOR2'] = ScoreSettings('GOFOR2', '2-Point Conversion Attempted', 0, True, False, 0.05, 'TD_{F}')
+    score_settings['PAT1'] = ScoreSettings('PAT1', '1-Point Conversion', 1, True, True, 0.9, 'TD_{F} - GOFOR2_{F}')
+    score_settings['PAT2'] = ScoreSettings('PAT2', '2-Point Conversion', 2, True, True, 0.5, 'GOFOR2_{F}')
+    score_settings['D2PC'] = ScoreSettings('D2PC', 'Defensive 2-Point Conversion', 2, True, True, 0.01, 'TD_{A} - PAT1_{A} - PAT2_{A}')
+    return score_settings
+
+@pytest.fixture
+def expected_scores():
+    return [
+        {'KC': {'TD': (1.84, 0.66), 'FG': (2.07, 0.84), 'S': (0.01, 0.001), 'GOFOR2': 0.1, 'PAT1': 0.95, 'PAT2': 0.5, 'D2PC': 0.05},
+         'SF': {'TD': (2.89, 0.62), 'FG': (0.90, 0.53), 'S': (0.08, 0.019), 'GOFOR2': 0.2, 'PAT1': 0.98, 'PAT2': 0.7, 'D2PC': 0.02}},
+        {'BAL': {'TD': (3.5, 1.0), 'FG': (1.5, 0.5), 'S': (0.05, 0.01), 'GOFOR2': 0.05, 'PAT1': 0.9, 'PAT2': 0.4, 'D2PC': 0.01},
+         'DET': {'TD': (0.8, 0.4), 'FG': (1.2, 0.6), 'S': (0.02, 0.01), 'GOFOR2': 0.3, 'PAT1': 0.9, 'PAT2': 0.5, 'D2PC': 0.01}},
+    ]
+
+@pytest.fixture
+def venue():
+    return Stadium('LV', 'Allegiant Stadium', 'Las Vegas', 36.09, -115.18, 0)
+
+def test_round_matches_individual_games(score_settings, expected_scores, venue):
+    round_results = simulate_round(N_SIMULATIONS, expected_scores, score_settings, 2*[venue], [True, False], False, 0.01)
+    for (game_expected_scores, batched) in zip(expected_scores, round_results):
+        single = simulate_game(N_SIMULATIONS, game_expected_scores, score_settings, venue, False, False, 0.01)
+        for team in game_expected_scores:
+            assert batched['score_distributions'][team]['mean'] == pytest.approx(single['score_distributions'][team]['mean'], abs = 0.2)
+            assert batched['score_distributions'][team]['50%'] == pytest.approx(single['score_distributions'][team]['50%'], abs = 1)
+        assert batched['venue'] is venue
+        assert list(batched['chances'].keys()) == list(game_expected_scores.keys())
+
+def test_round_knockout_chances(score_settings, expected_scores, venue):
+    (knockout, league) = simulate_round(N_SIMULATIONS, expected_scores, score_settings, 2*[venue], [True, False], False, 0.01)
+    assert sum(knockout['chances'].values()) == pytest.approx(1)
+    assert sum(league['chances'].values()) < 1
+    single = simulate_game(N_SIMULATIONS, expected_scores[0], score_settings, venue, True, False, 0.01)
+    for team in expected_scores[0]:
+        assert knockout['chances'][team] == pytest.approx(single['chances'][team], abs = 0.01)
+
+def test_round_returns_scores(score_settings, expected_scores, venue):
+    round_results = simulate_round(1000, expected_scores, score_settings, 2*[venue], [True, True], True, 0.01)
+    scores = round_results[0]['scores']
+    assert scores.shape == (1000, 2*len(score_settings) + 2)
+    points = score_settings.extract_attribute('points').values
+    for team in expected_scores[0]:
+        team_columns = ['{0}_{1}'.format(score_type, team) for score_type in score_settings]
+        assert (scores[team_columns].values.dot(points) == scores['SCORE_' + team]).all()
+
+def test_chunked_game_matches_raw_scores(score_settings, expected_scores, venue):
+    results = simulate_game(10000, expected_scores[0], score_settings, venue, False, True, 0.01, chunk_size = 3000)
+    scores = results['scores'][['SCORE_' + team for team in expected_scores[0]]]
+    scores.columns = list(expected_scores[0].keys())
+    assert len(scores) == 10000
+    assert (results['scores'].index == range(10000)).all()
+    assert np.allclose(results['score_distributions'], scores.describe(np.arange(0.05, 1, 0.05)))
+    assert list(results['score_distributions'].index) == list(scores.describe(np.arange(0.05, 1, 0.05)).index)
+    (team1, team2) = scores.columns
+    assert results['chances'][team1] == pytest.approx((scores[team1] > scores[team2]).mean())
+    assert results['chances'][team2] == pytest.approx((scores[team1] < scores[team2]).mean())
+
+def test_chunked_round_matches_unchunked(score_settings, expected_scores, venue):
+    unchunked = simulate_round(N_SIMULATIONS, expected_scores, score_settings, 2*[venue], [True, False], False, 0.01)
+    chunked = simulate_round(N_SIMULATIONS, expected_scores, score_settings, 2*[venue], [True, False], False, 0.01, chunk_size = 30000)
+    for (a, b) in zip(unchunked, chunked):
+        assert b['score_distributions'].loc['count'].tolist() == [N_SIMULATIONS, N_SIMULATIONS]
+        for team in a['chances']:
+            assert a['chances'][team] == pytest.approx(b['chances'][team], abs = 0.01)
+
+def test_exact_matches_monte_carlo(score_settings, expected_scores, venue):
+    for knockout in [False, True]:
+        exact = simulate_game(0, expected_scores[0], score_settings, venue, knockout, False, 0.01, engine = 'exact')
+        simulated = simulate_game(N_SIMULATIONS, expected_scores[0], score_settings, venue, knockout, False, 0.01)
+        assert list(exact['score_distributions'].index) == list(simulated['score_distributions'].index)
+        for team in expected_scores[0]:
+            assert exact['chances'][team] == pytest.approx(simulated['chances'][team], abs = 0.01)
+            assert exact['score_distributions'][team]['mean'] == pytest.approx(simulated['score_distributions'][team]['mean'], abs = 0.2)
+            assert exact['score_distributions'][team]['std'] == pytest.approx(simulated['score_distributions'][team]['std'], abs = 0.2)
+            assert exact['score_distributions'][team]['50%'] == pytest.approx(simulated['score_distributions'][team]['50%'], abs = 1)
+
+def test_exact_joint_pmf(score_settings, expected_scores):
+    joint_pmf = solve_game(expected_scores[1], score_settings, 0.01)
+    assert joint_pmf.sum() == pytest.approx(1)
+    assert (joint_pmf >= 0).all()
+    # A team can never finish with a single point
+    assert joint_pmf[1].sum() < 1e-3
+
+def test_negative_conditions_have_no_attempts(score_settings, expected_scores, venue):
+    # The bonus is attempted once for every field goal more than the opposition's touchdowns, which is often negative
+    score_settings['BONUS'] = ScoreSettings('BONUS', 'Bonus', 3, True, False, 0.5, 'FG_{F} - TD_{A}')
+    game = {team: dict(expected_scores[0][team], BONUS = 0.6) for team in expected_scores[0]}
+    exact = simulate_game(0, game, score_settings, venue, False, False, 0.01, engine = 'exact')
+    assert solve_game(game, score_settings, 0.01).sum() == pytest.approx(1)
+
+    seed_sequences = [game_seed_sequence(3, 1, 'KCvSF')]
+    simulated = [simulate_game(N_SIMULATIONS, game, score_settings, venue, False, False, 0.01, seed_sequence = seed_sequences[0]),
+                 simulate_game(N_SIMULATIONS, game, score_settings, venue, False, False, 0.01, seed_sequence = seed_sequences[0], variance_reduction = 'antithetic'),
+                 simulate_round(N_SIMULATIONS, [game], score_settings, [venue], [False], False, 0.01, seed_sequences = seed_sequences)[0]]
+    for results in simulated:
+        for team in game:
+            assert results['chances'][team] == pytest.approx(exact['chances'][team], abs = 0.01)
+            assert results['score_distributions'][team]['mean'] == pytest.approx(exact['score_distributions'][team]['mean'], abs = 0.1)
+
+def test_invalid_engine(score_settings, expected_scores, venue):
+    with pytest.raises(ValueError):
+        simulate_game(100, expected_scores[0], score_settings, venue, False, False, 0.01, engine = 'guess')
+
+def test_histograms_match_raw_scores(score_settings, expected_scores, venue):
+    results = simulate_game(10000, expected_scores[1], score_settings, venue, False, True, 0.01)
+    quantiles = [0.01, 0.1, 0.333, 0.5, 0.9, 0.99]
+    for team in expected_scores[1]:
+        scores = results['scores']['SCORE_' + team]
+        histogram = results['score_histograms'][team]
+        assert histogram.sum() == 10000
+        assert (histogram == np.bincount(scores.astype(int))).all()
+        assert np.allclose(score_quantiles(histogram, quantiles), scores.quantile(quantiles))
+        assert np.allclose(results['score_distributions'][team], scores.describe(np.arange(0.05, 1, 0.05)))
+
+def test_exact_histograms(score_settings, expected_scores, venue):
+    results = simulate_game(0, expected_scores[0], score_settings, venue, False, False, 0.01, engine = 'exact')
+    for team in expected_scores[0]:
+        histogram = results['score_histograms'][team]
+        assert histogram.sum() == pytest.approx(1)
+        assert (score_quantiles(histogram, np.arange(0.05, 1, 0.05)) == results['score_distributions'][team].iloc[4:-1].values).all()
+
+def test_adaptive_game_meets_target(score_settings, expected_scores, venue):
+    results = simulate_game(1000, expected_scores[0], score_settings, venue, False, False, 0.01, target_standard_error = 0.004, max_simulations = 10**6)
+    assert results['standard_error'] <= 0.004
+    assert 1000 < results['n_simulations'] < 10**6
+    assert results['score_histograms'][list(expected_scores[0].keys())[0]].sum() == results['n_simulations']
+
+def test_invalid_adaptive_settings(score_settings, expected_scores, venue):
+    for target_standard_error in [0, -0.01]:
+        with pytest.raises(ValueError):
+            simulate_game(1000, expected_scores[0], score_settings, venue, False, False, 0.01, target_standard_error = target_standard_error)
+        with pytest.raises(ValueError):
+            simulate_round(1000, expected_scores, score_settings, 2*[venue], [False, False], False, 0.01, target_standard_error = target_standard_error)
+    with pytest.raises(ValueError):
+        simulate_game(1000, expected_scores[0], score_settings, venue, False, False, 0.01, target_standard_error = 0.01, max_simulations = 500)
+
+def test_adaptive_round_stops_early_for_lopsided_games(score_settings, expected_scores, venue):
+    (close, lopsided) = simulate_round(1000, expected_scores, score_settings, 2*[venue], [False, False], False, 0.01, chunk_size = 5000,
+                                       target_standard_error = 0.002, max_simulations = 50000)
+    assert close['n_simulations'] == 50000
+    assert lopsided['n_simulations'] < close['n_simulations']
+    assert lopsided['standard_error'] <= 0.002
+    fixed = simulate_round(1000, expected_scores, score_settings, 2*[venue], [False, False], False, 0.01)
+    assert fixed[0]['n_simulations'] == 1000
+
+def test_seeded_results_are_reproducible(score_settings, expected_scores, venue):
+    seed_sequences = [game_seed_sequence(2024, 1, '{0}v{1}'.format(*game.keys())) for game in expected_scores]
+    round_results = simulate_round(20000, expected_scores, score_settings, 2*[venue], [False, False], True, 0.01, chunk_size = 7000,
+                                   seed_sequences = seed_sequences)
+    for (game_expected_scores, seed_sequence, batched) in zip(expected_scores, seed_sequences, round_results):
+        first = simulate_game(20000, game_expected_scores, score_settings, venue, False, True, 0.01, chunk_size = 7000, seed_sequence = seed_sequence)
+        second = simulate_game(20000, game_expected_scores, score_settings, venue, False, True, 0.01, chunk_size = 7000, seed_sequence = seed_sequence)
+        assert first['chances'] == second['chances']
+        assert (first['scores'].values == second['scores'].values).all()
+        assert first['chances'] == batched['chances']
+        assert (first['scores'].values == batched['scores'][first['scores'].columns].values).all()
+
+def test_adaptive_seeded_round_matches_games(score_settings, expected_scores, venue):
+    seed_sequences = [game_seed_sequence(7, 3, '{0}v{1}'.format(*game.keys())) for game in expected_scores]
+    round_results = simulate_round(1000, expected_scores, score_settings, 2*[venue], [False, True], False, 0.01, chunk_size = 3000,
+                                   target_standard_error = 0.004, max_simulations = 40000, seed_sequences = seed_sequences)
+    for (game_expected_scores, knockout, seed_sequence, batched) in zip(expected_scores, [False, True], seed_sequences, round_results):
+        single = simulate_game(1000, game_expected_scores, score_settings, venue, knockout, False, 0.01, chunk_size = 3000,
+                               target_standard_error = 0.004, max_simulations = 40000, seed_sequence = seed_sequence)
+        assert single['n_simulations'] == batched['n_simulations']
+        assert single['chances'] == batched['chances']
+
+def test_round_stream_is_reproducible(score_settings, expected_scores, venue):
+    # A single stream for the round draws every game at once, which is reproducible but not the same as simulating each game alone
+    seed_sequence = round_seed_sequence(2024, ['{0}v{1}'.format(*game.keys()) for game in expected_scores])
+    (first, second) = [simulate_round(20000, expected_scores, score_settings, 2*[venue], [False, False], True, 0.01, chunk_size = 7000,
+                                      seed_sequences = seed_sequence) for repeat in range(2)]
+    single = simulate_game(20000, expected_scores[0], score_settings, venue, False, True, 0.01, chunk_size = 7000,
+                           seed_sequence = game_seed_sequence(2024, 1, 'KCvSF'))
+    for (game_first, game_second) in zip(first, second):
+        assert game_first['chances'] == game_second['chances']
+        assert (game_first['scores'].values == game_second['scores'].values).all()
+    assert first[0]['chances'] != single['chances']
+
+    exact = simulate_game(0, expected_scores[0], score_settings, venue, False, False, 0.01, engine = 'exact')
+    for team in expected_scores[0]:
+        assert first[0]['chances'][team] == pytest.approx(exact['chances'][team], abs = 0.015)
+
+def test_games_have_independent_streams():
+    first = chunk_generator(game_seed_sequence(1, 1, 'AvB'), 0).random(5)
+    assert (first == chunk_generator(game_seed_sequence(1, 1, 'AvB'), 0).random(5)).all()
+    assert not (first == chunk_generator(game_seed_sequence(1, 1, 'CvD'), 0).random(5)).any()
+    assert not (first == chunk_generator(game_seed_sequence(1, 2, 'AvB'), 0).random(5)).any()
+    assert not (first == chunk_generator(game_seed_sequence(1, 1, 'AvB'), 1).random(5)).any()
+
+@pytest.mark.parametrize('variance_reduction', ['antithetic', 'quasi', 'common'])
+def test_variance_reduction_matches_exact(score_settings, expected_scores, venue, variance_reduction):
+    exact = simulate_game(0, expected_scores[0], score_settings, venue, False, False, 0.01, engine = 'exact')
+    seed_sequence = game_seed_sequence(11, 1, 'KCvSF')
+    results = simulate_game(N_SIMULATIONS, expected_scores[0], score_settings, venue, False, False, 0.01, seed_sequence = seed_sequence,
+                            variance_reduction = variance_reduction)
+    for team in expected_scores[0]:
+        assert results['chances'][team] == pytest.approx(exact['chances'][team], abs = 0.01)
+        assert results['score_distributions'][team]['mean'] == pytest.approx(exact['score_distributions'][team]['mean'], abs = 0.1)
+    if variance_reduction == 'common': # Nothing about a single game shows the gain from common random numbers
+        assert np.isnan(results['effective_sample_size'])
+    else:
+        assert results['effective_sample_size'] > N_SIMULATIONS
+
+def test_quasi_standard_error_across_chunks(score_settings, expected_scores, venue):
+    # Four full chunks and a much shorter last one, which has to be made of groups of the same size as the others
+    (chances, standard_errors, effective_sample_sizes) = ([], [], [])
+    for seed in range(30):
+        results = simulate_game(16484, expected_scores[0], score_settings, venue, False, False, 0.01, chunk_size = 4096,
+                                seed_sequence = game_seed_sequence(seed, 1, 'KCvSF'), variance_reduction = 'quasi')
+        chances.append(results['chances']['KC'])
+        standard_errors.append(results['standard_error'])
+        effective_sample_sizes.append(results['effective_sample_size'])
+    assert min(effective_sample_sizes) > 16484
+    assert 0.6 < np.std(chances, ddof = 1) / np.mean(standard_errors) < 1.6
+
+def test_common_random_numbers_reduce_variance_of_differences_in_matrix(score_settings, expected_scores):
+    # A matrix schedule puts KC's games against SF and LV in different slots, which are simulated as different rounds
+    stadium = Stadium('LV', 'Allegiant Stadium', 'Las Vegas', 36.09, -115.18, 0)
+    teams = ObjectCollection()
+    for team in ['KC', 'SF', 'LV']:
+        teams[team] = Team(team, team, stadium, '#000000', '#FFFFFF')
+    matrix_schedule = matrix.generate_schedule({'round_number': 1, 'teams': {'all': list(teams.keys())}, 'neutral_venues': {'LV': ['all']}}, teams)
+    rounds = {'{0}v{1}'.format(game.team1, game.team2): game.round_number for game in matrix_schedule.itertuples()}
+    assert rounds['KCvSF'] != rounds['KCvLV']
+
+    # KC plays SF and then a weaker team, and the difference in its chances of winning is compared across seeds
+    games = {'KCvSF': expected_scores[0], 'KCvLV': {'KC': expected_scores[0]['KC'], 'LV': expected_scores[1]['DET']}}
+    differences = {None: [], 'common': []}
+    for seed in range(40):
+        for variance_reduction in differences:
+            chances = [simulate_game(20000, games[matchup], score_settings, None, False, False, 0.01, variance_reduction = variance_reduction,
+                                     seed_sequence = game_seed_sequence(seed, rounds[matchup], matchup))['chances']['KC'] for matchup in games]
+            differences[variance_reduction].append(chances[1] - chances[0])
+    assert np.std(differences['common']) < 0.9*np.std(differences[None])
+
+def test_variance_reduced_round_matches_games(score_settings, expected_scores, venue):
+    seed_sequences = [game_seed_sequence(5, 2, '{0}v{1}'.format(*game.keys())) for game in expected_scores]
+    for variance_reduction in ['antithetic', 'quasi', 'common']:
+        round_results = simulate_round(10000, expected_scores, score_settings, 2*[venue], [False, False], True, 0.01, chunk_size = 4096,
+                                       seed_sequences = seed_sequences, variance_reduction = variance_reduction)
+        for (game_expected_scores, seed_sequence, batched) in zip(expected_scores, seed_sequences, round_results):
+            single = simulate_game(10000, game_expected_scores, score_settings, venue, False, True, 0.01, chunk_size = 4096,
+                                   seed_sequence = seed_sequence, variance_reduction = variance_reduction)
+            assert single['chances'] == batched['chances']
+            np.testing.assert_equal(single['effective_sample_size'], batched['effective_sample_size'])
+            assert (single['scores'].values == batched['scores'][single['scores'].columns].values).all()
+
+def test_invalid_variance_reduction(score_settings, expected_scores, venue):
+    with pytest.raises(ValueError):
+        simulate_game(100, expected_scores[0], score_settings, venue, False, False, 0.01, variance_reduction = 'control')
+    with pytest.raises(ValueError):
+        simulate_game(100, expected_scores[0], score_settings, venue, False, False, 0.01, variance_reduction = 'common')
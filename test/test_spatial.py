@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from SportPredictifier.objects import Stadium
+from SportPredictifier.weighting.spatial import geodesic_distance, distance_matrix, get_spatial_weight, get_spatial_weights
+
+@pytest.fixture
+def stadia():
+    return [Stadium('SEA', 'Starfire Sports Stadium', 'Tukwila', 47.46, -122.24, 0),
+            Stadium('SD', 'Torero Stadium', 'San Diego', 32.77, -117.19, 0),
+            Stadium('DEN', 'Infinity Park', 'Glendale', 39.70, -104.93, 0),
+            Stadium('NY', 'Mercy College Stadium', 'Dobbs Ferry', 41.01, -73.87, 0),
+            Stadium('PER', 'HBF Park', 'Perth', -31.94, 115.87, 0)]
+
+def test_distance_matrix(stadia):
+    distances = distance_matrix([s.code for s in stadia], [s.lat for s in stadia], [s.lon for s in stadia])
+    for origin in stadia:
+        for destination in stadia:
+            assert distances.loc[origin.code, destination.code] == pytest.approx(
+                geodesic_distance(origin.lat, origin.lon, destination.lat, destination.lon), abs = 1e-14)
+
+def test_distance_matrix_cache(tmp_path, stadia):
+    cache_file = str(tmp_path / 'distances.npz')
+    codes = [s.code for s in stadia]
+    lats = [s.lat for s in stadia]
+    lons = [s.lon for s in stadia]
+    calculated = distance_matrix(codes, lats, lons, cache_file)
+    assert (distance_matrix(codes, lats, lons, cache_file).values == calculated.values).all()
+
+    # Moving a stadium invalidates the cache
+    lats[0] = 0
+    moved = distance_matrix(codes, lats, lons, cache_file)
+    assert moved.loc['SEA', 'SD'] != calculated.loc['SEA', 'SD']
+    assert (distance_matrix(codes, lats, lons).values == moved.values).all()
+
+def test_spatial_weights(stadia):
+    distances = distance_matrix([s.code for s in stadia], [s.lat for s in stadia], [s.lon for s in stadia])
+    venues = ['DEN', 'NY', 'SEA', 'PER', 'SEA']
+    weights = get_spatial_weights(distances, 'SEA', venues, ['SD', 'SEA'])
+    for (i, venue) in enumerate(venues):
+        for (j, reference) in enumerate([stadia[1], stadia[0]]):
+            assert weights[i, j] == pytest.approx(get_spatial_weight(stadia[[s.code for s in stadia].index(venue)], stadia[0], reference), abs = 1e-14)
+    with pytest.raises(KeyError):
+        get_spatial_weights(distances, 'SEA', ['LA'], ['SD'])
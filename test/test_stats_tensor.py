@@ -0,0 +1,83 @@
+import datetime
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from SportPredictifier import calculate
+from SportPredictifier.objects import Game, ObjectCollection, ScoreSettings, StatsTensor, Team
+
+@pytest.fixture
+def score_settings():
+    score_settings = ObjectCollection()
+    score_settings['T'] = ScoreSettings('T', 'Try', 5, False, True, np.nan, np.nan)
+    score_settings['PG'] = ScoreSettings('PG', 'Penalty Goal', 3, False, False, np.nan, np.nan)
+    score_settings['C'] = ScoreSettings('C', 'Conversion', 2, True, True, 0.7, 'T_{F}')
+    score_settings['PT'] = ScoreSettings('PT', 'Penalty Try', 2, True, False, 0.1, 'PG_{F}')
+    return score_settings
+
+@pytest.fixture
+def teams(score_settings):
+    games = {
+        'AUS': [(1, 'DAL', 3, 1, 2, 0, 2, 0, 1, 0), (2, 'HOU', 4, 0, 3, 0, 1, 1, 1, 1), (3, 'DAL', 1, 2, 0, 1, 5, 0, 4, 0)],
+        'DAL': [(1, 'AUS', 2, 0, 1, 0, 3, 1, 2, 0), (2, 'HOU', 2, 1, 2, 1, 2, 2, 2, 0), (3, 'AUS', 5, 0, 4, 0, 1, 2, 0, 1)],
+        'HOU': [(1, 'DAL', 2, 1, 1, 0, 4, 0, 3, 0), (2, 'AUS', 1, 1, 1, 1, 4, 0, 3, 0), (2, 'DAL', 2, 2, 2, 0, 2, 1, 2, 1)],
+    }
+    score_tables = ObjectCollection()
+    teams = ObjectCollection()
+    for team in games:
+        score_tables[team] = pd.DataFrame(games[team], columns = ['ROUND', 'OPP', 'T_F', 'PG_F', 'C_F', 'PT_F', 'T_A', 'PG_A', 'C_A', 'PT_A'])
+        score_tables[team]['weight'] = 1.0
+        teams[team] = Team(team, team, None, '#000000', '#FFFFFF')
+
+    score_table = calculate.long_score_table(score_tables)
+    calculate.team_stats(teams, score_settings, score_table)
+    calculate.opponent_stats(teams, score_settings, score_table)
+    calculate.residual_stats(teams, score_settings, score_table)
+    return teams
+
+def test_views_look_like_dictionaries(teams):
+    stats = teams['AUS'].stats
+    assert list(stats) == ['F', 'A']
+    assert list(stats['F']) == ['T', 'PG', 'C', 'PT', 'RES_T', 'RES_PG', 'RES_C', 'RES_PT']
+    assert isinstance(stats['A']['PG'], tuple) and isinstance(stats['A']['RES_T'], tuple)
+    assert not isinstance(stats['F']['T'], tuple) and not isinstance(stats['F']['RES_C'], tuple)
+    with pytest.raises(KeyError):
+        stats['F']['X']
+
+    tensor = StatsTensor.of(teams)
+    assert tensor.values.shape == (3, 2, 8, 2)
+    assert stats['A']['PG'] == tuple(tensor.values[tensor.team_index['AUS'], 1, tensor.stat_index['PG']])
+
+    # Stats set through a view are written to the tensor
+    stats['F']['T'] = 2.5
+    assert tensor.values[0, 0, 0, 0] == 2.5
+    assert pickle.loads(pickle.dumps(tensor)).get('AUS', 'F', 'T') == 2.5
+
+def test_expected_scores_match_games(teams, score_settings):
+    tensor = StatsTensor.of(teams)
+    pairs = [(team1, team2) for team1 in teams for team2 in teams if team1 != team2]
+    (means, variances) = tensor.expected_scores([pair[0] for pair in pairs], [pair[1] for pair in pairs])
+    assert means.shape == variances.shape == (len(pairs), len(score_settings))
+
+    # Games between teams whose stats are plain dictionaries calculate their expected scores one stat at a time
+    dict_teams = ObjectCollection()
+    for team in teams:
+        dict_teams[team] = Team(team, team, None, '#000000', '#FFFFFF')
+        dict_teams[team].stats = {direction: dict(teams[team].stats[direction]) for direction in teams[team].stats}
+
+    for (i, (team1, team2)) in enumerate(pairs):
+        game = Game({}, 1, datetime.date(2022, 4, 2), dict_teams[team1], dict_teams[team2], None, False, score_settings, 10, False, 0.01)
+        assert Game({}, 1, datetime.date(2022, 4, 2), teams[team1], teams[team2], None, False, score_settings, 10, False, 0.01).expected_scores == game.expected_scores
+        for (j, score_type) in enumerate(score_settings):
+            expected = game.expected_scores[team1][score_type]
+            if score_settings[score_type].prob:
+                assert means[i, j] == expected and np.isnan(variances[i, j])
+            else:
+                assert (means[i, j], variances[i, j]) == expected
+
+    # Positions can be used instead of codes, and any shape of pairs works
+    (matrix_means, _) = tensor.expected_scores(np.arange(3)[:, np.newaxis], np.arange(3)[np.newaxis, :])
+    assert matrix_means.shape == (3, 3, len(score_settings))
+    assert np.array_equal(matrix_means[0, 1], means[0])
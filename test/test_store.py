@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from SportPredictifier.objects import ObjectCollection, ScoreSettings, Stadium
+from SportPredictifier.simulate import simulate_game, simulate_round
+from SportPredictifier.seeding import game_seed_sequence
+from SportPredictifier.store import SimulationWriter, load_simulation_results, simulation_path
+
+@pytest.fixture
+def score_settings():
+    score_settings = ObjectCollection()
+    score_settings['T'] = ScoreSettings('T', 'Try', 5, False, True, np.nan, np.nan)
+    score_settings['C'] = ScoreSettings('C', 'Conversion', 2, True, True, 0.7, 'T_{F}')
+    score_settings['PG'] = ScoreSettings('PG', 'Penalty Goal', 3, False, True, np.nan, np.nan)
+    return score_settings
+
+@pytest.fixture
+def expected_scores():
+    return [
+        {'NE': {'T': (3.2, 1.0), 'C': 0.75, 'PG': (1.1, 0.5)}, 'SEA': {'T': (2.4, 0.9), 'C': 0.65, 'PG': (1.6, 0.6)}},
+        {'HOU': {'T': (4.1, 1.2), 'C': 0.8, 'PG': (0.7, 0.3)}, 'DAL': {'T': (1.9, 0.8), 'C': 0.7, 'PG': (1.4, 0.5)}},
+    ]
+
+@pytest.fixture
+def venue():
+    return Stadium('SEA', 'Starfire Sports Stadium', 'Tukwila', 47.46, -122.24, 0)
+
+def test_writer_appends_blocks(tmp_path):
+    path = str(tmp_path / 'simulations' / 'AvB_simresults.npy')
+    with SimulationWriter(path, ['T_A', 'SCORE_A']) as writer:
+        writer.write([np.arange(5), 2.0*np.arange(5)])
+        writer.write([np.arange(3), np.arange(3)])
+    simulations = load_simulation_results(path)
+    assert isinstance(simulations, np.memmap)
+    assert simulations.dtype.names == ('T_A', 'SCORE_A')
+    assert simulations.dtype['T_A'] == np.uint16
+    assert list(simulations['T_A']) == [0, 1, 2, 3, 4, 0, 1, 2]
+    assert list(simulations['SCORE_A']) == [0, 2, 4, 6, 8, 0, 1, 2]
+
+def test_stored_game_matches_returned_scores(tmp_path, score_settings, expected_scores, venue):
+    seed_sequence = game_seed_sequence(3, 1, 'NEvSEA')
+    path = simulation_path(str(tmp_path), 'NEvSEA')
+    stored = simulate_game(10000, expected_scores[0], score_settings, venue, False, True, 0.01, chunk_size = 3000, seed_sequence = seed_sequence,
+                           store_path = path)
+    simulations = load_simulation_results(path)
+    assert len(simulations) == 10000
+    for column in stored['scores'].columns:
+        assert (simulations[column] == stored['scores'][column].values).all()
+
+def test_stored_round_matches_games(tmp_path, score_settings, expected_scores, venue):
+    matchups = ['{0}v{1}'.format(*game.keys()) for game in expected_scores]
+    seed_sequences = [game_seed_sequence(4, 2, matchup) for matchup in matchups]
+    paths = [simulation_path(str(tmp_path / 'round'), matchup) for matchup in matchups]
+    simulate_round(5000, expected_scores, score_settings, 2*[venue], [False, False], False, 0.01, chunk_size = 2000, seed_sequences = seed_sequences,
+                   store_paths = paths)
+    stored = load_simulation_results(str(tmp_path / 'round'))
+    assert sorted(stored.keys()) == sorted(matchups)
+    for (game, matchup, seed_sequence) in zip(expected_scores, matchups, seed_sequences):
+        path = simulation_path(str(tmp_path / 'game'), matchup)
+        simulate_game(5000, game, score_settings, venue, False, False, 0.01, chunk_size = 2000, seed_sequence = seed_sequence, store_path = path)
+        assert (load_simulation_results(path) == stored[matchup]).all()
+
+def test_writer_rejects_values_out_of_range(tmp_path):
+    with SimulationWriter(str(tmp_path / 'AvB_simresults.npy'), ['T_A', 'SCORE_A']) as writer:
+        with pytest.raises(ValueError):
+            writer.write([np.arange(3), np.array([0, 70000, 2])])
+        with pytest.raises(ValueError):
+            writer.write([np.array([-1, 0, 1]), np.arange(3)])
+        writer.write([np.arange(3), np.full(3, 65535)])
+    assert list(load_simulation_results(str(tmp_path / 'AvB_simresults.npy'))['SCORE_A']) == 3*[65535]
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from SportPredictifier import calculate
+from SportPredictifier.objects import ObjectCollection
+from SportPredictifier.weighting.temporal import TemporalWeightingFunction, game_dates, reference_dates, get_temporal_weights
+
+@pytest.fixture
+def schedule():
+    return pd.DataFrame([(1, 2024, 3, 2, 'AUS', 'DAL'), (1, 2024, 3, 3, 'HOU', 'NOLA'), (2, 2024, 3, 9, 'DAL', 'HOU'),
+                         (2, 2024, 3, 10, 'NOLA', 'AUS'), (3, 2024, 3, 16, 'AUS', 'HOU')],
+                        columns = ['round_number', 'year', 'month', 'day', 'team1', 'team2'])
+
+@pytest.fixture
+def score_table():
+    games = {'AUS': [(1, 'DAL'), (2, 'NOLA')], 'DAL': [(1, 'AUS'), (2, 'HOU')], 'HOU': [(1, 'NOLA'), (2, 'DAL')], 'NOLA': [(1, 'HOU'), (2, 'AUS')]}
+    score_tables = ObjectCollection()
+    for team in games:
+        score_tables[team] = pd.DataFrame(games[team], columns = ['ROUND', 'OPP'])
+    return calculate.long_score_table(score_tables)
+
+def test_weighting_function():
+    function = TemporalWeightingFunction([np.log(2)/7])
+    assert function(np.array([0, 7, 14])) == pytest.approx([1, 0.5, 0.25])
+    assert TemporalWeightingFunction([-1])(10) == pytest.approx(1) # Negative coefficients are ignored
+
+def test_game_dates(schedule, score_table):
+    dates = game_dates(score_table, schedule, 'ROUND')
+    assert list(dates.astype(str)) == ['2024-03-02', '2024-03-10', '2024-03-02', '2024-03-09', '2024-03-03', '2024-03-09', '2024-03-03', '2024-03-10']
+
+    score_table['YEAR'] = 2023
+    score_table['MONTH'] = 5
+    score_table['DAY'] = score_table['ROUND']
+    assert list(game_dates(score_table, schedule, 'ROUND').astype(str)[:2]) == ['2023-05-01', '2023-05-02']
+
+def test_reference_dates(schedule):
+    references = reference_dates(schedule, ['AUS', 'DAL', 'HOU', 'NOLA'], 3)
+    assert {team: str(date) for (team, date) in references.items()} == {'AUS': '2024-03-16', 'DAL': '2024-03-16', 'HOU': '2024-03-16', 'NOLA': '2024-03-16'}
+    assert reference_dates(schedule, ['AUS'], 4) == {}
+
+def test_temporal_weights(schedule, score_table):
+    function = TemporalWeightingFunction([0.05, 0.001])
+    dates = game_dates(score_table, schedule, 'ROUND')
+    references = reference_dates(schedule, ['AUS', 'DAL', 'HOU', 'NOLA'], 2)
+    weight_cache = {}
+    weights = get_temporal_weights(score_table, dates, references, function, weight_cache)
+
+    expected = [function((references[team] - date).astype(float)) for (team, date) in zip(score_table['TEAM'], dates)]
+    assert weights == pytest.approx(expected)
+    assert len(weight_cache) == 2 # Teams playing on the same day share their weights
+
+    weight_cache = {date: np.zeros(len(score_table)) for date in weight_cache}
+    assert (get_temporal_weights(score_table, dates, references, function, weight_cache) == 0).all()
+
+def test_temporal_weights_with_teams_without_games(schedule, score_table):
+    function = TemporalWeightingFunction([0.05])
+    # DAL keeps its category but has no games, and AUS (the first team) has no reference date
+    score_table = score_table[score_table['TEAM'] != 'DAL'].reset_index(drop = True)
+    dates = game_dates(score_table, schedule, 'ROUND')
+    references = reference_dates(schedule, ['DAL', 'HOU', 'NOLA'], 3)
+    weights = get_temporal_weights(score_table, dates, references, function)
+
+    latest = {team: dates[(score_table['TEAM'] == team).values].max() for team in ['AUS', 'HOU', 'NOLA']}
+    expected = [function((references.get(team, latest[team]) - date).astype(float)) for (team, date) in zip(score_table['TEAM'], dates)]
+    assert weights == pytest.approx(expected)